@@ -2,18 +2,22 @@
 import asyncio
 import logging
 import sys
-from aiogram import Bot, Dispatcher
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-from apscheduler.triggers.cron import CronTrigger
+from aiogram import Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
 from config import config
-from database import init_db, close_db, get_session  # get_session YANGI
+from database import init_db, close_db
+from database.crud import preload_settings
+from database.fsm_storage import create_fsm_storage
 from middleware.db import DatabaseMiddleware
 from handlers import user, admin, stats, broadcast, survey, lessons
-from scheduler.tasks import SchedulerTasks
+from scheduler.jobs import create_scheduler, create_leader_election
+from scheduler.outbox_worker import OutboxWorker
+from services.send_engine import send_engine
+from services.tgtrack import tgtrack_emitter
+from services.admin_notifier import admin_notifier
+from utils.bot_info import create_bot, resolve_bot_identity
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,33 +29,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-bot = Bot(
-    token=config.BOT_TOKEN,
-    default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-)
-
-dp = Dispatcher()
-scheduler = AsyncIOScheduler(timezone=config.TIMEZONE)
-
-# SchedulerTasks instansi
-scheduler_tasks = SchedulerTasks(bot)
-
-# ============== WRAPPER FUNKSİYALAR (session yaratadi) ==============
-async def check_launch_users_wrapper():
-    async with get_session() as session:
-        await scheduler_tasks.check_launch_users(session)
+bot = create_bot()
 
-async def send_scheduled_posts_wrapper():
-    async with get_session() as session:
-        await scheduler_tasks.send_scheduled_posts(session)
+dp = Dispatcher(storage=create_fsm_storage())
 
-async def update_user_days_wrapper():
-    async with get_session() as session:
-        await scheduler_tasks.update_user_days(session)
-
-async def cleanup_old_progress_wrapper():
-    async with get_session() as session:
-        await scheduler_tasks.cleanup_old_progress(session)
+# SCHEDULER_MODE=worker bo'lsa scheduler va outbox worker worker.py'da ishlaydi
+EMBEDDED_SCHEDULER = config.SCHEDULER_MODE == "embedded"
+scheduler = create_scheduler(bot)
+leader = create_leader_election(scheduler)
+outbox_worker = OutboxWorker(bot)
 
 # ============== ON STARTUP ==============
 async def on_startup():
@@ -66,41 +52,32 @@ async def on_startup():
     try:
         await init_db()
         logger.info("Database initialized")
+        cached = await preload_settings()
+        logger.info(f"Preloaded {cached} settings")
     except Exception as e:
         logger.error(f"Database initialization error: {e}")
         sys.exit(1)
 
-    # Scheduler joblarni qo‘shish (wrapper orqali)
-    scheduler.add_job(
-        check_launch_users_wrapper,
-        trigger=IntervalTrigger(seconds=30),
-        id='check_launch_users',
-        replace_existing=True
-    )
-
-    scheduler.add_job(
-        send_scheduled_posts_wrapper,
-        trigger=IntervalTrigger(minutes=1),
-        id='send_scheduled_posts',
-        replace_existing=True
-    )
-
-    scheduler.add_job(
-        update_user_days_wrapper,
-        trigger=CronTrigger(hour=0, minute=5, timezone=config.TIMEZONE),
-        id='update_user_days',
-        replace_existing=True
-    )
-
-    scheduler.add_job(
-        cleanup_old_progress_wrapper,
-        trigger=CronTrigger(hour=3, minute=0, timezone=config.TIMEZONE),
-        id='cleanup_old_progress',
-        replace_existing=True
-    )
-
-    scheduler.start()
-    logger.info("Scheduler started")
+    me = await resolve_bot_identity(bot)
+    logger.info(f"Bot: @{me.username}")
+
+    await send_engine.start()
+    await tgtrack_emitter.start()
+    admin_notifier.start(bot)
+
+    if EMBEDDED_SCHEDULER:
+        outbox_worker.start()
+        # Scheduler faqat advisory lock'ni olgan replikada ishga tushadi
+        leader.start()
+
+    if config.BOT_MODE == "webhook":
+        # Har bir replika bir xil URL'ni o'rnatadi - idempotent
+        await bot.set_webhook(
+            f"{config.WEBHOOK_BASE_URL.rstrip('/')}{config.WEBHOOK_PATH}",
+            secret_token=config.WEBHOOK_SECRET or None,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        logger.info(f"Webhook set: {config.WEBHOOK_BASE_URL}{config.WEBHOOK_PATH}")
 
     # Adminlarga xabar
     for admin_id in config.ADMIN_IDS:
@@ -108,7 +85,7 @@ async def on_startup():
             await bot.send_message(
                 admin_id,
                 "Bot успешно запущен!\n\n"
-                "Scheduler активен\n"
+                f"Scheduler: {'встроенный' if EMBEDDED_SCHEDULER else 'отдельный worker'}\n"
                 "База данных подключена\n"
                 f"Часовой пояс: {config.TIMEZONE}\n"
                 "Все системы работают",
@@ -122,7 +99,14 @@ async def on_startup():
 # ============== ON SHUTDOWN ==============
 async def on_shutdown():
     logger.info("Shutting down...")
-    scheduler.shutdown()
+    await leader.stop()
+    if scheduler.running:
+        scheduler.shutdown()
+    await outbox_worker.stop()
+    await admin_notifier.stop()
+    await send_engine.stop()
+    await tgtrack_emitter.stop()
+    await dp.storage.close()
     await close_db()
     for admin_id in config.ADMIN_IDS:
         try:
@@ -146,11 +130,44 @@ async def main():
     dp.startup.register(on_startup)
     dp.shutdown.register(on_shutdown)
 
+    if config.BOT_MODE == "webhook":
+        await run_webhook()
+        return
+
     try:
         await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     finally:
         await bot.session.close()
 
+async def healthcheck(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+def create_webhook_app() -> web.Application:
+    """aiohttp ilova: Telegram update'lari WEBHOOK_PATH'ga POST qilinadi."""
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=config.WEBHOOK_SECRET or None,
+    ).register(app, path=config.WEBHOOK_PATH)
+    app.router.add_get("/healthz", healthcheck)
+    # dp startup/shutdown (on_startup/on_shutdown) aiohttp lifecycle'iga ulanadi
+    setup_application(app, dp, bot=bot)
+    return app
+
+async def run_webhook():
+    runner = web.AppRunner(create_webhook_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host=config.WEBHOOK_HOST, port=config.WEBHOOK_PORT)
+    await site.start()
+    logger.info(f"Webhook server listening on {config.WEBHOOK_HOST}:{config.WEBHOOK_PORT}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+        await bot.session.close()
+
 if __name__ == "__main__":
     try:
         asyncio.run(main())
@@ -1,9 +1,17 @@
 # check_database.py
+import argparse
 import asyncio
-from sqlalchemy import select, func
+import json
+import sys
+from sqlalchemy import select, func, text
+from sqlalchemy.dialects import postgresql
 from database import async_session_maker
-from database.base import User, SchedulePost, ScheduleDay, UserProgress
-from datetime import datetime
+from database.base import (
+    User, SchedulePost, ScheduleDay, UserProgress, SurveyQuestion, SurveyResponse, SurveyAnswer,
+    DeliveryOutbox, LAUNCH_PENDING_SQL,
+)
+from scheduler.tasks import SchedulerTasks
+from datetime import datetime, timedelta
 
 async def check_db():
     async with async_session_maker() as session:
@@ -35,10 +43,11 @@ async def check_db():
         print("\n" + "=" * 60)
         print("3. USER PROGRESS (Today)")
         print("=" * 60)
-        today = datetime.now().date()
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
         progress = await session.execute(
             select(UserProgress).where(
-                func.date(UserProgress.sent_date) == today
+                UserProgress.sent_date >= today,
+                UserProgress.sent_date < today + timedelta(days=1),
             )
         )
         for prog in progress.scalars().all():
@@ -54,5 +63,126 @@ async def check_db():
         for day in days.scalars().all():
             print(f"Day: {day.day_number}")
 
+
+def hot_queries():
+    """(nom, statement) - indeks ishlatishi shart bo'lgan hot query'lar (faqat SELECT)."""
+    today = func.current_date()
+    return [
+        (
+            "scheduler: posts by time",
+            select(SchedulePost.post_id)
+            .join(ScheduleDay)
+            .where(ScheduleDay.day_type > 0, SchedulePost.time.in_(["09:00", "9:00"])),
+        ),
+        ("scheduler: pending deliveries", SchedulerTasks(bot=None)._pending_deliveries_query([0])),
+        (
+            "scheduler: launch sweep",
+            select(User.user_id).where(text(LAUNCH_PENDING_SQL)).order_by(User.user_id).limit(500),
+        ),
+        (
+            "outbox: ready rows",
+            select(DeliveryOutbox.outbox_id)
+            .where(DeliveryOutbox.status == "pending", DeliveryOutbox.available_at <= func.now())
+            .order_by(DeliveryOutbox.available_at, DeliveryOutbox.outbox_id)
+            .limit(100),
+        ),
+        (
+            "stats: funnel",
+            select(User.current_day, func.count(User.user_id))
+            .where(User.is_subscribed == True, User.is_blocked == False)
+            .group_by(User.current_day),
+        ),
+        (
+            "stats: new users today",
+            select(func.count()).select_from(User).where(User.start_date >= today),
+        ),
+        (
+            "progress: sent today",
+            select(func.count()).select_from(UserProgress).where(UserProgress.sent_date >= today),
+        ),
+        (
+            "survey: completed check",
+            select(SurveyResponse.response_id).where(
+                SurveyResponse.user_id == 0,
+                SurveyResponse.survey_id == 0,
+                SurveyResponse.is_completed == True,
+            ),
+        ),
+        (
+            "survey: response answers",
+            select(SurveyQuestion.order_number, SurveyAnswer.answer_text)
+            .join(SurveyAnswer, SurveyAnswer.question_id == SurveyQuestion.question_id)
+            .where(SurveyAnswer.response_id == 0)
+            .order_by(SurveyQuestion.order_number),
+        ),
+    ]
+
+
+def _seq_scans(node: dict) -> list:
+    """Plan daraxtidagi Seq Scan qilingan jadvallar."""
+    found = []
+    if node.get("Node Type") == "Seq Scan":
+        found.append(node.get("Relation Name"))
+    for child in node.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+async def _explain(session, sql: str, options: str) -> dict:
+    result = await session.execute(text(f"EXPLAIN ({options}, FORMAT JSON) {sql}"))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+
+async def check_plans() -> int:
+    """
+    Har bir hot query uchun EXPLAIN (ANALYZE, BUFFERS).
+
+    Kichik jadvalda planner Seq Scan'ni o'zi tanlashi mumkin, shuning uchun Seq Scan
+    chiqsa query enable_seqscan=off bilan qayta rejalanadi: shunda ham Seq Scan
+    qolsa - mos indeks yo'q (regressiya). Qaytaradi: regressiyalar soni.
+    """
+    failures = 0
+    async with async_session_maker() as session:
+        for name, stmt in hot_queries():
+            sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+            plan = await _explain(session, sql, "ANALYZE, BUFFERS")
+            root = plan["Plan"]
+
+            missing = []
+            if _seq_scans(root):
+                await session.execute(text("SET LOCAL enable_seqscan = off"))
+                missing = _seq_scans((await _explain(session, sql, "COSTS"))["Plan"])
+                await session.execute(text("RESET enable_seqscan"))
+
+            status = "FAIL" if missing else "OK"
+            print(
+                f"[{status}] {name}: {root['Node Type']}, "
+                f"{plan.get('Execution Time', 0):.2f} ms, "
+                f"buffers hit={root.get('Shared Hit Blocks', 0)} read={root.get('Shared Read Blocks', 0)}"
+            )
+            if missing:
+                failures += 1
+                print(f"       seq scan without usable index: {', '.join(sorted(set(missing)))}")
+
+        # ANALYZE query'larni bajaradi - hech narsa saqlanmasin
+        await session.rollback()
+
+    print(f"\n{failures} regression(s)" if failures else "\nAll hot queries use indexes")
+    return failures
+
+
 if __name__ == "__main__":
-    asyncio.run(check_db())
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="hot query'lar uchun EXPLAIN (ANALYZE, BUFFERS); Seq Scan regressiyasida exit 1",
+    )
+    args = parser.parse_args()
+
+    if args.explain:
+        sys.exit(1 if asyncio.run(check_plans()) else 0)
+    asyncio.run(check_db())
@@ -1,9 +1,14 @@
 import os
-from typing import List
+from typing import Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _parse_ids(value: str) -> Tuple[int, ...]:
+    return tuple(int(item) for item in value.split(",") if item.strip())
+
+
 class Config:
     BOT_TOKEN: str = os.getenv("BOT_TOKEN", "")
     DATABASE_URL: str = os.getenv(
@@ -12,22 +17,124 @@ class Config:
     )
     
     TGTRACK: str = os.getenv("TGTRACK")
+    TGTRACK_BASE_URL: str = os.getenv("TGTRACK_BASE_URL", "https://bot-api.tgtrack.ru/v1")
+    # TGTrack eventlari fonda yuboriladi: navbat hajmi, workerlar, retry va timeout
+    TGTRACK_QUEUE_SIZE: int = int(os.getenv("TGTRACK_QUEUE_SIZE", "1000"))
+    TGTRACK_WORKERS: int = int(os.getenv("TGTRACK_WORKERS", "2"))
+    TGTRACK_MAX_RETRIES: int = int(os.getenv("TGTRACK_MAX_RETRIES", "3"))
+    TGTRACK_TIMEOUT: float = float(os.getenv("TGTRACK_TIMEOUT", "10"))
 
     BOT_USERNAME: str = os.getenv("BOT_USERNAME", "your_bot_username")
 
     CHANNEL_ID: str = os.getenv("CHANNEL_ID", "")
     CHANNEL_URL: str = os.getenv("CHANNEL_URL", "https://t.me/your_channel")
 
-    ADMIN_IDS: List[int] = [
-        int(admin_id) for admin_id in os.getenv("ADMIN_IDS", "").split(",")
-        if admin_id.strip()
-    ]
+    # O'zgarmas (tuple) - runtime'da hech kim ro'yxatga qo'sha olmaydi
+    ADMIN_IDS: Tuple[int, ...] = _parse_ids(os.getenv("ADMIN_IDS", ""))
+
+    # Anketa bildirishnomalari: adminlar + qo'shimcha oluvchilar (takrorlarsiz)
+    SURVEY_NOTIFY_IDS: Tuple[int, ...] = tuple(dict.fromkeys(
+        ADMIN_IDS + _parse_ids(os.getenv("SURVEY_NOTIFY_EXTRA_IDS", "7329524186"))
+    ))
+    # Admin digest: har N sekundda yoki M ta event yig'ilganda bitta xabar (0 - darhol)
+    ADMIN_DIGEST_INTERVAL: float = float(os.getenv("ADMIN_DIGEST_INTERVAL", "60"))
+    ADMIN_DIGEST_MAX_ITEMS: int = int(os.getenv("ADMIN_DIGEST_MAX_ITEMS", "20"))
     
     TIMEZONE: str = os.getenv("TIMEZONE", "Asia/Tashkent")
     
     BOT_API_SERVER: str = os.getenv("BOT_API_SERVER", "https://api.telegram.org")
     USE_LOCAL_SERVER: bool = os.getenv("USE_LOCAL_SERVER", "false").lower() == "true"
 
+    # Connection pool (asyncpg). STATEMENT_CACHE_SIZE=0 - PgBouncer transaction rejimi uchun
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    # Server tomonida bitta statement uchun chegara (ms, 0 - cheklovsiz)
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "60000"))
+    # Shundan uzoq query'lar logga yoziladi (ms, 0 - o'chirilgan)
+    DB_SLOW_QUERY_MS: int = int(os.getenv("DB_SLOW_QUERY_MS", "500"))
+
+    # Update'larni olish: polling | webhook (webhook - bir nechta replika LB ortida)
+    BOT_MODE: str = os.getenv("BOT_MODE", "polling")
+    WEBHOOK_BASE_URL: str = os.getenv("WEBHOOK_BASE_URL", "")
+    WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/webhook")
+    WEBHOOK_HOST: str = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8080"))
+    WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+
+    # Scheduler qayerda ishlaydi: embedded (bot.py ichida) | worker (alohida worker.py)
+    SCHEDULER_MODE: str = os.getenv("SCHEDULER_MODE", "embedded")
+    # Leader election: barcha replikalar uchun bir xil advisory lock kaliti
+    SCHEDULER_LOCK_KEY: int = int(os.getenv("SCHEDULER_LOCK_KEY", "724501"))
+    # Lock olishga urinish / lider connection'ni tekshirish intervali (sekund)
+    SCHEDULER_LEADER_CHECK_SECONDS: float = float(os.getenv("SCHEDULER_LEADER_CHECK_SECONDS", "10"))
+
+    # FSM storage: memory | postgres | redis. aiogram har update'da get_state chaqiradi:
+    # postgres har message/callback uchun pool connection + SELECT (db=False handlerlar
+    # uchun ham). Bitta process - memory; bir nechta replica - redis tavsiya etiladi.
+    FSM_STORAGE: str = os.getenv("FSM_STORAGE", "memory")
+    FSM_REDIS_URL: str = os.getenv("FSM_REDIS_URL", "redis://localhost:6379/0")
+    # Shu muddatdan beri o'zgarmagan FSM holatlari tozalanadi
+    FSM_STATE_TTL_HOURS: int = int(os.getenv("FSM_STATE_TTL_HOURS", "168"))
+
+    # Settings jadvali uchun in-process kesh muddati (sekund)
+    SETTINGS_CACHE_TTL: int = int(os.getenv("SETTINGS_CACHE_TTL", "60"))
+    # Anketa ta'riflari (survey + savollar) keshi; admin tahriri darhol invalidatsiya qiladi
+    SURVEY_CACHE_TTL: int = int(os.getenv("SURVEY_CACHE_TTL", "300"))
+
+    # Scheduler: bitta planner query'da nechta (user, post) juftligi olinadi
+    DELIVERY_CHUNK_SIZE: int = int(os.getenv("DELIVERY_CHUNK_SIZE", "500"))
+    # Kechikkan tick nechta daqiqagacha orqaga qarab yetkazib beradi
+    SCHEDULE_CATCHUP_MINUTES: int = int(os.getenv("SCHEDULE_CATCHUP_MINUTES", "60"))
+    # Launch trigger'dan chetda qolgan userlarni tekshirish (reconciliation sweep) intervali
+    LAUNCH_RECONCILE_MINUTES: int = int(os.getenv("LAUNCH_RECONCILE_MINUTES", "10"))
+
+    # Send engine: Telegram limitlari (~30 msg/s global, ~1 msg/s bitta chatga)
+    SEND_WORKERS: int = int(os.getenv("SEND_WORKERS", "30"))
+    SEND_GLOBAL_RATE: float = float(os.getenv("SEND_GLOBAL_RATE", "30"))
+    # Bir vaqtda yuboradigan processlar soni (embedded - bot replikalari, worker
+    # rejimida - workerlar): limit har bir process'da SEND_GLOBAL_RATE / SEND_PROCESSES
+    SEND_PROCESSES: int = int(os.getenv("SEND_PROCESSES", "1"))
+    # Adaptiv limit (AIMD): SEND_GLOBAL_RATE - yuqori chegara, 429'da *DECREASE,
+    # har sekund +INCREASE; javob LATENCY_THRESHOLD sekunddan sekin bo'lsa ham pasayadi
+    SEND_MIN_RATE: float = float(os.getenv("SEND_MIN_RATE", "1"))
+    SEND_RATE_INCREASE: float = float(os.getenv("SEND_RATE_INCREASE", "1"))
+    SEND_RATE_DECREASE: float = float(os.getenv("SEND_RATE_DECREASE", "0.5"))
+    SEND_LATENCY_THRESHOLD: float = float(os.getenv("SEND_LATENCY_THRESHOLD", "2"))
+    SEND_PER_CHAT_RATE: float = float(os.getenv("SEND_PER_CHAT_RATE", "1"))
+    SEND_QUEUE_SIZE: int = int(os.getenv("SEND_QUEUE_SIZE", "1000"))
+
+    # Delivery outbox (persistent navbat)
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+    OUTBOX_LEASE_SECONDS: int = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+    # Batch davomida lease har LEASE/3 sekundda uzaytiriladi; uzaytirib bo'lmasa, lease
+    # tugashiga shuncha sekund qolganda yangi yuborishlar to'xtatiladi
+    OUTBOX_LEASE_MARGIN_SECONDS: int = int(os.getenv("OUTBOX_LEASE_MARGIN_SECONDS", "30"))
+    # Worker NOTIFY va eng yaqin available_at bo'yicha uyg'onadi; bu - kutishning yuqori chegarasi
+    OUTBOX_POLL_INTERVAL: float = float(os.getenv("OUTBOX_POLL_INTERVAL", "10"))
+    OUTBOX_RETENTION_DAYS: int = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+    # Vaqtinchalik xatolarda qayta urinishlar: jami urinishlar va backoff (sekund)
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+    OUTBOX_RETRY_BASE_SECONDS: int = int(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "30"))
+    OUTBOX_RETRY_MAX_SECONDS: int = int(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "3600"))
+
+    # daily_user_stats rollup'i necha daqiqada bir yangilanadi
+    STATS_REFRESH_MINUTES: int = int(os.getenv("STATS_REFRESH_MINUTES", "10"))
+
+    # Admin ro'yxatlarida (anketalar, javoblar) bitta sahifadagi elementlar soni
+    ADMIN_PAGE_SIZE: int = int(os.getenv("ADMIN_PAGE_SIZE", "10"))
+
+    # Anketa eksporti: cursor'dan bir martada olinadigan qatorlar va xotiradagi fayl chegarasi
+    EXPORT_FETCH_SIZE: int = int(os.getenv("EXPORT_FETCH_SIZE", "1000"))
+    EXPORT_SPOOL_MAX_BYTES: int = int(os.getenv("EXPORT_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+
+    # Eski yozuvlarni tozalash: user_progress saqlanish muddati va DELETE batch hajmi
+    PROGRESS_RETENTION_DAYS: int = int(os.getenv("PROGRESS_RETENTION_DAYS", "30"))
+    CLEANUP_BATCH_SIZE: int = int(os.getenv("CLEANUP_BATCH_SIZE", "5000"))
+
 
     
     def validate(self):
@@ -37,5 +144,11 @@ class Config:
             raise ValueError("CHANNEL_ID is not set")
         if not self.ADMIN_IDS:
             raise ValueError("ADMIN_IDS is not set")
+        if self.BOT_MODE not in ("polling", "webhook"):
+            raise ValueError(f"Unknown BOT_MODE: {self.BOT_MODE}")
+        if self.BOT_MODE == "webhook" and not self.WEBHOOK_BASE_URL:
+            raise ValueError("WEBHOOK_BASE_URL is not set")
+        if self.SCHEDULER_MODE not in ("embedded", "worker"):
+            raise ValueError(f"Unknown SCHEDULER_MODE: {self.SCHEDULER_MODE}")
 
 config = Config()
\ No newline at end of file
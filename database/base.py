@@ -1,16 +1,27 @@
 # database/models.py - UPDATED
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 from sqlalchemy import (
-    BigInteger, String, Boolean, DateTime, Integer, Text, JSON, ForeignKey,
-    func, Index, SmallInteger
+    BigInteger, String, Boolean, Date, DateTime, Integer, Text, JSON, ForeignKey,
+    func, Index, SmallInteger, text
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 
 Base = declarative_base()
 
+# Launch ketma-ketligi kutayotgan userlar: idx_user_launch_pending predikati va
+# check_launch_users so'rovi bir xil matnni ishlatadi (partial index mos kelishi uchun)
+LAUNCH_PENDING_SQL = (
+    "current_day = 0 AND is_subscribed = true AND subscription_checked = true "
+    "AND first_message_sent = false AND is_blocked = false"
+)
+
+# Post yetkaziladigan userlar (idx_user_deliverable_day predikati)
+DELIVERABLE_SQL = "is_subscribed = true AND is_blocked = false"
+
 class User(Base):
     __tablename__ = "users"
     
@@ -32,6 +43,10 @@ class User(Base):
         Index('idx_user_subscribed', 'is_subscribed'),
         Index('idx_user_active', 'is_active'),
         Index('idx_user_day', 'current_day'),
+        Index('idx_user_start_date', 'start_date'),
+        Index('idx_user_launch_pending', 'user_id', postgresql_where=text(LAUNCH_PENDING_SQL)),
+        # Scheduler anti-join va voronka: kun bo'yicha yetkaziladigan userlar
+        Index('idx_user_deliverable_day', 'current_day', 'user_id', postgresql_where=text(DELIVERABLE_SQL)),
     )
 
 class ScheduleDay(Base):
@@ -71,6 +86,8 @@ class SchedulePost(Base):
     __table_args__ = (
         Index('idx_post_day', 'day_number'),
         Index('idx_post_delay', 'delay_seconds'),
+        # send_scheduled_posts: time IN (...) daqiqa oynasi
+        Index('idx_post_time', 'time', postgresql_where=text("time IS NOT NULL")),
     )
 
 class UserProgress(Base):
@@ -86,8 +103,9 @@ class UserProgress(Base):
     post = relationship("SchedulePost", back_populates="progress")
     
     __table_args__ = (
-        Index('idx_progress_user', 'user_id'),
+        Index('uq_progress_user_post', 'user_id', 'post_id', unique=True),
         Index('idx_progress_post', 'post_id'),
+        Index('idx_progress_sent_date', 'sent_date'),
     )
 
 class Setting(Base):
@@ -135,6 +153,10 @@ class SurveyQuestion(Base):
     survey = relationship("Survey", back_populates="questions")
     answers = relationship("SurveyAnswer", back_populates="question", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index('idx_question_survey', 'survey_id', 'order_number'),
+    )
+
 
 class SurveyResponse(Base):
     """User survey response tracking"""
@@ -152,6 +174,17 @@ class SurveyResponse(Base):
     survey = relationship("Survey", back_populates="responses")
     answers = relationship("SurveyAnswer", back_populates="response", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Admin javoblar ro'yxati: survey bo'yicha keyset (completed_at, response_id)
+        Index(
+            'idx_response_survey_completed',
+            'survey_id', 'completed_at', 'response_id',
+            postgresql_where=text("is_completed = true"),
+        ),
+        # "Anketa allaqachon to'ldirilgan" tekshiruvi va users'dan CASCADE
+        Index('idx_response_user_survey', 'user_id', 'survey_id', 'is_completed'),
+    )
+
 
 class SurveyAnswer(Base):
     """Individual answers to survey questions"""
@@ -166,6 +199,10 @@ class SurveyAnswer(Base):
     response = relationship("SurveyResponse", back_populates="answers")
     question = relationship("SurveyQuestion", back_populates="answers")
 
+    __table_args__ = (
+        Index('idx_answer_response_question', 'response_id', 'question_id'),
+    )
+
 
 # ===================== LESSONS / UROKI =====================
 
@@ -228,3 +265,147 @@ class LessonPost(Base):
         Index('idx_lesson_posts_lesson', 'lesson_id'),
         Index('idx_lesson_posts_order', 'lesson_id', 'order_number'),
     )
+
+
+# ===================== DELIVERY OUTBOX =====================
+
+
+class BroadcastCampaign(Base):
+    """Admin rassilkasi: kontent bir marta saqlanadi, outbox qatorlari unga ishora qiladi."""
+
+    __tablename__ = "broadcasts"
+
+    broadcast_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    broadcast_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    content: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    file_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    caption: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    survey_id: Mapped[Optional[int]] = mapped_column(
+        Integer,
+        ForeignKey("surveys.survey_id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    target: Mapped[str] = mapped_column(String(50), default="all")
+    total: Mapped[int] = mapped_column(Integer, default=0)
+
+    # Progress xabari (restartdan keyin ham yangilashni davom ettirish uchun)
+    progress_chat_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    progress_message_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    survey = relationship("Survey")
+
+
+class DeliveryOutbox(Base):
+    """Yuborilishi kerak bo'lgan har bir xabar (scheduled/launch post yoki rassilka).
+
+    Workerlar `SELECT ... FOR UPDATE SKIP LOCKED` bilan batch'ni lease qilib oladi,
+    yuboradi va natijani UserProgress bilan bitta tranzaksiyada yozadi.
+    """
+
+    __tablename__ = "delivery_outbox"
+
+    outbox_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    post_id: Mapped[Optional[int]] = mapped_column(
+        Integer,
+        ForeignKey("schedule_posts.post_id", ondelete="CASCADE"),
+        nullable=True,
+    )
+    broadcast_id: Mapped[Optional[int]] = mapped_column(
+        Integer,
+        ForeignKey("broadcasts.broadcast_id", ondelete="CASCADE"),
+        nullable=True,
+    )
+
+    status: Mapped[str] = mapped_column(String(20), default="pending", nullable=False)
+    # Yuqori priority avval claim qilinadi (interaktiv xabarlar rassilka navbatini kutmaydi)
+    priority: Mapped[int] = mapped_column(SmallInteger, default=0, server_default="0", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    available_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('idx_outbox_ready', 'status', 'available_at'),
+        Index('idx_outbox_broadcast', 'broadcast_id', 'status'),
+        # Bitta (user, post) juftligi navbatda faqat bir marta turadi
+        Index(
+            'uq_outbox_pending_post',
+            'user_id', 'post_id',
+            unique=True,
+            postgresql_where=text("post_id IS NOT NULL AND status IN ('pending', 'processing')"),
+        ),
+    )
+
+
+class DeliveryDeadLetter(Base):
+    """Urinishlari tugagan yoki qayta urinib bo'lmaydigan yuborishlar (tahlil uchun).
+
+    Outbox qatori `failed` bo'lib qoladi va retention bo'yicha tozalanadi;
+    bu yerda esa xato turi va oxirgi xato saqlanib qoladi.
+    """
+
+    __tablename__ = "delivery_dead_letters"
+
+    dead_letter_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    outbox_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    post_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    broadcast_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    error_kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    failed_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index('idx_dead_letter_failed_at', 'failed_at'),
+    )
+
+
+# ===================== STATISTIKA =====================
+
+
+class DailyUserStats(Base):
+    """Kunlik statistika snapshot'i (rollup).
+
+    Joriy kun qatori scheduler tomonidan vaqti-vaqti bilan yangilanadi, o'tgan
+    kunlar o'zgarmaydi - statistika ekrani users jadvalini skan qilmaydi.
+    """
+
+    __tablename__ = "daily_user_stats"
+
+    stat_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    new_users: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_users: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Migratsiyadagi backfill qatorlari uchun noma'lum (NULL)
+    active_users: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    blocked_users: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    subscribed_users: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # {current_day: count} - voronka
+    funnel: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+# ===================== FSM =====================
+
+
+class FsmState(Base):
+    """aiogram FSM holati (PostgresStorage) - restart va bir nechta process uchun."""
+
+    __tablename__ = "fsm_states"
+
+    storage_key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    state: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('idx_fsm_updated', 'updated_at'),
+    )
@@ -1,24 +1,62 @@
 
-from sqlalchemy import select, func, delete, update, and_, or_
+from sqlalchemy import select, func, delete, update, and_, or_, literal_column
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-from typing import Optional, List
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, List, Tuple
 
-from database.base import User, ScheduleDay, SchedulePost, UserProgress, Setting
+from database.base import User, ScheduleDay, SchedulePost, UserProgress, Setting, Survey, SurveyQuestion
 from database.session import async_session_maker  # BU YERDA O'ZGARDI
+from config import config
+
+
+_MISSING = object()
+# key -> (qiymat yoki _MISSING, amal qilish muddati monotonic bo'yicha)
+_settings_cache: Dict[str, Tuple[object, float]] = {}
+
+
+def _cache_setting(key: str, value) -> None:
+    _settings_cache[key] = (value, time.monotonic() + config.SETTINGS_CACHE_TTL)
+
+
+def invalidate_setting(key: Optional[str] = None) -> None:
+    """Sozlama keshini tozalash (key berilmasa - hammasini)"""
+    if key is None:
+        _settings_cache.clear()
+    else:
+        _settings_cache.pop(key, None)
+
+
+async def preload_settings() -> int:
+    """Startup'da barcha sozlamalarni bitta query bilan keshga yuklash"""
+    async with async_session_maker() as session:
+        result = await session.execute(select(Setting.setting_key, Setting.setting_value))
+        rows = result.all()
+
+    for key, value in rows:
+        _cache_setting(key, value)
+    return len(rows)
 
 
 async def get_setting(key: str, default: str = None) -> str:
-    """Sozlamani olish"""
-    async with async_session_maker() as session:  # async_session_maker ishlatiladi
-        result = await session.execute(
-            select(Setting).where(Setting.setting_key == key)
-        )
-        setting = result.scalar_one_or_none()
-        
-        if setting:
-            return setting.setting_value
+    """Sozlamani olish (TTL kesh orqali - har xabarda DB'ga bormaydi)"""
+    cached = _settings_cache.get(key)
+    if cached is not None and cached[1] > time.monotonic():
+        value = cached[0]
+    else:
+        async with async_session_maker() as session:  # async_session_maker ishlatiladi
+            result = await session.execute(
+                select(Setting).where(Setting.setting_key == key)
+            )
+            setting = result.scalar_one_or_none()
+
+        value = setting.setting_value if setting else _MISSING
+        _cache_setting(key, value)
+
+    if value is _MISSING:
         return default
+    return value
 
 
 async def update_setting(key: str, value: str):
@@ -37,9 +75,89 @@ async def update_setting(key: str, value: str):
         
         await session.commit()
 
+    # Shu process'da darhol yangi qiymat; boshqa process'lar TTL o'tgach ko'radi
+    _cache_setting(key, value)
+
+
+@dataclass(frozen=True)
+class CachedQuestion:
+    question_id: int
+    question_text: str
+    order_number: int
+
+
+@dataclass(frozen=True)
+class SurveyDefinition:
+    """Anketa + tartiblangan savollar (o'zgarmas snapshot, session'ga bog'liq emas)"""
+    survey_id: int
+    name: str
+    button_text: str
+    message_text: Optional[str]
+    message_photo_file_id: Optional[str]
+    completion_message: Optional[str]
+    completion_photo_file_id: Optional[str]
+    tgtrack_target: Optional[str]
+    is_active: bool
+    questions: Tuple[CachedQuestion, ...]
+    version: int
+
+    def question(self, question_id: int) -> Optional[CachedQuestion]:
+        for question in self.questions:
+            if question.question_id == question_id:
+                return question
+        return None
+
+
+# survey_id -> (definition, amal qilish muddati)
+_survey_cache: Dict[int, Tuple[SurveyDefinition, float]] = {}
+# survey_id -> versiya; har bir invalidatsiyada oshadi
+_survey_versions: Dict[int, int] = {}
+
+
+def invalidate_survey(survey_id: int) -> None:
+    """Anketa yoki uning savollari o'zgarganda chaqiriladi (admin handlerlar)"""
+    _survey_versions[survey_id] = _survey_versions.get(survey_id, 0) + 1
+    _survey_cache.pop(survey_id, None)
+
+
+async def get_survey_definition(session: AsyncSession, survey_id: int) -> Optional[SurveyDefinition]:
+    """Anketa ta'rifini olish (TTL kesh; yo'q bo'lsa - None)"""
+    cached = _survey_cache.get(survey_id)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+
+    version = _survey_versions.get(survey_id, 0)
+
+    result = await session.execute(select(Survey).where(Survey.survey_id == survey_id))
+    survey = result.scalar_one_or_none()
+    if not survey:
+        return None
+
+    questions_result = await session.execute(
+        select(SurveyQuestion.question_id, SurveyQuestion.question_text, SurveyQuestion.order_number)
+        .where(SurveyQuestion.survey_id == survey_id)
+        .order_by(SurveyQuestion.order_number, SurveyQuestion.question_id)
+    )
+
+    definition = SurveyDefinition(
+        survey_id=survey.survey_id,
+        name=survey.name,
+        button_text=survey.button_text,
+        message_text=survey.message_text,
+        message_photo_file_id=survey.message_photo_file_id,
+        completion_message=survey.completion_message,
+        completion_photo_file_id=survey.completion_photo_file_id,
+        tgtrack_target=survey.tgtrack_target,
+        is_active=survey.is_active,
+        questions=tuple(CachedQuestion(*row) for row in questions_result.all()),
+        version=version,
+    )
+
+    # Yuklash davomida invalidatsiya bo'lgan bo'lsa - eskirgan snapshot keshga yozilmaydi
+    if _survey_versions.get(survey_id, 0) == version:
+        _survey_cache[survey_id] = (definition, time.monotonic() + config.SURVEY_CACHE_TTL)
+    return definition
 
-# Agar boshqa CRUD funksiyalar ham bo'lsa, ularni ham shunday qiling
-# Misol:
 
 async def get_user(user_id: int) -> Optional[User]:
     """Foydalanuvchini olish"""
@@ -110,4 +228,29 @@ async def get_day_posts(day_number: int) -> List[SchedulePost]:
             .where(SchedulePost.day_number == day_number)
             .order_by(SchedulePost.time, SchedulePost.order_number)
         )
-        return result.scalars().all()
\ No newline at end of file
+        return result.scalars().all()
+
+async def delete_in_batches(session: AsyncSession, model, *criteria, batch_size: int = 5000) -> int:
+    """
+    Katta jadvaldan shart bo'yicha qatorlarni server tomonida batch'lab o'chirish.
+
+    `DELETE ... WHERE ctid IN (SELECT ctid ... LIMIT n)` - har bir batch alohida
+    commit, shuning uchun lock va WAL bir vaqtda kichik bo'ladi. Qaytaradi: jami
+    o'chirilgan qatorlar soni.
+    """
+    ctid = literal_column("ctid")
+    batch = select(ctid).select_from(model).where(*criteria).limit(batch_size)
+
+    deleted = 0
+    while True:
+        result = await session.execute(
+            delete(model)
+            .where(ctid.in_(batch.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+        count = result.rowcount or 0
+        deleted += count
+        if count < batch_size:
+            return deleted
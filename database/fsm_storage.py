@@ -0,0 +1,137 @@
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import cast, func, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+
+from config import config
+from database.base import FsmState
+from database.crud import delete_in_batches
+from database.session import async_session_maker
+
+
+class PostgresStorage(BaseStorage):
+    """
+    FSM holatini `fsm_states` jadvalida saqlovchi storage.
+
+    Holat restartdan keyin ham saqlanadi va bir nechta bot process'i orasida
+    umumiy bo'ladi. update_data bitta atomik `data || patch` UPDATE bilan.
+    """
+
+    def __init__(self, key_builder: Optional[KeyBuilder] = None):
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+
+    def _key(self, key: StorageKey) -> str:
+        return self.key_builder.build(key)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        async with async_session_maker() as session:
+            await session.execute(
+                pg_insert(FsmState)
+                .values(storage_key=self._key(key), state=value)
+                .on_conflict_do_update(
+                    index_elements=[FsmState.storage_key],
+                    set_={"state": value, "updated_at": func.now()},
+                )
+            )
+            await session.commit()
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(FsmState.state).where(FsmState.storage_key == self._key(key))
+            )
+            return result.scalar_one_or_none()
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        async with async_session_maker() as session:
+            await session.execute(
+                pg_insert(FsmState)
+                .values(storage_key=self._key(key), data=data)
+                .on_conflict_do_update(
+                    index_elements=[FsmState.storage_key],
+                    set_={"data": data, "updated_at": func.now()},
+                )
+            )
+            await session.commit()
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(FsmState.data).where(FsmState.storage_key == self._key(key))
+            )
+            data = result.scalar_one_or_none()
+        return dict(data) if data else {}
+
+    async def update_data(self, key: StorageKey, data: Dict[str, Any]) -> Dict[str, Any]:
+        storage_key = self._key(key)
+        async with async_session_maker() as session:
+            result = await session.execute(
+                update(FsmState)
+                .where(FsmState.storage_key == storage_key)
+                .values(data=FsmState.data.op("||")(cast(data, JSONB)), updated_at=func.now())
+                .returning(FsmState.data)
+            )
+            merged = result.scalar_one_or_none()
+            if merged is None:
+                # Qator hali yo'q - yangisini yaratamiz (parallel yaratilsa ham birlashtiriladi)
+                result = await session.execute(
+                    pg_insert(FsmState)
+                    .values(storage_key=storage_key, data=data)
+                    .on_conflict_do_update(
+                        index_elements=[FsmState.storage_key],
+                        set_={
+                            "data": FsmState.data.op("||")(cast(data, JSONB)),
+                            "updated_at": func.now(),
+                        },
+                    )
+                    .returning(FsmState.data)
+                )
+                merged = result.scalar_one()
+            await session.commit()
+        return dict(merged)
+
+    async def close(self) -> None:
+        pass
+
+
+async def cleanup_fsm_states(ttl_hours: int = config.FSM_STATE_TTL_HOURS) -> int:
+    """TTL'dan eski (tashlab ketilgan) FSM holatlarini o'chirish."""
+    async with async_session_maker() as session:
+        return await delete_in_batches(
+            session,
+            FsmState,
+            FsmState.updated_at < func.now() - timedelta(hours=ttl_hours),
+            batch_size=config.CLEANUP_BATCH_SIZE,
+        )
+
+
+def create_fsm_storage() -> BaseStorage:
+    """config.FSM_STORAGE bo'yicha storage: memory | postgres | redis."""
+    kind = config.FSM_STORAGE.lower()
+
+    if kind == "memory":
+        return MemoryStorage()
+
+    if kind == "postgres":
+        return PostgresStorage()
+
+    if kind == "redis":
+        try:
+            from aiogram.fsm.storage.redis import RedisStorage
+        except ImportError as e:
+            raise RuntimeError("FSM_STORAGE=redis requires the 'redis' package (pip install redis)") from e
+
+        ttl = timedelta(hours=config.FSM_STATE_TTL_HOURS)
+        return RedisStorage.from_url(
+            config.FSM_REDIS_URL,
+            key_builder=DefaultKeyBuilder(with_bot_id=True, with_destiny=True),
+            state_ttl=ttl,
+            data_ttl=ttl,
+        )
+
+    raise ValueError(f"Unknown FSM_STORAGE: {config.FSM_STORAGE}")
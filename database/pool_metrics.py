@@ -0,0 +1,66 @@
+import logging
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+
+# Pool va query hisoblagichlari (/dbstats'da ko'rsatiladi)
+pool_stats = {
+    "checkouts": 0,
+    "overflow_hits": 0,
+    "timeouts": 0,
+    "wait_total_ms": 0.0,
+    "wait_max_ms": 0.0,
+    "queries": 0,
+    "slow_queries": 0,
+}
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Connection olish vaqtini va overflow/timeout holatlarini o'lchaydigan pool."""
+
+    def _do_get(self):
+        overflow_before = self.overflow()
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats["timeouts"] += 1
+            logger.warning(f"DB pool exhausted: {self.status()}")
+            raise
+
+        waited = (time.perf_counter() - started) * 1000
+        pool_stats["checkouts"] += 1
+        pool_stats["wait_total_ms"] += waited
+        pool_stats["wait_max_ms"] = max(pool_stats["wait_max_ms"], waited)
+        # Faqat yangi overflow connection ochilganda (overflow() -pool_size dan boshlanadi)
+        if self.overflow() > max(overflow_before, 0):
+            pool_stats["overflow_hits"] += 1
+        return record
+
+
+def install_slow_query_log(engine: Engine, threshold_ms: int):
+    """threshold_ms'dan uzoq bajarilgan SQL'larni WARNING bilan yozish (0 - o'chirilgan)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        pool_stats["queries"] += 1
+        if threshold_ms and elapsed >= threshold_ms:
+            pool_stats["slow_queries"] += 1
+            logger.warning(f"Slow query ({elapsed:.0f} ms): {' '.join(statement.split())[:500]}")
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # Xato bo'lgan query'ning start vaqti stack'da qolib ketmasin
+        if context.connection is not None:
+            starts = context.connection.info.get("query_start")
+            if starts:
+                starts.pop()
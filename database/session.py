@@ -7,17 +7,30 @@ from sqlalchemy.ext.asyncio import (
     AsyncEngine
 )
 import sqlalchemy as sa
+from sqlalchemy.engine import make_url
 from config import config
 from database.base import Base
+from database.pool_metrics import InstrumentedPool, install_slow_query_log
 
 # Engine yaratish
 engine: AsyncEngine = create_async_engine(
-    config.DATABASE_URL,
+    # SQLAlchemy'ning o'z prepared statement keshi ham asyncpg keshi bilan bir xil
+    make_url(config.DATABASE_URL).update_query_dict(
+        {"prepared_statement_cache_size": str(config.DB_STATEMENT_CACHE_SIZE)}
+    ),
     echo=False,  # SQL querylarni ko'rsatish (development uchun True)
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    poolclass=InstrumentedPool,
+    pool_pre_ping=config.DB_POOL_PRE_PING,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+    pool_recycle=config.DB_POOL_RECYCLE,
+    connect_args={
+        "statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+        "server_settings": {"statement_timeout": str(config.DB_STATEMENT_TIMEOUT_MS)},
+    },
 )
+install_slow_query_log(engine.sync_engine, config.DB_SLOW_QUERY_MS)
 
 # Session factory
 async_session_maker = async_sessionmaker(
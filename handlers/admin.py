@@ -24,6 +24,7 @@ from utils.helpers import is_admin, truncate_text, format_moscow_time, strip_htm
 import html
 
 from utils.telegram_html import repair_telegram_html, preview_plain, safe_answer_html
+from utils.bot_info import get_bot_username
 
 
 router = Router(name="admin_router")
@@ -845,8 +846,7 @@ async def view_post(callback: CallbackQuery, session: AsyncSession):
                 survey = survey_result.scalar_one_or_none()
                 
                 if survey:
-                    from config import config
-                    bot_username = config.BOT_USERNAME
+                    bot_username = get_bot_username()
                     
                     keyboard = InlineKeyboardMarkup(inline_keyboard=[
                         [InlineKeyboardButton(
@@ -1,6 +1,5 @@
 # handlers/broadcast.py
-import asyncio
-import time
+import logging
 
 from aiogram import Router, F
 from aiogram.types import (
@@ -12,23 +11,22 @@ from aiogram.types import (
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.exceptions import TelegramForbiddenError
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, and_
 
-from config import config
-from database.base import User, Survey
+from database.base import User, Survey, BroadcastCampaign
+from services import outbox
 from keyboards.admin_kb import (
     get_broadcast_type_keyboard,
     get_broadcast_target_keyboard,
-    get_admin_main_keyboard,
 )
 from utils.texts import Texts
-from utils.helpers import is_admin, format_time_delta
+from utils.helpers import is_admin
+from utils.bot_info import get_bot_username
 
 router = Router(name="broadcast_router")
-
+logger = logging.getLogger(__name__)
 
 # ================= FSM =================
 
@@ -162,7 +160,7 @@ async def broadcast_survey_selected(
         )
     ).scalar()
 
-    deep_link = f"https://t.me/{config.BOT_USERNAME}?start=survey_{survey_id}"
+    deep_link = f"https://t.me/{get_bot_username()}?start=survey_{survey_id}"
 
     preview_kb = InlineKeyboardMarkup(
         inline_keyboard=[
@@ -334,46 +332,29 @@ async def broadcast_execute(
     target = data["target"]
 
     if target == "all":
-        users = (await session.execute(select(User.user_id))).all()
+        user_filter = None
     else:
-        users = (
-            await session.execute(
-                select(User.user_id).where(
-                    User.is_active == True,
-                    User.is_blocked == False,
-                )
-            )
-        ).all()
+        user_filter = and_(User.is_active == True, User.is_blocked == False)
+
+    campaign = BroadcastCampaign(
+        broadcast_type=btype,
+        content=data.get("content"),
+        file_id=data.get("file_id"),
+        caption=data.get("caption"),
+        survey_id=data.get("survey_id") if btype == "survey" else None,
+        target=target,
+    )
+    session.add(campaign)
+    await session.flush()
 
-    user_ids = [u[0] for u in users]
-    total = len(user_ids)
+    # Qabul qiluvchilar server tomonda, bitta INSERT ... SELECT bilan navbatga qo'yiladi
+    total = await outbox.enqueue_broadcast(session, campaign.broadcast_id, user_filter)
 
     if total == 0:
+        await session.rollback()
         await callback.answer("❌ Нет пользователей", show_alert=True)
         return
 
-    # ===== PREPARE SURVEY (ONCE) =====
-    survey_text = None
-    survey_kb = None
-    if btype == "survey":
-        survey = (
-            await session.execute(
-                select(Survey).where(Survey.survey_id == data["survey_id"])
-            )
-        ).scalar_one()
-        link = f"https://t.me/{config.BOT_USERNAME}?start=survey_{survey.survey_id}"
-        survey_text = survey.message_text or "Пожалуйста, заполните анкету:"
-        survey_kb = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text=survey.button_text or "📝 Заполнить",
-                        url=link,
-                    )
-                ]
-            ]
-        )
-
     progress = await callback.message.edit_text(
         Texts.BROADCAST_PROGRESS.format(
             percent=0,
@@ -385,55 +366,12 @@ async def broadcast_execute(
         parse_mode="HTML",
     )
 
-    sent = failed = blocked = 0
-    start = time.time()
-
-    for i, uid in enumerate(user_ids, 1):
-        try:
-            if btype == "survey":
-                await callback.bot.send_message(
-                    uid,
-                    survey_text,
-                    reply_markup=survey_kb,
-                    parse_mode="HTML",
-                )
-            else:
-                await callback.bot.send_message(uid, data["content"], parse_mode="HTML")
-            sent += 1
-        except TelegramForbiddenError:
-            blocked += 1
-            failed += 1
-        except Exception:
-            failed += 1
-
-        if i % 10 == 0 or i == total:
-            await progress.edit_text(
-                Texts.BROADCAST_PROGRESS.format(
-                    percent=int(i / total * 100),
-                    sent=sent,
-                    total=total,
-                    remaining=total - i,
-                    failed=failed,
-                ),
-                parse_mode="HTML",
-            )
+    campaign.total = total
+    campaign.progress_chat_id = progress.chat.id
+    campaign.progress_message_id = progress.message_id
+    await session.commit()
 
-        if i % 30 == 0:
-            await asyncio.sleep(1)
-
-    await progress.edit_text(
-        Texts.BROADCAST_COMPLETE.format(
-            sent=sent,
-            sent_percent=round(sent / total * 100, 1),
-            failed=failed,
-            failed_percent=round(failed / total * 100, 1),
-            blocked=blocked,
-            errors=failed,
-            duration=format_time_delta(int(time.time() - start)),
-        ),
-        reply_markup=get_admin_main_keyboard(),
-        parse_mode="HTML",
-    )
+    # Progress'ni lider processdagi scheduler job (update_broadcast_progress) yangilaydi
 
     await state.clear()
-    await callback.answer("✅ Рассылка завершена")
+    await callback.answer("✅ Рассылка запущена")
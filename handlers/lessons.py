@@ -1,4 +1,3 @@
-import asyncio
 import re
 from typing import Optional
 from urllib.parse import quote
@@ -12,11 +11,11 @@ from aiogram.fsm.state import State, StatesGroup
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete, func
 
-from config import config
 from database.base import Lesson, LessonPost, Survey
 from keyboards.admin_kb import get_admin_main_keyboard, get_lesson_post_type_keyboard, get_survey_selection_keyboard
 from utils.helpers import is_admin, truncate_text
 from utils.telegram_html import repair_telegram_html, safe_answer_html
+from utils.bot_info import get_bot_username
 
 router = Router(name="lessons_router")
 
@@ -177,7 +176,7 @@ async def _send_single_post(message: Message, post: LessonPost, session: AsyncSe
         # So we open the bot with a prefilled message (user still presses Send).
         # Use a stable prefilled message that is always understood by the bot,
         # regardless of how the survey is named.
-        prefill = get_prefilled_message_link(config.BOT_USERNAME, f"Анкета {survey.survey_id}")
+        prefill = get_prefilled_message_link(get_bot_username(), f"Анкета {survey.survey_id}")
         keyboard = InlineKeyboardMarkup(
             inline_keyboard=[[ 
                 InlineKeyboardButton(
@@ -295,8 +294,8 @@ async def _send_single_post(message: Message, post: LessonPost, session: AsyncSe
     await message.answer("❌ Неподдерживаемый тип поста", parse_mode="HTML")
 
 
-async def send_lesson_to_chat(message: Message, lesson_id: int, session: AsyncSession, *, with_delays: bool = False):
-    """Send lesson to current chat. If with_delays=True, respects delay_seconds between posts."""
+async def send_lesson_to_chat(message: Message, lesson_id: int, session: AsyncSession):
+    """Send lesson to current chat (posts are sent one after another, without delays)."""
 
     res = await session.execute(select(Lesson).where(Lesson.lesson_id == lesson_id))
     lesson = res.scalar_one_or_none()
@@ -329,11 +328,7 @@ async def send_lesson_to_chat(message: Message, lesson_id: int, session: AsyncSe
         await message.answer("⚠️ Урок пока пустой. Админ не добавил посты.", parse_mode="HTML")
         return
 
-    for idx, post in enumerate(posts):
-        if with_delays and idx > 0:
-            delay = int(post.delay_seconds or 0)
-            if delay > 0:
-                await asyncio.sleep(delay)
+    for post in posts:
         await _send_single_post(message, post, session)
 
 
@@ -406,8 +401,8 @@ async def lesson_create_name(message: Message, state: FSMContext, session: Async
     await session.commit()
     await session.refresh(lesson)
 
-    bot_link = get_bot_link(config.BOT_USERNAME)
-    prefill_link = get_prefilled_message_link(config.BOT_USERNAME, lesson.name)
+    bot_link = get_bot_link(get_bot_username())
+    prefill_link = get_prefilled_message_link(get_bot_username(), lesson.name)
 
     await message.answer(
         "✅ <b>Урок создан!</b>\n\n"
@@ -454,8 +449,8 @@ async def lesson_open(callback: CallbackQuery, session: AsyncSession):
     )
     posts = posts_res.scalars().all()
 
-    bot_link = get_bot_link(config.BOT_USERNAME)
-    prefill_link = get_prefilled_message_link(config.BOT_USERNAME, lesson.name)
+    bot_link = get_bot_link(get_bot_username())
+    prefill_link = get_prefilled_message_link(get_bot_username(), lesson.name)
 
     text = (
         f"📚 <b>{lesson.name}</b>\n\n"
@@ -493,7 +488,7 @@ async def lesson_preview(callback: CallbackQuery, session: AsyncSession):
     lesson_id = int(callback.data.split(":")[2])
 
     await callback.message.answer("👁 <b>ПРЕДПРОСМОТР УРОКА:</b>", parse_mode="HTML")
-    await send_lesson_to_chat(callback.message, lesson_id, session, with_delays=False)
+    await send_lesson_to_chat(callback.message, lesson_id, session)
 
     await callback.answer("✅ Предпросмотр отправлен")
 
@@ -1055,7 +1050,7 @@ async def lesson_post_view(callback: CallbackQuery, session: AsyncSession):
                         inline_keyboard=[[
                             InlineKeyboardButton(
                                 text=survey.button_text,
-                                url=f"https://t.me/{config.BOT_USERNAME}?start=survey_{survey.survey_id}",
+                                url=f"https://t.me/{get_bot_username()}?start=survey_{survey.survey_id}",
                             )
                         ]]
                     )
@@ -1422,4 +1417,4 @@ async def lesson_post_delete(callback: CallbackQuery, session: AsyncSession):
 
 async def send_lesson_by_id(message: Message, lesson_id: int, session: AsyncSession):
     """User ko'radigan urokni yuborish (deep-link yoki oddiy SMS orqali)."""
-    await send_lesson_to_chat(message, lesson_id, session, with_delays=False)
+    await send_lesson_to_chat(message, lesson_id, session)
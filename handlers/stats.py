@@ -1,17 +1,30 @@
 # handlers/stats.py
 from aiogram import Router, F
-from aiogram.types import CallbackQuery
+from aiogram.filters import Command
+from aiogram.types import CallbackQuery, Message
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, text
-from datetime import datetime, timedelta
 
-from database.base import User
+from database.pool_metrics import pool_stats
+from database.session import engine
+from middleware.db import DatabaseMiddleware
+from services import user_stats
+from services.flood_governor import flood_governor
 from utils.texts import Texts
 from utils.helpers import is_admin
 from keyboards.admin_kb import get_admin_main_keyboard
 
 router = Router(name="stats_router")
 
+
+def format_trend(current: int, previous: int) -> str:
+    """Oldingi davrga nisbatan o'zgarish: (▲ 12%) / (▼ 5%)"""
+    if not previous:
+        return ""
+    change = round((current - previous) / previous * 100)
+    arrow = "▲" if change >= 0 else "▼"
+    return f"({arrow} {abs(change)}%)"
+
+
 @router.callback_query(F.data == "admin:stats")
 async def show_statistics(callback: CallbackQuery, session: AsyncSession):
     """Statistikani ko'rsatish"""
@@ -19,67 +32,20 @@ async def show_statistics(callback: CallbackQuery, session: AsyncSession):
         await callback.answer("❌ Нет доступа")
         return
     
-    # Jami userlar
-    total_result = await session.execute(
-        select(func.count(User.user_id))
-    )
-    total_users = total_result.scalar()
-    
-    # Aktiv userlar
-    active_result = await session.execute(
-        select(func.count(User.user_id)).where(
-            User.is_active == True,
-            User.is_blocked == False
-        )
-    )
-    active_users = active_result.scalar()
-    
-    # Bloklagan userlar
-    blocked_result = await session.execute(
-        select(func.count(User.user_id)).where(User.is_blocked == True)
-    )
-    blocked_users = blocked_result.scalar()
-    
-    # Bugungi yangi userlar
-    today_result = await session.execute(
-        select(func.count(User.user_id)).where(
-            func.date(User.start_date) == func.current_date()
-        )
-    )
-    today_new = today_result.scalar()
-    
-    # Haftalik yangi userlar (PostgreSQL uchun to'g'ri sintaksis)
-    week_result = await session.execute(
-        select(func.count(User.user_id)).where(
-            User.start_date >= text("CURRENT_DATE - INTERVAL '7 days'")
-        )
-    )
-    week_new = week_result.scalar()
-    
-    # Oylik yangi userlar (PostgreSQL uchun to'g'ri sintaksis)
-    month_result = await session.execute(
-        select(func.count(User.user_id)).where(
-            User.start_date >= text("CURRENT_DATE - INTERVAL '30 days'")
-        )
-    )
-    month_new = month_result.scalar()
-    
+    # Hammasi daily_user_stats rollup'idan (users jadvali skan qilinmaydi)
+    dashboard = await user_stats.load_dashboard(session)
+
+    total_users = dashboard["total"]
+    active_users = dashboard["active"]
+    blocked_users = dashboard["blocked"]
+
     # Foizlarni hisoblash
     active_percent = round((active_users / total_users * 100), 1) if total_users > 0 else 0
     blocked_percent = round((blocked_users / total_users * 100), 1) if total_users > 0 else 0
-    
+
     # Voronka statistikasi
-    funnel_result = await session.execute(
-        select(
-            User.current_day,
-            func.count(User.user_id).label('count')
-        ).where(
-            User.is_subscribed == True,
-            User.is_blocked == False
-        ).group_by(User.current_day).order_by(User.current_day)
-    )
-    funnel_data_raw = funnel_result.all()
-    
+    funnel_data_raw = dashboard["funnel"]
+
     funnel_text = ""
     if funnel_data_raw:
         prev_count = None
@@ -97,6 +63,13 @@ async def show_statistics(callback: CallbackQuery, session: AsyncSession):
             prev_count = count
     else:
         funnel_text = "<i>Нет данных</i>"
+
+    # Kunlik dinamika
+    daily_text = ""
+    for stat_date, new_users, day_total in dashboard["daily"]:
+        daily_text += f"{stat_date.strftime('%d.%m')}: +{new_users} (всего {day_total})\n"
+    if not daily_text:
+        daily_text = "<i>Нет данных</i>"
     
     stats_message = Texts.STATS_MESSAGE.format(
         total_users=total_users,
@@ -104,10 +77,14 @@ async def show_statistics(callback: CallbackQuery, session: AsyncSession):
         active_percent=active_percent,
         blocked_users=blocked_users,
         blocked_percent=blocked_percent,
-        today_new=today_new,
-        week_new=week_new,
-        month_new=month_new,
-        funnel_data=funnel_text
+        today_new=dashboard["today_new"],
+        week_new=dashboard["week_new"],
+        week_trend=format_trend(dashboard["week_new"], dashboard["prev_week_new"]),
+        month_new=dashboard["month_new"],
+        month_trend=format_trend(dashboard["month_new"], dashboard["prev_month_new"]),
+        daily_data=daily_text,
+        funnel_data=funnel_text,
+        updated_at=dashboard["updated_at"].strftime("%d.%m %H:%M"),
     )
     
     await callback.message.edit_text(
@@ -115,4 +92,24 @@ async def show_statistics(callback: CallbackQuery, session: AsyncSession):
         reply_markup=get_admin_main_keyboard(),
         parse_mode="HTML"
     )
-    await callback.answer()
\ No newline at end of file
+    await callback.answer()
+
+
+@router.message(Command("dbstats"))
+async def show_db_stats(message: Message):
+    """DB middleware hisoblagichlari va pool holati"""
+    if not is_admin(message.from_user.id):
+        return
+
+    await message.answer(
+        Texts.DB_STATS_MESSAGE.format(
+            **DatabaseMiddleware.stats,
+            **pool_stats,
+            pool_status=engine.pool.status(),
+            wait_avg_ms=pool_stats["wait_total_ms"] / max(pool_stats["checkouts"], 1),
+            send_rate=flood_governor.rate,
+            flood_waits=flood_governor.stats["flood_waits"],
+            slow_sends=flood_governor.stats["slow"],
+        ),
+        parse_mode="HTML",
+    )
@@ -1,22 +1,26 @@
 import asyncio
 from datetime import datetime
+import html
 import logging
+from typing import Optional
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, delete, and_
+from sqlalchemy import select, func, delete, insert, update, and_, tuple_
 from aiogram.types import User as TgUser
 
 from database.base import Survey, SurveyQuestion, SurveyResponse, SurveyAnswer, User, SchedulePost
+from database.crud import SurveyDefinition, get_survey_definition, invalidate_survey
 from keyboards.admin_kb import get_admin_main_keyboard
+from services import survey_export
+from services.admin_notifier import admin_notifier
 from services.tgtrack import TgTrackService
 from utils.helpers import is_admin, truncate_text
 from config import config
-import csv
-from io import StringIO
+from utils.bot_info import get_bot_username
 
 router = Router(name="survey_router")
 
@@ -86,71 +90,50 @@ def get_survey_button(button_text: str, bot_username: str, survey_id: int) -> In
     return builder.as_markup()
 
 
-async def notify_admins_about_completion(bot, user: User, survey: Survey, session: AsyncSession):
-    admin_ids = config.ADMIN_IDS
+# Admin bildirishnomasida bitta javobning maksimal uzunligi (belgi)
+ADMIN_ANSWER_PREVIEW = 1000
 
-    resp_result = await session.execute(
-        select(SurveyResponse).where(
-            and_(
-                SurveyResponse.user_id == user.user_id,
-                SurveyResponse.survey_id == survey.survey_id,
-                SurveyResponse.is_completed == True
-            )
-        ).order_by(SurveyResponse.completed_at.desc())
-    )
-    response = resp_result.scalar_one_or_none()
 
+async def notify_admins_about_completion(tg_user: TgUser, survey: SurveyDefinition, response_id: int, session: AsyncSession):
     answers_block = ""
-    if response:
-        answers_result = await session.execute(
-            select(SurveyQuestion.order_number, SurveyQuestion.question_text, SurveyAnswer.answer_text)
-            .join(SurveyAnswer, SurveyAnswer.question_id == SurveyQuestion.question_id)
-            .where(SurveyAnswer.response_id == response.response_id)
-            .order_by(SurveyQuestion.order_number)
-        )
-        rows = answers_result.all()
+    answers_result = await session.execute(
+        select(SurveyQuestion.order_number, SurveyQuestion.question_text, SurveyAnswer.answer_text)
+        .join(SurveyAnswer, SurveyAnswer.question_id == SurveyQuestion.question_id)
+        .where(SurveyAnswer.response_id == response_id)
+        .order_by(SurveyQuestion.order_number)
+    )
+    rows = answers_result.all()
 
-        if rows:
-            answers_block = "\n\n"
-            for i, q_text, a_text in rows:
-                safe_q = q_text or ""
-                safe_a = a_text or ""
-                answers_block += f"<b>{i}. {safe_q}</b>\n{safe_a}\n\n"
-            answers_block = answers_block.rstrip()  
+    if rows:
+        answers_block = "\n\n"
+        for i, q_text, a_text in rows:
+            # User matni markup'dan oldin qisqartiriladi va escape qilinadi
+            safe_q = html.escape(q_text or "", quote=False)
+            safe_a = html.escape((a_text or "")[:ADMIN_ANSWER_PREVIEW], quote=False)
+            answers_block += f"<b>{i}. {safe_q}</b>\n{safe_a}\n\n"
+        answers_block = answers_block.rstrip()  
 
     notification = (
         f"✅ <b>АНКЕТА ЗАПОЛНЕНА</b>\n\n"
-        f"👤 Пользователь: {user.first_name or 'Без имени'}\n"
-        f"🆔 ID: <code>{user.user_id}</code>\n"
-        f"👤 Username: @{user.username or 'нет'}\n"
-        f"📋 Анкета: {survey.name}\n"
+        f"👤 Пользователь: {html.escape(tg_user.first_name or 'Без имени', quote=False)}\n"
+        f"🆔 ID: <code>{tg_user.id}</code>\n"
+        f"👤 Username: @{tg_user.username or 'нет'}\n"
+        f"📋 Анкета: {html.escape(survey.name, quote=False)}\n"
         f"📅 Дата: {datetime.now().strftime('%d.%m.%Y %H:%M')}"
         f"{answers_block}"
     )
-    admin_ids.append(7329524186)
-    for admin_id in admin_ids:
-        try:
-            await bot.send_message(admin_id, notification, parse_mode="HTML")
-        except Exception as e:
-            print(f"Failed to notify admin {admin_id}: {e}")
+    # Digest navbatiga - yuborish fonda, user javobi kutmaydi
+    admin_notifier.notify(notification)
 
 
 async def send_survey_intro(message: Message, survey_id: int, state: FSMContext, session: AsyncSession):
-    survey_result = await session.execute(select(Survey).where(Survey.survey_id == survey_id))
-    survey = survey_result.scalar_one_or_none()
+    survey = await get_survey_definition(session, survey_id)
 
     if not survey or not survey.is_active:
         await message.answer("❌ Анкета недоступна", parse_mode="HTML")
         return
 
-    questions_result = await session.execute(
-        select(SurveyQuestion)
-        .where(SurveyQuestion.survey_id == survey_id)
-        .order_by(SurveyQuestion.order_number)
-    )
-    questions = questions_result.scalars().all()
-
-    if not questions:
+    if not survey.questions:
         await message.answer("❌ В анкете нет вопросов", parse_mode="HTML")
         return
 
@@ -235,20 +218,14 @@ async def start_survey_flow(
         await message.answer("✅ Вы уже заполнили эту анкету", parse_mode="HTML")
         return
 
-    # Survey active
-    survey_result = await session.execute(select(Survey).where(Survey.survey_id == survey_id))
-    survey = survey_result.scalar_one_or_none()
+    # Survey active (ta'rif keshdan)
+    survey = await get_survey_definition(session, survey_id)
     if not survey or not survey.is_active:
         await message.answer("❌ Анкета недоступна", parse_mode="HTML")
         return
 
     # Questions
-    questions_result = await session.execute(
-        select(SurveyQuestion)
-        .where(SurveyQuestion.survey_id == survey_id)
-        .order_by(SurveyQuestion.order_number)
-    )
-    questions = questions_result.scalars().all()
+    questions = survey.questions
     if not questions:
         await message.answer("❌ В анкете нет вопросов", parse_mode="HTML")
         return
@@ -264,11 +241,13 @@ async def start_survey_flow(
     await session.commit()
     await session.refresh(new_response)
 
+    # Savollar tartibi FSM'da qotiriladi - to'ldirish davomida admin tahriri uni buzmaydi
     await state.update_data(
         survey_id=survey_id,
         response_id=new_response.response_id,
         question_index=0,
-        questions_count=len(questions)
+        questions_count=len(questions),
+        question_ids=[q.question_id for q in questions],
     )
     await state.set_state(FillSurvey.waiting_answer)
 
@@ -301,43 +280,93 @@ async def begin_survey(callback: CallbackQuery, state: FSMContext, session: Asyn
     await start_survey_flow(callback.message, survey_id, state, session, tg_user=callback.from_user)
     await callback.answer()
 
+def _page_nav_row(builder: InlineKeyboardBuilder, prev_data: Optional[str], next_data: Optional[str]):
+    """Sahifalash tugmalari (faqat mavjud yo'nalishlar)"""
+    buttons = []
+    if prev_data:
+        buttons.append(InlineKeyboardButton(text="◀️ Назад", callback_data=prev_data))
+    if next_data:
+        buttons.append(InlineKeyboardButton(text="Вперёд ▶️", callback_data=next_data))
+    if buttons:
+        builder.row(*buttons)
+
+
 @router.callback_query(F.data == "admin:surveys")
+@router.callback_query(F.data.startswith("admin:surveys:"))
 async def surveys_main_menu(callback: CallbackQuery, session: AsyncSession):
-    """Anketalar bosh menyu"""
+    """Anketalar bosh menyu (admin:surveys[:n|p:{survey_id}] - keyset sahifalash)"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ Нет доступа")
         return
-    
+
+    parts = callback.data.split(":")
+    direction = parts[2] if len(parts) > 3 else None
+    cursor = int(parts[3]) if len(parts) > 3 else None
+    page_size = config.ADMIN_PAGE_SIZE
+
+    # Sahifa: survey_id bo'yicha kamayish tartibida (yangilari birinchi)
+    page_query = select(Survey.survey_id, Survey.name)
+    if direction == "p":
+        page_query = page_query.where(Survey.survey_id > cursor).order_by(Survey.survey_id.asc())
+    else:
+        if cursor is not None:
+            page_query = page_query.where(Survey.survey_id < cursor)
+        page_query = page_query.order_by(Survey.survey_id.desc())
+    page = page_query.limit(page_size + 1).cte("survey_page")
+
+    # Sahifadagi anketalar uchun hisoblagichlar bitta GROUP BY bilan
+    completed = (
+        select(SurveyResponse.survey_id, func.count().label("cnt"))
+        .where(
+            SurveyResponse.survey_id.in_(select(page.c.survey_id)),
+            SurveyResponse.is_completed == True,
+        )
+        .group_by(SurveyResponse.survey_id)
+        .subquery()
+    )
+    questions = (
+        select(SurveyQuestion.survey_id, func.count().label("cnt"))
+        .where(SurveyQuestion.survey_id.in_(select(page.c.survey_id)))
+        .group_by(SurveyQuestion.survey_id)
+        .subquery()
+    )
+
     result = await session.execute(
-        select(Survey).order_by(Survey.created_at.desc())
+        select(
+            page.c.survey_id,
+            page.c.name,
+            func.coalesce(completed.c.cnt, 0),
+            func.coalesce(questions.c.cnt, 0),
+        )
+        .outerjoin(completed, completed.c.survey_id == page.c.survey_id)
+        .outerjoin(questions, questions.c.survey_id == page.c.survey_id)
+        .order_by(page.c.survey_id.desc())
     )
-    surveys = result.scalars().all()
-    
+    rows = result.all()
+
+    has_more = len(rows) > page_size
+    if has_more:
+        # Ortiqcha qator - so'ralgan yo'nalishdagi eng chekkasi
+        rows = rows[1:] if direction == "p" else rows[:-1]
+
     builder = InlineKeyboardBuilder()
     
-    for survey in surveys:
-        # Statistika
-        responses_count = await session.execute(
-            select(func.count(SurveyResponse.response_id)).where(
-                SurveyResponse.survey_id == survey.survey_id,
-                SurveyResponse.is_completed == True
-            )
-        )
-        completed = responses_count.scalar()
-        
-        questions_count = await session.execute(
-            select(func.count(SurveyQuestion.question_id)).where(
-                SurveyQuestion.survey_id == survey.survey_id
-            )
-        )
-        q_count = questions_count.scalar()
-        
+    for survey_id, name, completed_count, q_count in rows:
         builder.row(
             InlineKeyboardButton(
-                text=f"📋 {survey.name} ({completed} ответов, {q_count} вопросов)",
-                callback_data=f"survey:view:{survey.survey_id}"
+                text=f"📋 {name} ({completed_count} ответов, {q_count} вопросов)",
+                callback_data=f"survey:view:{survey_id}"
             )
         )
+
+    if rows:
+        has_prev = has_more if direction == "p" else cursor is not None
+        has_next = has_more if direction != "p" else True
+        _page_nav_row(
+            builder,
+            f"admin:surveys:p:{rows[0][0]}" if has_prev else None,
+            f"admin:surveys:n:{rows[-1][0]}" if has_next else None,
+        )
     
     builder.row(
         InlineKeyboardButton(text="➕ Создать анкету", callback_data="survey:create")
@@ -399,7 +428,7 @@ async def view_survey(callback: CallbackQuery, session: AsyncSession):
     
     started = total - completed
     
-    bot_username = config.BOT_USERNAME
+    bot_username = get_bot_username()
     deep_link = get_survey_deep_link(bot_username, survey_id)
     
     text = (
@@ -432,7 +461,8 @@ async def view_survey(callback: CallbackQuery, session: AsyncSession):
         InlineKeyboardButton(text="📊 Посмотреть ответы", callback_data=f"survey:responses:{survey_id}")
     )
     builder.row(
-        InlineKeyboardButton(text="📥 Скачать ответы", callback_data=f"survey:export:{survey_id}")
+        InlineKeyboardButton(text="📥 Скачать CSV", callback_data=f"survey:export:{survey_id}"),
+        InlineKeyboardButton(text="📥 Скачать XLSX", callback_data=f"survey:export:{survey_id}:xlsx"),
     )
     builder.row(
         InlineKeyboardButton(text="✏️ Редактировать анкету", callback_data=f"survey:edit_survey:{survey_id}")
@@ -488,37 +518,66 @@ async def preview_survey(callback: CallbackQuery, session: AsyncSession):
 
 @router.callback_query(F.data.startswith("survey:responses:"))
 async def view_survey_responses(callback: CallbackQuery, session: AsyncSession):
-    """Anketaga berilgan javoblarni ko'rish"""
+    """Anketaga berilgan javoblarni ko'rish (survey:responses:{id}[:n|p:{response_id}])"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ Нет доступа")
         return
     
-    survey_id = int(callback.data.split(":")[2])
-    
-    result = await session.execute(
-        select(SurveyResponse)
+    parts = callback.data.split(":")
+    survey_id = int(parts[2])
+    direction = parts[3] if len(parts) > 4 else None
+    cursor = int(parts[4]) if len(parts) > 4 else None
+    page_size = config.ADMIN_PAGE_SIZE
+
+    # Keyset: (completed_at, response_id) bo'yicha, yangilari birinchi
+    key = tuple_(SurveyResponse.completed_at, SurveyResponse.response_id)
+    query = (
+        select(SurveyResponse.response_id, SurveyResponse.user_id, SurveyResponse.completed_at, User.first_name)
+        .outerjoin(User, User.user_id == SurveyResponse.user_id)
         .where(
             SurveyResponse.survey_id == survey_id,
             SurveyResponse.is_completed == True
         )
-        .order_by(SurveyResponse.completed_at.desc())
-        .limit(10)
     )
-    responses = result.scalars().all()
+    if cursor is not None:
+        cursor_key = tuple_(
+            select(SurveyResponse.completed_at)
+            .where(SurveyResponse.response_id == cursor)
+            .scalar_subquery(),
+            cursor,
+        )
+        query = query.where(key > cursor_key if direction == "p" else key < cursor_key)
+
+    if direction == "p":
+        query = query.order_by(SurveyResponse.completed_at.asc(), SurveyResponse.response_id.asc())
+    else:
+        query = query.order_by(SurveyResponse.completed_at.desc(), SurveyResponse.response_id.desc())
+
+    result = await session.execute(query.limit(page_size + 1))
+    responses = result.all()
+
+    has_more = len(responses) > page_size
+    responses = responses[:page_size]
+    if direction == "p":
+        responses.reverse()
     
     if not responses:
         await callback.answer("❌ Нет завершенных ответов", show_alert=True)
         return
+
+    total = (
+        await session.execute(
+            select(func.count()).select_from(SurveyResponse).where(
+                SurveyResponse.survey_id == survey_id,
+                SurveyResponse.is_completed == True
+            )
+        )
+    ).scalar()
     
     builder = InlineKeyboardBuilder()
     
     for resp in responses:
-        user_result = await session.execute(
-            select(User).where(User.user_id == resp.user_id)
-        )
-        user = user_result.scalar_one_or_none()
-        
-        user_name = user.first_name if user else f"User {resp.user_id}"
+        user_name = resp.first_name or f"User {resp.user_id}"
         completed_date = resp.completed_at.strftime("%d.%m %H:%M")
         
         builder.row(
@@ -527,13 +586,21 @@ async def view_survey_responses(callback: CallbackQuery, session: AsyncSession):
                 callback_data=f"survey:response:detail:{resp.response_id}"
             )
         )
+
+    has_prev = has_more if direction == "p" else cursor is not None
+    has_next = has_more if direction != "p" else True
+    _page_nav_row(
+        builder,
+        f"survey:responses:{survey_id}:p:{responses[0].response_id}" if has_prev else None,
+        f"survey:responses:{survey_id}:n:{responses[-1].response_id}" if has_next else None,
+    )
     
     builder.row(
         InlineKeyboardButton(text="⬅️ Назад к анкете", callback_data=f"survey:view:{survey_id}")
     )
     
     await callback.message.edit_text(
-        f"📊 <b>Последние 10 ответов:</b>\n\n"
+        f"📊 <b>Ответы ({total}):</b>\n\n"
         f"Выберите пользователя для просмотра его ответов:",
         reply_markup=builder.as_markup(),
         parse_mode="HTML"
@@ -598,12 +665,17 @@ async def view_response_detail(callback: CallbackQuery, session: AsyncSession):
 
 @router.callback_query(F.data.startswith("survey:export:"))
 async def export_survey_responses(callback: CallbackQuery, session: AsyncSession):
-    """CSV formatda yuklab olish"""
+    """CSV/XLSX formatda yuklab olish (survey:export:{id}[:xlsx])"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ Нет доступа")
         return
     
-    survey_id = int(callback.data.split(":")[2])
+    parts = callback.data.split(":")
+    survey_id = int(parts[2])
+    fmt = parts[3] if len(parts) > 3 else survey_export.FORMAT_CSV
+    if fmt not in survey_export.FORMATS:
+        await callback.answer("❌ Неизвестный формат")
+        return
     
     survey_result = await session.execute(
         select(Survey).where(Survey.survey_id == survey_id)
@@ -620,67 +692,27 @@ async def export_survey_responses(callback: CallbackQuery, session: AsyncSession
         .order_by(SurveyQuestion.order_number)
     )
     questions = questions_result.scalars().all()
-    
-    responses_result = await session.execute(
-        select(SurveyResponse)
-        .where(
-            SurveyResponse.survey_id == survey_id,
-            SurveyResponse.is_completed == True
-        )
-        .order_by(SurveyResponse.completed_at)
-    )
-    responses = responses_result.scalars().all()
-    
-    if not responses:
-        await callback.answer("❌ Нет ответов для экспорта", show_alert=True)
+
+    await callback.answer("⏳ Готовлю файл...")
+
+    try:
+        file, total = await survey_export.build_survey_export(session, survey_id, questions, fmt)
+    except ImportError:
+        await callback.message.answer("❌ Экспорт в XLSX недоступен: не установлен openpyxl")
         return
-    
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    headers = ["User ID", "Username", "Имя", "Дата завершения"]
-    for q in questions:
-        headers.append(q.question_text[:50])
-    writer.writerow(headers)
-    
-    for response in responses:
-        user_result = await session.execute(
-            select(User).where(User.user_id == response.user_id)
+
+    if not file:
+        await callback.message.answer("❌ Нет ответов для экспорта")
+        return
+
+    try:
+        await callback.message.answer_document(
+            document=file,
+            caption=f"📊 Экспорт ответов анкеты: {survey.name}\n"
+                    f"✅ Всего ответов: {total}"
         )
-        user = user_result.scalar_one_or_none()
-        
-        row = [
-            response.user_id,
-            user.username if user else "",
-            user.first_name if user else "",
-            response.completed_at.strftime("%d.%m.%Y %H:%M")
-        ]
-        
-        for question in questions:
-            answer_result = await session.execute(
-                select(SurveyAnswer).where(
-                    and_(
-                        SurveyAnswer.response_id == response.response_id,
-                        SurveyAnswer.question_id == question.question_id
-                    )
-                )
-            )
-            answer = answer_result.scalar_one_or_none()
-            row.append(answer.answer_text if answer else "")
-        
-        writer.writerow(row)
-    
-    from aiogram.types import BufferedInputFile
-    
-    csv_content = output.getvalue().encode('utf-8-sig')
-    file = BufferedInputFile(csv_content, filename=f"survey_{survey_id}_responses.csv")
-    
-    await callback.message.answer_document(
-        document=file,
-        caption=f"📊 Экспорт ответов анкеты: {survey.name}\n"
-                f"✅ Всего ответов: {len(responses)}"
-    )
-    await callback.answer("✅ Файл отправлен")
+    finally:
+        file.close()
 
 
 # ============== EDIT SURVEY DETAILS ==============
@@ -820,6 +852,7 @@ async def edit_survey_tgtrack_clear(callback: CallbackQuery, state: FSMContext,
 
     survey.tgtrack_target = None
     await session.commit()
+    invalidate_survey(survey.survey_id)
 
     await callback.answer("✅ Очищено", show_alert=True)
     await edit_survey_menu(callback, session)
@@ -840,6 +873,7 @@ async def remove_intro_photo(callback: CallbackQuery, state: FSMContext, session
 
     survey.message_photo_file_id = None
     await session.commit()
+    invalidate_survey(survey.survey_id)
 
     await state.clear()
     await callback.answer("✅ Интро-фото удалено", show_alert=True)
@@ -903,6 +937,7 @@ async def edit_completion_photo_save(message: Message, state: FSMContext, sessio
 
     survey.completion_photo_file_id = message.photo[-1].file_id
     await session.commit()
+    invalidate_survey(survey.survey_id)
 
     await message.answer("✅ Фото завершения обновлено.", parse_mode="HTML")
     await state.clear()
@@ -966,6 +1001,7 @@ async def edit_intro_photo_save(message: Message, state: FSMContext, session: As
 
     survey.message_photo_file_id = message.photo[-1].file_id
     await session.commit()
+    invalidate_survey(survey.survey_id)
 
     await message.answer("✅ Интро-фото обновлено.", parse_mode="HTML")
     await state.clear()
@@ -986,6 +1022,7 @@ async def remove_completion_photo(callback: CallbackQuery, state: FSMContext, se
 
     survey.completion_photo_file_id = None
     await session.commit()
+    invalidate_survey(survey.survey_id)
 
     await state.clear()
     await callback.answer("✅ Фото завершения удалено", show_alert=True)
@@ -1009,6 +1046,7 @@ async def edit_survey_name_save(message: Message, state: FSMContext, session: As
     
     survey.name = message.text
     await session.commit()
+    invalidate_survey(survey.survey_id)
     
     await message.answer(
         f"✅ <b>Название успешно изменено!</b>\n\n"
@@ -1074,6 +1112,7 @@ async def edit_survey_button_save(message: Message, state: FSMContext, session:
     
     survey.button_text = message.text
     await session.commit()
+    invalidate_survey(survey.survey_id)
     
     await message.answer(
         f"✅ <b>Текст кнопки успешно изменен!</b>\n\n"
@@ -1191,6 +1230,7 @@ async def save_tgtrack_target(message: Message, state: FSMContext, session: Asyn
 
     survey.tgtrack_target = target[:100] if target else None
     await session.commit()
+    invalidate_survey(survey.survey_id)
 
     # keyingi bosqich: intro photo
     await state.set_state(CreateSurvey.waiting_intro_photo)
@@ -1255,6 +1295,7 @@ async def edit_survey_tgtrack_save(message: Message, state: FSMContext, session:
     target = (message.text or "").strip()
     survey.tgtrack_target = target[:100] if target else None
     await session.commit()
+    invalidate_survey(survey.survey_id)
 
     await message.answer(
         f"✅ TGTrack цель обновлена: <code>{survey.tgtrack_target or '—'}</code>",
@@ -1280,6 +1321,7 @@ async def edit_survey_completion_save(message: Message, state: FSMContext, sessi
     
     survey.completion_message = message.text
     await session.commit()
+    invalidate_survey(survey.survey_id)
     
     await message.answer(
         f"✅ <b>Сообщение завершения успешно изменено!</b>\n\n"
@@ -1453,6 +1495,7 @@ async def change_question_text_save(message: Message, state: FSMContext, session
     
     question.question_text = message.text
     await session.commit()
+    invalidate_survey(question.survey_id)
     
     await message.answer(
         f"✅ <b>Вопрос успешно изменен!</b>\n\n"
@@ -1486,6 +1529,7 @@ async def delete_question(callback: CallbackQuery, session: AsyncSession):
         delete(SurveyQuestion).where(SurveyQuestion.question_id == question_id)
     )
     await session.commit()
+    invalidate_survey(survey_id)
     
     await callback.answer("✅ Вопрос удален", show_alert=True)
     
@@ -1573,7 +1617,7 @@ async def create_survey_message(message: Message, state: FSMContext, session: As
     )
 
 @router.callback_query(F.data == "survey:intro_photo:skip")
-async def skip_intro_photo(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
+async def skip_intro_photo(callback: CallbackQuery, state: FSMContext):
     data = await state.get_data()
     survey_id = data.get("survey_id")
 
@@ -1637,6 +1681,7 @@ async def save_intro_photo(message: Message, state: FSMContext, session: AsyncSe
 
     survey.message_photo_file_id = message.photo[-1].file_id
     await session.commit()
+    invalidate_survey(survey.survey_id)
 
     # Keyingi bosqich: savollar
     await state.set_state(CreateSurvey.editing_questions)
@@ -1688,6 +1733,7 @@ async def add_question_save(message: Message, state: FSMContext, session: AsyncS
     )
     session.add(new_question)
     await session.commit()
+    invalidate_survey(new_question.survey_id)
     
     # If from edit menu, go back to edit questions
     if from_edit:
@@ -1759,6 +1805,7 @@ async def save_completion_message(message: Message, state: FSMContext, session:
     # 1) completion message saqlaymiz
     survey.completion_message = message.text
     await session.commit()
+    invalidate_survey(survey.survey_id)
 
     # 2) Endi completion rasm (optional)
     await state.set_state(CreateSurvey.waiting_completion_photo)
@@ -1814,8 +1861,9 @@ async def save_completion_photo(message: Message, state: FSMContext, session: As
     # completion photo saqlash
     survey.completion_photo_file_id = message.photo[-1].file_id
     await session.commit()
+    invalidate_survey(survey.survey_id)
 
-    bot_username = config.BOT_USERNAME
+    bot_username = get_bot_username()
     deep_link = get_survey_deep_link(bot_username, survey_id)
 
     await message.answer(
@@ -1850,7 +1898,7 @@ async def skip_completion_photo(callback: CallbackQuery, state: FSMContext, sess
     result = await session.execute(select(Survey).where(Survey.survey_id == survey_id))
     survey = result.scalar_one_or_none()
 
-    bot_username = config.BOT_USERNAME
+    bot_username = get_bot_username()
     deep_link = get_survey_deep_link(bot_username, survey_id)
 
     await callback.message.answer(
@@ -1878,29 +1926,39 @@ async def process_survey_answer(message: Message, state: FSMContext, session: As
     question_index = data['question_index']
     survey_id = data['survey_id']
     questions_count = data['questions_count']
-    
-    questions_result = await session.execute(
-        select(SurveyQuestion)
-        .where(SurveyQuestion.survey_id == survey_id)
-        .order_by(SurveyQuestion.order_number)
-    )
-    questions = questions_result.scalars().all()
-    
-    current_question = questions[question_index]
-    
-    new_answer = SurveyAnswer(
-        response_id=response_id,
-        question_id=current_question.question_id,
-        answer_text=message.text
-    )
-    session.add(new_answer)
-    await session.commit()
+
+    # Anketa ta'rifi keshdan - odatda DB'ga so'rov yo'q
+    survey = await get_survey_definition(session, survey_id)
+    question_ids = data.get('question_ids')
+    if question_ids is None:
+        # Eski FSM holati (question_ids saqlanmagan)
+        question_ids = [q.question_id for q in survey.questions] if survey else []
+
+    if question_index >= len(question_ids):
+        await state.clear()
+        await message.answer("❌ Анкета недоступна", parse_mode="HTML")
+        return
+
+    # Javob - bitta INSERT (savol to'ldirish davomida o'chirilgan bo'lsa - o'tkazib yuboriladi)
+    question_id = question_ids[question_index]
+    if survey and survey.question(question_id):
+        await session.execute(
+            insert(SurveyAnswer).values(
+                response_id=response_id,
+                question_id=question_id,
+                answer_text=message.text
+            )
+        )
+        await session.commit()
     
     next_index = question_index + 1
+    next_question = None
+    while survey and next_index < questions_count and next_question is None:
+        next_question = survey.question(question_ids[next_index])
+        if next_question is None:
+            next_index += 1
     
-    if next_index < questions_count:
-        next_question = questions[next_index]
-        
+    if next_question is not None:
         await state.update_data(question_index=next_index)
         
         builder = InlineKeyboardBuilder()
@@ -1917,15 +1975,12 @@ async def process_survey_answer(message: Message, state: FSMContext, session: As
             parse_mode="HTML"
         )
     else:
-        response_result = await session.execute(
-            select(SurveyResponse).where(SurveyResponse.response_id == response_id)
+        await session.execute(
+            update(SurveyResponse)
+            .where(SurveyResponse.response_id == response_id)
+            .values(is_completed=True, completed_at=datetime.now())
         )
-        response = response_result.scalar_one_or_none()
-        
-        if response:
-            response.is_completed = True
-            response.completed_at = datetime.now()
-            await session.commit()
+        await session.commit()
         
         tg_target = None
         if survey and survey.tgtrack_target:
@@ -1939,16 +1994,6 @@ async def process_survey_answer(message: Message, state: FSMContext, session: As
         except Exception as e:
             logging.exception("TGTrack send_goal failed: %s", e)
         
-        survey_result = await session.execute(
-            select(Survey).where(Survey.survey_id == survey_id)
-        )
-        survey = survey_result.scalar_one_or_none()
-        
-        user_result = await session.execute(
-            select(User).where(User.user_id == message.from_user.id)
-        )
-        user = user_result.scalar_one_or_none()
-        
         completion_msg = survey.completion_message if survey and survey.completion_message else "Спасибо за ваши ответы!"
 
         # ✅ NEW: completion rasm bo‘lsa — photo + caption
@@ -1965,8 +2010,8 @@ async def process_survey_answer(message: Message, state: FSMContext, session: As
             )
         
         # Adminlarga xabar yuborish
-        if survey and user:
-            await notify_admins_about_completion(message.bot, user, survey, session)
+        if survey:
+            await notify_admins_about_completion(message.from_user, survey, response_id, session)
         
         await state.clear()
 
@@ -2004,6 +2049,7 @@ async def delete_survey(callback: CallbackQuery, session: AsyncSession):
         delete(Survey).where(Survey.survey_id == survey_id)
     )
     await session.commit()
+    invalidate_survey(survey_id)
     
     await callback.answer("✅ Анкета удалена", show_alert=True)
     await surveys_main_menu(callback, session)
\ No newline at end of file
@@ -1,5 +1,4 @@
 # handlers/user.py - UPDATED VERSION
-import asyncio
 import re
 from aiogram import Router, F
 from aiogram.filters import CommandStart, StateFilter
@@ -17,9 +16,13 @@ from utils.texts import Texts
 from database.crud import get_setting
 from utils.helpers import check_subscription
 from scheduler.tasks import SchedulerTasks
+from services import outbox
 
 router = Router()
 
+# Welcome'dan keyin obuna so'rovi / launch ketma-ketligigacha pauza (sekund)
+START_FOLLOWUP_DELAY = 2
+
 
 @router.message(CommandStart())
 async def cmd_start(message: Message, session: AsyncSession, state: FSMContext):
@@ -78,6 +81,8 @@ async def cmd_start(message: Message, session: AsyncSession, state: FSMContext):
         session.add(user)
     else:
         user.is_active = True
+        # /start yozgan user botni blokdan chiqargan
+        user.is_blocked = False
         user.current_day = 0
         user.first_message_sent = False
 
@@ -91,18 +96,15 @@ async def cmd_start(message: Message, session: AsyncSession, state: FSMContext):
 
     await message.answer(welcome_text, parse_mode="HTML")
 
-    await asyncio.sleep(2)
-
+    # Keyingi xabar outbox orqali kechiktiriladi - handler uxlab turmaydi
     if not user.is_subscribed:
-        subscribe_text = await get_setting("subscribe_request", Texts.SUBSCRIBE_REQUEST)
-        await message.answer(
-            subscribe_text,
-            reply_markup=get_subscribe_keyboard(),
-            parse_mode="HTML",
+        await outbox.enqueue_message(
+            session, user_id, outbox.KIND_SUBSCRIBE_REQUEST, delay_seconds=START_FOLLOWUP_DELAY
         )
+        await session.commit()
     else:
         scheduler = SchedulerTasks(message.bot)
-        asyncio.create_task(scheduler.send_launch_sequence(message.bot, session, user))
+        await scheduler.send_launch_sequence(message.bot, session, user, start_delay=START_FOLLOWUP_DELAY)
 
 
 @router.message(
@@ -1,18 +1,66 @@
-from typing import Callable, Dict, Any, Awaitable
+from typing import Callable, Dict, Any, Awaitable, Optional
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from aiogram.types import TelegramObject
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import async_session_maker
 
+
+class LazySession:
+    """
+    AsyncSession proxy: session birinchi murojaatda yaratiladi.
+
+    Handler session'ga umuman tegmasa - session ham, pool connection ham olinmaydi.
+    """
+
+    __slots__ = ("_session",)
+
+    def __init__(self):
+        self._session: Optional[AsyncSession] = None
+
+    @property
+    def used(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = async_session_maker()
+        return getattr(self._session, name)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
 class DatabaseMiddleware(BaseMiddleware):
-    """Database session middleware"""
-    
+    """
+    Database session middleware.
+
+    Session faqat handler `session` parametrini kutsa beriladi; `flags={"db": False}`
+    bilan handlerni aniq o'chirish mumkin. `stats` - nechta update DB'ga tegdi.
+    """
+
+    stats = {"updates": 0, "skipped": 0, "unused": 0, "used": 0}
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
         event: TelegramObject,
         data: Dict[str, Any]
     ) -> Any:
-        async with async_session_maker() as session:
-            data['session'] = session
-            return await handler(event, data)
\ No newline at end of file
+        stats = DatabaseMiddleware.stats
+        stats["updates"] += 1
+
+        handler_object = data.get("handler")
+        wants_session = handler_object is None or handler_object.varkw or "session" in handler_object.params
+        if not wants_session or get_flag(data, "db") is False:
+            stats["skipped"] += 1
+            return await handler(event, data)
+
+        session = LazySession()
+        data['session'] = session
+        try:
+            return await handler(event, data)
+        finally:
+            await session.close()
+            stats["used" if session.used else "unused"] += 1
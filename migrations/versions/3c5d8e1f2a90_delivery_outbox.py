@@ -0,0 +1,90 @@
+"""delivery outbox
+
+Revision ID: 3c5d8e1f2a90
+Revises: 80152406e78b
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c5d8e1f2a90"
+down_revision: Union[str, None] = "80152406e78b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Idempotent migration (jadvallar create_all orqali yaratilgan bo'lishi mumkin)."""
+
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if not insp.has_table("broadcasts"):
+        op.create_table(
+            "broadcasts",
+            sa.Column("broadcast_id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("broadcast_type", sa.String(length=50), nullable=False),
+            sa.Column("content", sa.Text(), nullable=True),
+            sa.Column("file_id", sa.String(length=255), nullable=True),
+            sa.Column("caption", sa.Text(), nullable=True),
+            sa.Column("survey_id", sa.Integer(), nullable=True),
+            sa.Column("target", sa.String(length=50), nullable=False),
+            sa.Column("total", sa.Integer(), nullable=False),
+            sa.Column("progress_chat_id", sa.BigInteger(), nullable=True),
+            sa.Column("progress_message_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["survey_id"], ["surveys.survey_id"], ondelete="SET NULL"),
+            sa.PrimaryKeyConstraint("broadcast_id"),
+        )
+
+    if not insp.has_table("delivery_outbox"):
+        op.create_table(
+            "delivery_outbox",
+            sa.Column("outbox_id", sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column("user_id", sa.BigInteger(), nullable=False),
+            sa.Column("kind", sa.String(length=20), nullable=False),
+            sa.Column("post_id", sa.Integer(), nullable=True),
+            sa.Column("broadcast_id", sa.Integer(), nullable=True),
+            sa.Column("status", sa.String(length=20), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("available_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+            sa.Column("locked_until", sa.DateTime(), nullable=True),
+            sa.Column("last_error", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+            sa.Column("sent_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.user_id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["post_id"], ["schedule_posts.post_id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["broadcast_id"], ["broadcasts.broadcast_id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("outbox_id"),
+        )
+
+    existing_indexes = {i.get("name") for i in sa.inspect(bind).get_indexes("delivery_outbox")}
+    if "idx_outbox_ready" not in existing_indexes:
+        op.create_index("idx_outbox_ready", "delivery_outbox", ["status", "available_at"], unique=False)
+    if "idx_outbox_broadcast" not in existing_indexes:
+        op.create_index("idx_outbox_broadcast", "delivery_outbox", ["broadcast_id", "status"], unique=False)
+    if "uq_outbox_pending_post" not in existing_indexes:
+        op.create_index(
+            "uq_outbox_pending_post",
+            "delivery_outbox",
+            ["user_id", "post_id"],
+            unique=True,
+            postgresql_where=sa.text("post_id IS NOT NULL AND status IN ('pending', 'processing')"),
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if insp.has_table("delivery_outbox"):
+        op.drop_table("delivery_outbox")
+    if insp.has_table("broadcasts"):
+        op.drop_table("broadcasts")
@@ -0,0 +1,62 @@
+"""user_progress unique (user_id, post_id)
+
+Revision ID: 4d6e9f2a3b01
+Revises: 3c5d8e1f2a90
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4d6e9f2a3b01"
+down_revision: Union[str, None] = "3c5d8e1f2a90"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing_indexes = {i.get("name") for i in sa.inspect(bind).get_indexes("user_progress")}
+
+    if "uq_progress_user_post" not in existing_indexes:
+        # Dublikatlarni tozalash: har bir (user_id, post_id) uchun eng birinchi yozuv qoladi
+        op.execute(
+            """
+            DELETE FROM user_progress a
+            USING user_progress b
+            WHERE a.user_id = b.user_id
+              AND a.post_id = b.post_id
+              AND a.progress_id > b.progress_id
+            """
+        )
+        op.create_index("uq_progress_user_post", "user_progress", ["user_id", "post_id"], unique=True)
+
+    # (user_id, post_id) unique indeks user_id bo'yicha qidiruvni ham qoplaydi
+    if "idx_progress_user" in existing_indexes:
+        op.drop_index("idx_progress_user", table_name="user_progress")
+
+    if "idx_progress_sending" not in existing_indexes:
+        op.create_index(
+            "idx_progress_sending",
+            "user_progress",
+            ["sent_date"],
+            unique=False,
+            postgresql_where=sa.text("status = 'sending'"),
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    existing_indexes = {i.get("name") for i in sa.inspect(bind).get_indexes("user_progress")}
+
+    if "idx_progress_sending" in existing_indexes:
+        op.drop_index("idx_progress_sending", table_name="user_progress")
+    if "idx_progress_user" not in existing_indexes:
+        op.create_index("idx_progress_user", "user_progress", ["user_id"], unique=False)
+    if "uq_progress_user_post" in existing_indexes:
+        op.drop_index("uq_progress_user_post", table_name="user_progress")
@@ -0,0 +1,36 @@
+"""user_progress sent_date index
+
+Revision ID: 5e7f0a3b4c12
+Revises: 4d6e9f2a3b01
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e7f0a3b4c12"
+down_revision: Union[str, None] = "4d6e9f2a3b01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing_indexes = {i.get("name") for i in sa.inspect(bind).get_indexes("user_progress")}
+
+    # cleanup_old_progress batch'lari sent_date bo'yicha range scan qiladi
+    if "idx_progress_sent_date" not in existing_indexes:
+        op.create_index("idx_progress_sent_date", "user_progress", ["sent_date"], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    existing_indexes = {i.get("name") for i in sa.inspect(bind).get_indexes("user_progress")}
+
+    if "idx_progress_sent_date" in existing_indexes:
+        op.drop_index("idx_progress_sent_date", table_name="user_progress")
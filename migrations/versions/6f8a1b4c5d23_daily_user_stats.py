@@ -0,0 +1,72 @@
+"""daily user stats rollup
+
+Revision ID: 6f8a1b4c5d23
+Revises: 5e7f0a3b4c12
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6f8a1b4c5d23"
+down_revision: Union[str, None] = "5e7f0a3b4c12"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Idempotent migration (jadval create_all orqali yaratilgan bo'lishi mumkin)."""
+
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if not insp.has_table("daily_user_stats"):
+        op.create_table(
+            "daily_user_stats",
+            sa.Column("stat_date", sa.Date(), nullable=False),
+            sa.Column("new_users", sa.Integer(), nullable=False),
+            sa.Column("total_users", sa.Integer(), nullable=False),
+            sa.Column("active_users", sa.Integer(), nullable=True),
+            sa.Column("blocked_users", sa.Integer(), nullable=True),
+            sa.Column("subscribed_users", sa.Integer(), nullable=True),
+            sa.Column("funnel", sa.JSON(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+            sa.PrimaryKeyConstraint("stat_date"),
+        )
+
+    # O'tgan kunlar tarixi users.start_date'dan tiklanadi (aktiv/blok noma'lum - NULL)
+    op.execute(
+        """
+        INSERT INTO daily_user_stats (stat_date, new_users, total_users)
+        SELECT d.stat_date,
+               d.new_users,
+               SUM(d.new_users) OVER (ORDER BY d.stat_date)
+        FROM (
+            SELECT CAST(start_date AS DATE) AS stat_date, COUNT(*) AS new_users
+            FROM users
+            WHERE start_date < CURRENT_DATE
+            GROUP BY CAST(start_date AS DATE)
+        ) d
+        ON CONFLICT (stat_date) DO NOTHING
+        """
+    )
+
+    existing_indexes = {i.get("name") for i in sa.inspect(bind).get_indexes("users")}
+    if "idx_user_start_date" not in existing_indexes:
+        op.create_index("idx_user_start_date", "users", ["start_date"], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    existing_indexes = {i.get("name") for i in insp.get_indexes("users")}
+    if "idx_user_start_date" in existing_indexes:
+        op.drop_index("idx_user_start_date", table_name="users")
+    if insp.has_table("daily_user_stats"):
+        op.drop_table("daily_user_stats")
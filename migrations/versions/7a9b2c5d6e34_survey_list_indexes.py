@@ -0,0 +1,48 @@
+"""survey list indexes
+
+Revision ID: 7a9b2c5d6e34
+Revises: 6f8a1b4c5d23
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7a9b2c5d6e34"
+down_revision: Union[str, None] = "6f8a1b4c5d23"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    response_indexes = {i.get("name") for i in insp.get_indexes("survey_responses")}
+    if "idx_response_survey_completed" not in response_indexes:
+        op.create_index(
+            "idx_response_survey_completed",
+            "survey_responses",
+            ["survey_id", "completed_at", "response_id"],
+            unique=False,
+            postgresql_where=sa.text("is_completed = true"),
+        )
+
+    question_indexes = {i.get("name") for i in insp.get_indexes("survey_questions")}
+    if "idx_question_survey" not in question_indexes:
+        op.create_index("idx_question_survey", "survey_questions", ["survey_id", "order_number"], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if "idx_question_survey" in {i.get("name") for i in insp.get_indexes("survey_questions")}:
+        op.drop_index("idx_question_survey", table_name="survey_questions")
+    if "idx_response_survey_completed" in {i.get("name") for i in insp.get_indexes("survey_responses")}:
+        op.drop_index("idx_response_survey_completed", table_name="survey_responses")
@@ -0,0 +1,49 @@
+"""fsm states
+
+Revision ID: 8b0c3d6e7f45
+Revises: 7a9b2c5d6e34
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8b0c3d6e7f45"
+down_revision: Union[str, None] = "7a9b2c5d6e34"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Idempotent migration (jadval create_all orqali yaratilgan bo'lishi mumkin)."""
+
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if not insp.has_table("fsm_states"):
+        op.create_table(
+            "fsm_states",
+            sa.Column("storage_key", sa.String(length=255), nullable=False),
+            sa.Column("state", sa.String(length=255), nullable=True),
+            sa.Column("data", postgresql.JSONB(), server_default=sa.text("'{}'::jsonb"), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+            sa.PrimaryKeyConstraint("storage_key"),
+        )
+
+    existing_indexes = {i.get("name") for i in sa.inspect(bind).get_indexes("fsm_states")}
+    if "idx_fsm_updated" not in existing_indexes:
+        op.create_index("idx_fsm_updated", "fsm_states", ["updated_at"], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if insp.has_table("fsm_states"):
+        op.drop_table("fsm_states")
@@ -0,0 +1,54 @@
+"""delivery dead letters
+
+Revision ID: 9c1d4e7f8a56
+Revises: 8b0c3d6e7f45
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c1d4e7f8a56"
+down_revision: Union[str, None] = "8b0c3d6e7f45"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Idempotent migration (jadval create_all orqali yaratilgan bo'lishi mumkin)."""
+
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if not insp.has_table("delivery_dead_letters"):
+        op.create_table(
+            "delivery_dead_letters",
+            sa.Column("dead_letter_id", sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column("outbox_id", sa.BigInteger(), nullable=False),
+            sa.Column("user_id", sa.BigInteger(), nullable=False),
+            sa.Column("kind", sa.String(length=20), nullable=False),
+            sa.Column("post_id", sa.Integer(), nullable=True),
+            sa.Column("broadcast_id", sa.Integer(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("error_kind", sa.String(length=20), nullable=False),
+            sa.Column("last_error", sa.Text(), nullable=True),
+            sa.Column("failed_at", sa.DateTime(), server_default=sa.text("now()"), nullable=True),
+            sa.PrimaryKeyConstraint("dead_letter_id"),
+        )
+
+    existing_indexes = {i.get("name") for i in sa.inspect(bind).get_indexes("delivery_dead_letters")}
+    if "idx_dead_letter_failed_at" not in existing_indexes:
+        op.create_index("idx_dead_letter_failed_at", "delivery_dead_letters", ["failed_at"], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if insp.has_table("delivery_dead_letters"):
+        op.drop_table("delivery_dead_letters")
@@ -0,0 +1,48 @@
+"""user launch pending index
+
+Revision ID: ad2e5f8a9b67
+Revises: 9c1d4e7f8a56
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "ad2e5f8a9b67"
+down_revision: Union[str, None] = "9c1d4e7f8a56"
+branch_labels = None
+depends_on = None
+
+# database.base.LAUNCH_PENDING_SQL bilan bir xil bo'lishi shart
+LAUNCH_PENDING_SQL = (
+    "current_day = 0 AND is_subscribed = true AND subscription_checked = true "
+    "AND first_message_sent = false AND is_blocked = false"
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    user_indexes = {i.get("name") for i in insp.get_indexes("users")}
+    if "idx_user_launch_pending" not in user_indexes:
+        op.create_index(
+            "idx_user_launch_pending",
+            "users",
+            ["user_id"],
+            unique=False,
+            postgresql_where=sa.text(LAUNCH_PENDING_SQL),
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if "idx_user_launch_pending" in {i.get("name") for i in insp.get_indexes("users")}:
+        op.drop_index("idx_user_launch_pending", table_name="users")
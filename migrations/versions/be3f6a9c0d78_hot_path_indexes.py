@@ -0,0 +1,55 @@
+"""hot path indexes
+
+Revision ID: be3f6a9c0d78
+Revises: ad2e5f8a9b67
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "be3f6a9c0d78"
+down_revision: Union[str, None] = "ad2e5f8a9b67"
+branch_labels = None
+depends_on = None
+
+# (jadval, index nomi, ustunlar, partial predikat)
+INDEXES = [
+    # database.base.DELIVERABLE_SQL bilan bir xil bo'lishi shart
+    ("users", "idx_user_deliverable_day", ["current_day", "user_id"], "is_subscribed = true AND is_blocked = false"),
+    ("schedule_posts", "idx_post_time", ["time"], "time IS NOT NULL"),
+    ("survey_responses", "idx_response_user_survey", ["user_id", "survey_id", "is_completed"], None),
+    ("survey_answers", "idx_answer_response_question", ["response_id", "question_id"], None),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    for table, name, columns, where in INDEXES:
+        if not insp.has_table(table):
+            continue
+        if name in {i.get("name") for i in insp.get_indexes(table)}:
+            continue
+        op.create_index(
+            name,
+            table,
+            columns,
+            unique=False,
+            postgresql_where=sa.text(where) if where else None,
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    for table, name, _columns, _where in reversed(INDEXES):
+        if insp.has_table(table) and name in {i.get("name") for i in insp.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,42 @@
+"""outbox priority
+
+Revision ID: cf4a7b0d1e89
+Revises: be3f6a9c0d78
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "cf4a7b0d1e89"
+down_revision: Union[str, None] = "be3f6a9c0d78"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if not insp.has_table("delivery_outbox"):
+        return
+    if "priority" in {c["name"] for c in insp.get_columns("delivery_outbox")}:
+        return
+    # Doimiy default - PostgreSQL 11+ da jadval qayta yozilmaydi
+    op.add_column(
+        "delivery_outbox",
+        sa.Column("priority", sa.SmallInteger(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if insp.has_table("delivery_outbox") and "priority" in {c["name"] for c in insp.get_columns("delivery_outbox")}:
+        op.drop_column("delivery_outbox", "priority")
@@ -0,0 +1,46 @@
+"""drop progress sending index
+
+Revision ID: d05b8c1e2f9a
+Revises: cf4a7b0d1e89
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d05b8c1e2f9a"
+down_revision: Union[str, None] = "cf4a7b0d1e89"
+branch_labels = None
+depends_on = None
+
+
+def _progress_indexes(bind) -> set:
+    insp = sa.inspect(bind)
+    if not insp.has_table("user_progress"):
+        return set()
+    return {i.get("name") for i in insp.get_indexes("user_progress")}
+
+
+def upgrade() -> None:
+    # Stale 'sending' yozuvlar endi outbox lease orqali tozalanadi - index ishlatilmaydi
+    if "idx_progress_sending" in _progress_indexes(op.get_bind()):
+        op.drop_index("idx_progress_sending", table_name="user_progress")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("user_progress"):
+        return
+    if "idx_progress_sending" not in _progress_indexes(bind):
+        op.create_index(
+            "idx_progress_sending",
+            "user_progress",
+            ["sent_date"],
+            unique=False,
+            postgresql_where=sa.text("status = 'sending'"),
+        )
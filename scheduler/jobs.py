@@ -0,0 +1,150 @@
+import logging
+
+from aiogram import Bot
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.cron import CronTrigger
+
+from config import config
+from database import get_session
+from database.fsm_storage import cleanup_fsm_states
+from scheduler.leader import LeaderElection
+from scheduler.tasks import SchedulerTasks
+from services import broadcast_progress, outbox, user_stats
+
+logger = logging.getLogger(__name__)
+
+
+def create_scheduler(bot: Bot) -> AsyncIOScheduler:
+    """
+    Barcha davriy joblar ro'yxatga olingan scheduler (hali start qilinmagan).
+
+    bot.py (embedded rejim) va worker.py bir xil job to'plamini ishlatadi;
+    qaysi process ishga tushirishini leader election hal qiladi.
+    """
+    scheduler = AsyncIOScheduler(timezone=config.TIMEZONE)
+    tasks = SchedulerTasks(bot)
+
+    # ============== WRAPPER FUNKSİYALAR (session yaratadi) ==============
+    async def check_launch_users_wrapper():
+        async with get_session() as session:
+            await tasks.check_launch_users(session)
+
+    async def send_scheduled_posts_wrapper():
+        async with get_session() as session:
+            await tasks.send_scheduled_posts(session)
+
+    async def update_user_days_wrapper():
+        async with get_session() as session:
+            await tasks.update_user_days(session)
+
+    async def cleanup_old_progress_wrapper():
+        async with get_session() as session:
+            await tasks.cleanup_old_progress(session)
+
+    async def cleanup_outbox_wrapper():
+        async with get_session() as session:
+            purged = await outbox.purge_finished(
+                session, config.OUTBOX_RETENTION_DAYS, batch_size=config.CLEANUP_BATCH_SIZE
+            )
+            logger.info(f"Purged {purged} finished outbox rows")
+
+    async def cleanup_fsm_states_wrapper():
+        removed = await cleanup_fsm_states()
+        logger.info(f"Removed {removed} expired FSM states")
+
+    async def update_broadcast_progress_wrapper():
+        async with get_session() as session:
+            await broadcast_progress.update_broadcast_progress(bot, session)
+
+    async def refresh_daily_stats_wrapper():
+        async with get_session() as session:
+            await user_stats.refresh_daily_stats(session)
+
+    scheduler.add_job(
+        check_launch_users_wrapper,
+        trigger=IntervalTrigger(minutes=config.LAUNCH_RECONCILE_MINUTES),
+        id='check_launch_users',
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        send_scheduled_posts_wrapper,
+        trigger=IntervalTrigger(minutes=1),
+        id='send_scheduled_posts',
+        replace_existing=True,
+        # O'tkazib yuborilgan tick'lar watermark orqali keyingi tick'da yetkaziladi
+        coalesce=True,
+        max_instances=1,
+    )
+
+    scheduler.add_job(
+        update_user_days_wrapper,
+        trigger=CronTrigger(hour=0, minute=5, timezone=config.TIMEZONE),
+        id='update_user_days',
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        cleanup_old_progress_wrapper,
+        trigger=CronTrigger(hour=3, minute=0, timezone=config.TIMEZONE),
+        id='cleanup_old_progress',
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        cleanup_outbox_wrapper,
+        trigger=CronTrigger(hour=3, minute=30, timezone=config.TIMEZONE),
+        id='cleanup_outbox',
+        replace_existing=True
+    )
+
+    if config.FSM_STORAGE.lower() == "postgres":
+        scheduler.add_job(
+            cleanup_fsm_states_wrapper,
+            trigger=CronTrigger(hour=3, minute=45, timezone=config.TIMEZONE),
+            id='cleanup_fsm_states',
+            replace_existing=True
+        )
+
+    # Faqat liderda ishlaydi - ko'p replikada ham progress/yakuniy xabar bir marta
+    scheduler.add_job(
+        update_broadcast_progress_wrapper,
+        trigger=IntervalTrigger(seconds=broadcast_progress.BROADCAST_PROGRESS_INTERVAL),
+        id='update_broadcast_progress',
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+    )
+
+    scheduler.add_job(
+        refresh_daily_stats_wrapper,
+        trigger=IntervalTrigger(minutes=config.STATS_REFRESH_MINUTES),
+        id='refresh_daily_stats',
+        replace_existing=True
+    )
+
+    return scheduler
+
+
+def create_leader_election(scheduler: AsyncIOScheduler) -> LeaderElection:
+    """Scheduler faqat lider bo'lganda ishlaydi; liderlik yo'qolsa pauza qilinadi."""
+
+    async def on_elected():
+        if scheduler.running:
+            scheduler.resume()
+        else:
+            scheduler.start()
+        logger.info("Scheduler started")
+
+    async def on_demoted():
+        if scheduler.running:
+            scheduler.pause()
+        logger.info("Scheduler paused")
+
+    return LeaderElection(
+        lock_key=config.SCHEDULER_LOCK_KEY,
+        check_interval=config.SCHEDULER_LEADER_CHECK_SECONDS,
+        on_elected=on_elected,
+        on_demoted=on_demoted,
+    )
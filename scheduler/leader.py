@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from database.session import engine
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """
+    Postgres advisory lock orqali replikalar orasida bitta lider tanlash.
+
+    Lock alohida (AUTOCOMMIT) connection'ning sessiyasiga bog'langan: process
+    o'lsa yoki connection uzilsa Postgres lockni o'zi bo'shatadi va boshqa
+    replika keyingi urinishda lider bo'ladi. Lider connection'ni har
+    `check_interval` sekundda tekshiradi; uzilsa darhol `on_demoted` chaqiriladi.
+
+    Eslatma: PgBouncer transaction rejimida session-level lock ishlamaydi -
+    DATABASE_URL to'g'ridan-to'g'ri Postgres'ga (yoki session pooling) bo'lishi kerak.
+    """
+
+    def __init__(
+        self,
+        lock_key: int,
+        check_interval: float,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+    ):
+        self.lock_key = lock_key
+        self.check_interval = check_interval
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.is_leader = False
+        self._conn: Optional[AsyncConnection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="leader-election")
+            logger.info(f"Leader election started (lock key {self.lock_key})")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+        if self.is_leader:
+            await self._demote()
+        await self._close()
+        logger.info("Leader election stopped")
+
+    async def _connect(self) -> AsyncConnection:
+        if self._conn is None:
+            conn = await engine.connect()
+            # Uzoq ochiq tranzaksiya (idle in transaction) qolmasligi uchun
+            self._conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        return self._conn
+
+    async def _close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        try:
+            # Pool'ga qaytarilmaydi: lock sessiya bilan birga yo'qolishi kerak
+            await conn.invalidate()
+            await conn.close()
+        except Exception as e:
+            logger.warning(f"Leader connection close failed: {e}")
+
+    async def _demote(self):
+        self.is_leader = False
+        logger.warning("Scheduler leadership lost")
+        try:
+            await self.on_demoted()
+        except Exception as e:
+            logger.exception(f"on_demoted failed: {e}")
+
+    async def _tick(self):
+        conn = await self._connect()
+        if self.is_leader:
+            # Connection tirik - demak lock hali bizda
+            await conn.execute(text("SELECT 1"))
+            return
+
+        acquired = (
+            await conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+            )
+        ).scalar()
+        if acquired:
+            self.is_leader = True
+            logger.info("Scheduler leadership acquired")
+            await self.on_elected()
+
+    async def _run(self):
+        while True:
+            try:
+                await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Leader election check failed: {e}")
+                if self.is_leader:
+                    await self._demote()
+                await self._close()
+            await asyncio.sleep(self.check_interval)
@@ -0,0 +1,336 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Set
+
+from aiogram import Bot
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from sqlalchemy import select, text
+
+from config import config
+from database import async_session_maker
+from database.session import engine
+from database.crud import get_setting
+from database.base import BroadcastCampaign, SchedulePost, Survey
+from scheduler.tasks import SchedulerTasks
+from services import outbox
+from services.delivery_errors import DeliveryFailure, INVALID, classify_failure
+from services.flood_governor import bulk_send
+from services.send_engine import send_engine
+from keyboards.user_kb import get_subscribe_keyboard
+from utils.bot_info import get_bot_username
+from utils.texts import Texts
+
+logger = logging.getLogger(__name__)
+
+# Muddati kelgan, lekin boshqa worker band qilgan qatorlarda aylanib qolmaslik uchun
+MIN_WAIT = 0.2
+
+
+class LeaseLost(Exception):
+    """Qator lease'i yo'qolgan yoki tugashiga oz qolgan - yuborilmaydi."""
+
+
+class BatchLease:
+    """
+    Bitta batch'ning lease holati.
+
+    `value` - bazadagi locked_until (fencing token), `deadline` - uning lokal
+    (monotonic) nusxasi. Heartbeat ikkalasini yangilaydi; uzaytirib bo'lmasa
+    deadline'ga `margin` qolganda yuborish to'xtaydi - lease tugab qator boshqa
+    workerga o'tganidan keyin bu worker yubormaydi.
+    """
+
+    def __init__(self, rows: Iterable, started: float, lease_seconds: int, margin: float):
+        rows = list(rows)
+        self.ids: Set[int] = {row.outbox_id for row in rows}
+        self.value: datetime = rows[0].locked_until
+        self.lease_seconds = lease_seconds
+        self.margin = margin
+        # locked_until claim so'rovidan oldingi vaqtdan hisoblanadi - lokal deadline hech qachon kech emas
+        self.deadline = started + lease_seconds
+        self.lost: Set[int] = set()
+
+    def can_send(self, outbox_id: int) -> bool:
+        return outbox_id not in self.lost and time.monotonic() < self.deadline - self.margin
+
+    def renewed(self, value: Optional[datetime], kept: Set[int], started: float):
+        self.lost |= self.ids - kept
+        if value is not None:
+            self.value = value
+            self.deadline = started + self.lease_seconds
+
+
+async def send_broadcast_message(
+    bot: Bot,
+    user_id: int,
+    campaign: BroadcastCampaign,
+    survey: Optional[Survey] = None,
+):
+    """Rassilka xabarini bitta userga yuborish (xato bo'lsa exception ko'tariladi)."""
+    btype = campaign.broadcast_type
+
+    if btype == "survey":
+        if not survey:
+            raise ValueError(f"Survey {campaign.survey_id} not found")
+        link = f"https://t.me/{get_bot_username()}?start=survey_{survey.survey_id}"
+        kb = InlineKeyboardMarkup(
+            inline_keyboard=[[
+                InlineKeyboardButton(text=survey.button_text or "📝 Заполнить", url=link)
+            ]]
+        )
+        return await bot.send_message(
+            user_id,
+            survey.message_text or "Пожалуйста, заполните анкету:",
+            reply_markup=kb,
+            parse_mode="HTML",
+        )
+    if btype == "photo":
+        return await bot.send_photo(user_id, campaign.file_id, caption=campaign.caption, parse_mode="HTML")
+    if btype == "video":
+        return await bot.send_video(user_id, campaign.file_id, caption=campaign.caption, parse_mode="HTML")
+    if btype == "document":
+        return await bot.send_document(user_id, campaign.file_id, caption=campaign.caption, parse_mode="HTML")
+    return await bot.send_message(user_id, campaign.content, parse_mode="HTML")
+
+
+async def send_subscribe_request(bot: Bot, user_id: int):
+    """/start'dan keyin kechiktirilgan obuna so'rovi."""
+    text = await get_setting("subscribe_request", Texts.SUBSCRIBE_REQUEST)
+    return await bot.send_message(user_id, text, reply_markup=get_subscribe_keyboard(), parse_mode="HTML")
+
+
+class OutboxWorker:
+    """delivery_outbox navbatini batch'lab yuboruvchi worker.
+
+    Bir nechta process parallel ishlashi mumkin: claim SKIP LOCKED bilan,
+    shuning uchun bitta qatorni faqat bitta worker oladi.
+
+    Bo'sh navbatni so'rab turmaydi: yangi qatorlar NOTIFY orqali uyg'otadi,
+    kechiktirilgan qatorlar uchun eng yaqin available_at'gacha uxlaydi;
+    `poll_interval` - faqat yuqori chegara (LISTEN ishlamasa ham ishlaydi).
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        batch_size: int = config.OUTBOX_BATCH_SIZE,
+        lease_seconds: int = config.OUTBOX_LEASE_SECONDS,
+        poll_interval: float = config.OUTBOX_POLL_INTERVAL,
+        max_attempts: int = config.OUTBOX_MAX_ATTEMPTS,
+        lease_margin: float = config.OUTBOX_LEASE_MARGIN_SECONDS,
+    ):
+        self.bot = bot
+        self.tasks = SchedulerTasks(bot)
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease_margin = lease_margin
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._run(), name="outbox-worker"),
+                asyncio.create_task(self._listen(), name="outbox-listener"),
+            ]
+            logger.info("Outbox worker started")
+
+    async def stop(self):
+        if not self._tasks:
+            return
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Outbox worker stopped")
+
+    def wake(self, *args):
+        self._wakeup.set()
+
+    async def _listen(self):
+        """LISTEN alohida AUTOCOMMIT connection'da (tranzaksiya ichida NOTIFY kechikadi)."""
+        while True:
+            conn = None
+            try:
+                conn = await engine.connect()
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                raw = await conn.get_raw_connection()
+                await raw.driver_connection.add_listener(outbox.NOTIFY_CHANNEL, self.wake)
+                # Ulanish bo'lmagan paytda qo'shilgan qatorlarni ham olish
+                self.wake()
+                while True:
+                    await asyncio.sleep(self.poll_interval)
+                    await conn.execute(text("SELECT 1"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Outbox LISTEN failed, falling back to polling: {e}")
+                await asyncio.sleep(self.poll_interval)
+            finally:
+                if conn is not None:
+                    # Listener bilan connection pool'ga qaytmasin
+                    try:
+                        await conn.invalidate()
+                        await conn.close()
+                    except Exception as e:
+                        logger.warning(f"Outbox listener connection close failed: {e}")
+
+    async def _next_wait(self) -> float:
+        async with async_session_maker() as session:
+            due = await outbox.seconds_until_next(session)
+        if due is None:
+            return self.poll_interval
+        return min(self.poll_interval, max(due, MIN_WAIT))
+
+    async def _run(self):
+        while True:
+            # Drain paytida kelgan NOTIFY keyingi aylanishni darhol boshlaydi
+            self._wakeup.clear()
+            try:
+                processed = await self.drain_once()
+                # To'liq batch bo'lsa navbatda yana bor - kutmasdan davom etamiz
+                wait = 0 if processed >= self.batch_size else await self._next_wait()
+            except Exception as e:
+                logger.exception(f"Outbox drain failed: {e}")
+                wait = self.poll_interval
+
+            if wait > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _load_posts(self, session, post_ids) -> Dict[int, SchedulePost]:
+        if not post_ids:
+            return {}
+        result = await session.execute(select(SchedulePost).where(SchedulePost.post_id.in_(post_ids)))
+        return {p.post_id: p for p in result.scalars().all()}
+
+    async def _load_campaigns(self, session, broadcast_ids) -> Dict[int, BroadcastCampaign]:
+        if not broadcast_ids:
+            return {}
+        result = await session.execute(
+            select(BroadcastCampaign).where(BroadcastCampaign.broadcast_id.in_(broadcast_ids))
+        )
+        return {c.broadcast_id: c for c in result.scalars().all()}
+
+    async def _heartbeat(self, lease: BatchLease, done: asyncio.Event):
+        """Batch yuborilayotgan paytda lease'ni uzaytirib turish (cancel emas, `done` bilan to'xtaydi)."""
+        while True:
+            try:
+                await asyncio.wait_for(done.wait(), timeout=self.lease_seconds / 3)
+                return
+            except asyncio.TimeoutError:
+                pass
+            started = time.monotonic()
+            try:
+                async with async_session_maker() as session:
+                    value, kept = await outbox.extend_lease(
+                        session, lease.ids - lease.lost, lease.value, self.lease_seconds
+                    )
+                    await session.commit()
+            except Exception as e:
+                # Deadline o'zgarmaydi - lease tugashiga yaqin yuborish o'zi to'xtaydi
+                logger.warning(f"Outbox lease heartbeat failed: {e}")
+                continue
+            lease.renewed(value, kept, started)
+
+    async def _deliver_leased(self, lease: BatchLease, row, posts, campaigns, surveys) -> bool:
+        # Tekshiruv navbat va chat intervalidan keyin, yuborishdan darhol oldin
+        if not lease.can_send(row.outbox_id):
+            raise LeaseLost()
+        if row.priority <= outbox.PRIORITY_BULK:
+            return await self._deliver(row, posts, campaigns, surveys)
+        # User harakatiga javob: governor navbatini kutmaydi (handler javoblari kabi)
+        token = bulk_send.set(False)
+        try:
+            return await self._deliver(row, posts, campaigns, surveys)
+        finally:
+            bulk_send.reset(token)
+
+    async def _deliver(self, row, posts, campaigns, surveys) -> bool:
+        if row.kind == outbox.KIND_POST:
+            post = posts.get(row.post_id)
+            if post is None:
+                return False
+            return await self.tasks._send_post(self.bot, row.user_id, post, surveys=surveys)
+
+        if row.kind == outbox.KIND_SUBSCRIBE_REQUEST:
+            await send_subscribe_request(self.bot, row.user_id)
+            return True
+
+        campaign = campaigns.get(row.broadcast_id)
+        if campaign is None:
+            return False
+        await send_broadcast_message(self.bot, row.user_id, campaign, surveys.get(campaign.survey_id))
+        return True
+
+    async def drain_once(self) -> int:
+        """Bitta batch: claim -> yuborish -> natijani yozish. Qaytaradi: olingan qatorlar soni."""
+        async with async_session_maker() as session:
+            started = time.monotonic()
+            rows = await outbox.claim_batch(session, self.batch_size, self.lease_seconds)
+            if not rows:
+                await session.commit()
+                return 0
+            lease = BatchLease(rows, started, self.lease_seconds, self.lease_margin)
+
+            allowed = await outbox.claim_deliveries(session, rows)
+            await session.commit()
+
+            skipped = [row for row in rows if row.outbox_id not in allowed]
+            claimed = [row for row in rows if row.outbox_id in allowed]
+
+            posts = await self._load_posts(session, {r.post_id for r in rows if r.post_id})
+            campaigns = await self._load_campaigns(session, {r.broadcast_id for r in rows if r.broadcast_id})
+            surveys = await self.tasks._load_post_surveys(session, posts.values())
+            campaign_survey_ids = {c.survey_id for c in campaigns.values() if c.survey_id} - set(surveys)
+            if campaign_survey_ids:
+                result = await session.execute(select(Survey).where(Survey.survey_id.in_(campaign_survey_ids)))
+                surveys.update({s.survey_id: s for s in result.scalars().all()})
+            # Yuborish davomida connection pool'da band turmasin
+            await session.commit()
+
+            done = asyncio.Event()
+            heartbeat = asyncio.create_task(self._heartbeat(lease, done), name="outbox-lease-heartbeat")
+            try:
+                results = await asyncio.gather(
+                    *(
+                        send_engine.send(row.user_id, partial(self._deliver_leased, lease, row, posts, campaigns, surveys))
+                        for row in claimed
+                    ),
+                    return_exceptions=True,
+                )
+            finally:
+                # Ketayotgan uzaytirish tugashini kutamiz - lease.value bazadagi bilan bir xil qolsin
+                done.set()
+                await heartbeat
+
+            delivered, failed, checked_users, unsent = [], [], set(), 0
+            for row, result in zip(claimed, results):
+                if isinstance(result, LeaseLost):
+                    # Qatorga tegilmaydi: lease tugagach boshqa worker (yoki keyingi claim) oladi
+                    unsent += 1
+                elif result is True:
+                    delivered.append(row)
+                    post = posts.get(row.post_id)
+                    if post is not None and post.post_type == "subscription_check":
+                        checked_users.add(row.user_id)
+                elif isinstance(result, BaseException):
+                    failed.append((row, classify_failure(result)))
+                else:
+                    # Post noto'g'ri sozlangan (kontent/anketa yo'q) - qayta urinish foydasiz
+                    failed.append((row, DeliveryFailure(INVALID, "not sent")))
+
+            if unsent:
+                logger.warning(f"Outbox lease expiring, {unsent} rows left unsent")
+
+            await outbox.complete_batch(
+                session, lease.value, delivered, failed, skipped, checked_users, max_attempts=self.max_attempts
+            )
+            return len(rows)
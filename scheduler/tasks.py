@@ -1,22 +1,52 @@
 # scheduler/tasks.py - UPDATED WITH PROPER SURVEY MESSAGE
-import asyncio
 from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import pytz
 from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from sqlalchemy import select
+from sqlalchemy import select, update, delete, exists, func, tuple_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.base import User, SchedulePost, UserProgress, ScheduleDay, Survey
+from database.base import User, SchedulePost, UserProgress, ScheduleDay, Survey, Setting, LAUNCH_PENDING_SQL
+from database.crud import delete_in_batches
+from services import outbox
+from utils.bot_info import resolve_bot_identity
 from utils.helpers import format_moscow_time
 from config import config
 
+SCHEDULE_WATERMARK_KEY = "scheduler_last_tick"
+WATERMARK_FORMAT = "%Y-%m-%d %H:%M"
+
 
 class SchedulerTasks:
     def __init__(self, bot: Bot):
         self.bot = bot
 
-    async def _send_post(self, bot: Bot, user_id: int, post: SchedulePost, session: AsyncSession) -> bool:
-        """Bitta postni yuborish (UPDATED SURVEY HANDLING)"""
+    async def _load_post_surveys(self, session: AsyncSession, posts) -> Dict[int, Survey]:
+        """Survey postlari uchun anketalarni oldindan bitta query bilan yuklash."""
+        survey_ids = {p.survey_id for p in posts if p.post_type == "survey" and p.survey_id}
+        if not survey_ids:
+            return {}
+        result = await session.execute(select(Survey).where(Survey.survey_id.in_(survey_ids)))
+        return {s.survey_id: s for s in result.scalars().all()}
+
+    async def _send_post(
+        self,
+        bot: Bot,
+        user_id: int,
+        post: SchedulePost,
+        session: Optional[AsyncSession] = None,
+        surveys: Optional[Dict[int, Survey]] = None,
+    ) -> bool:
+        """Bitta postni yuborish (UPDATED SURVEY HANDLING).
+
+        Noto'g'ri sozlangan post uchun False qaytaradi; Telegram xatolari
+        ko'tariladi.
+
+        `surveys` berilsa session ishlatilmaydi - send engine'da parallel
+        yuborishlar bitta AsyncSession'ni bo'lishmasligi uchun.
+        """
         try:
             media_types = ["photo", "video", "video_note", "audio", "document", "voice"]
 
@@ -97,16 +127,20 @@ class SchedulerTasks:
                     print(f"⚠️ Warning: Post {post.post_id} (type: survey) has no survey_id - skipping")
                     return False
 
-                survey_result = await session.execute(
-                    select(Survey).where(Survey.survey_id == post.survey_id)
-                )
-                survey = survey_result.scalar_one_or_none()
+                if surveys is not None:
+                    survey = surveys.get(post.survey_id)
+                else:
+                    survey_result = await session.execute(
+                        select(Survey).where(Survey.survey_id == post.survey_id)
+                    )
+                    survey = survey_result.scalar_one_or_none()
 
                 if not survey or not survey.is_active:
                     print(f"⚠️ Warning: Survey {post.survey_id} not found or inactive - skipping")
                     return False
 
-                bot_info = await bot.get_me()
+                # Bot profili bir marta olinadi - har bir userga get_me() yuborilmaydi
+                bot_info = await resolve_bot_identity(bot)
                 bot_username = bot_info.username
 
                 keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -144,13 +178,17 @@ class SchedulerTasks:
             return True
 
         except Exception as e:
+            # Xato turini chaqiruvchi (outbox worker) aniqlaydi: retry / blok / dead-letter
             print(f"❌ Failed to send post {post.post_id} to {user_id}: {e}")
-            return False
+            raise
 
-    async def send_launch_sequence(self, bot: Bot, session: AsyncSession, user: User):
+    async def send_launch_sequence(self, bot: Bot, session: AsyncSession, user: User, start_delay: int = 0):
         """
-        Day 0 postlarni ketma-ket yuborish.
+        Day 0 postlarni delivery_outbox'ga navbatga qo'yish.
         /start + подписка tasdiqlangandan keyin chaqiriladi.
+
+        start_delay + delay_seconds `available_at` ga aylanadi; subscription_check posti
+        yetkazilganda worker user.subscription_checked'ni o'rnatadi.
         """
         if user.first_message_sent:
             return
@@ -166,50 +204,38 @@ class SchedulerTasks:
             print("⚠️ No posts found for day 0")
             return
 
-        user.first_message_sent = True
-        await session.commit()
-
-        print(f"📤 Starting launch sequence for user {user.user_id}")
-
+        sequence = []
         for post in posts:
-            delay = post.delay_seconds or 0
-            if delay > 0:
-                print(f"⏳ Waiting {delay} seconds before sending post {post.post_id}")
-                await asyncio.sleep(delay)
-
-            success = await self._send_post(bot, user.user_id, post, session)
-
-            if success:
-                session.add(
-                    UserProgress(
-                        user_id=user.user_id,
-                        post_id=post.post_id,
-                        status="sent",
-                    )
-                )
-                print(f"✅ Post {post.post_id} sent to user {user.user_id}")
-
+            sequence.append(post)
             if post.post_type == "subscription_check":
-                user.subscription_checked = True
-                await session.commit()
-                print(f"🛑 Stopped at subscription check for user {user.user_id}")
                 break
 
+        # /start qayta bosilganda launch boshidan ketadi: eski day 0 progressni
+        # o'chiramiz, aks holda unique (user_id, post_id) ularni tashlab yuboradi
+        await session.execute(
+            delete(UserProgress).where(
+                UserProgress.user_id == user.user_id,
+                UserProgress.post_id.in_([post.post_id for post in posts]),
+                UserProgress.status == "sent",
+            )
+        )
+
+        user.first_message_sent = True
+        queued = await outbox.enqueue_post_sequence(
+            session, user.user_id, sequence, start_delay, priority=outbox.PRIORITY_INTERACTIVE
+        )
         await session.commit()
 
+        print(f"📤 Launch sequence queued for user {user.user_id}: {queued} posts")
+
     async def send_remaining_launch_posts(self, bot: Bot, session: AsyncSession, user: User):
         """
-        Obuna tasdiqlangandan keyin Day 0 bo'yicha qolgan postlarni yuborish.
+        Obuna tasdiqlangandan keyin Day 0 bo'yicha qolgan postlarni navbatga qo'yish.
         """
         if not user.subscription_checked:
             print(f"⚠️ User {user.user_id} subscription not checked yet")
             return
 
-        sent_posts = await session.execute(
-            select(UserProgress.post_id).where(UserProgress.user_id == user.user_id)
-        )
-        sent_ids = {row[0] for row in sent_posts.all()}
-
         posts_result = await session.execute(
             select(SchedulePost)
             .where(SchedulePost.day_number == 0)
@@ -217,150 +243,258 @@ class SchedulerTasks:
         )
         posts = posts_result.scalars().all()
 
-        started = False
+        # subscription_check'dan keyingi hamma postlar navbatga qo'yiladi; allaqachon
+        # yuborilganlari worker'da user_progress ON CONFLICT orqali tashlab yuboriladi
         remaining_posts = []
-
+        started = False
         for post in posts:
-            if post.post_id in sent_ids:
-                if post.post_type == "subscription_check":
-                    started = True
-                continue
-
             if started:
                 remaining_posts.append(post)
+            elif post.post_type == "subscription_check":
+                started = True
 
         if not remaining_posts:
             print(f"ℹ️ No remaining posts for user {user.user_id}")
             return
 
-        print(f"📤 Sending {len(remaining_posts)} remaining posts to user {user.user_id}")
+        await outbox.enqueue_post_sequence(
+            session, user.user_id, remaining_posts, priority=outbox.PRIORITY_INTERACTIVE
+        )
+        await session.commit()
 
-        for post in remaining_posts:
-            delay = post.delay_seconds or 0
-            if delay > 0:
-                print(f"⏳ Waiting {delay} seconds before sending post {post.post_id}")
-                await asyncio.sleep(delay)
+        print(f"📤 Queued {len(remaining_posts)} remaining posts for user {user.user_id}")
 
-            success = await self._send_post(bot, user.user_id, post, session)
+    def _pending_deliveries_query(self, post_ids: List[int]):
+        """
+        Due postlar x mos userlar minus mavjud user_progress (anti-join).
+        """
+        return (
+            select(User.user_id, SchedulePost.post_id, SchedulePost.order_number)
+            .join(SchedulePost, SchedulePost.day_number == User.current_day)
+            .where(
+                SchedulePost.post_id.in_(post_ids),
+                User.is_subscribed == True,
+                User.is_blocked == False,
+                ~exists().where(
+                    UserProgress.user_id == User.user_id,
+                    UserProgress.post_id == SchedulePost.post_id,
+                ),
+            )
+            .order_by(SchedulePost.order_number, SchedulePost.post_id, User.user_id)
+        )
 
-            if success:
-                session.add(
-                    UserProgress(
-                        user_id=user.user_id,
-                        post_id=post.post_id,
-                        status="sent",
-                    )
+    async def plan_pending_deliveries(
+        self,
+        session: AsyncSession,
+        post_ids: List[int],
+        chunk_size: int = config.DELIVERY_CHUNK_SIZE,
+    ) -> AsyncIterator[List[Tuple[int, int]]]:
+        """
+        Yuborilishi kerak bo'lgan (user_id, post_id) juftliklarini chunk'lab qaytarish.
+
+        Har bir chunk bitta anti-join query; keyset (order_number, post_id, user_id)
+        bo'yicha davom etadi, shuning uchun yuborilmay qolganlar qayta aylanmaydi.
+        """
+        if not post_ids:
+            return
+
+        cursor = None
+        while True:
+            stmt = self._pending_deliveries_query(post_ids)
+            if cursor is not None:
+                stmt = stmt.where(
+                    tuple_(SchedulePost.order_number, SchedulePost.post_id, User.user_id)
+                    > tuple_(*cursor)
                 )
-                print(f"✅ Post {post.post_id} sent to user {user.user_id}")
 
+            rows = (await session.execute(stmt.limit(chunk_size))).all()
+            if not rows:
+                return
+
+            last_user_id, last_post_id, last_order = rows[-1]
+            cursor = (last_order, last_post_id, last_user_id)
+
+            yield [(user_id, post_id) for user_id, post_id, _ in rows]
+
+            if len(rows) < chunk_size:
+                return
+
+    @staticmethod
+    def _minute_labels(start: datetime, end: datetime) -> List[str]:
+        """[start, end] oralig'idagi har bir daqiqa uchun "HH:MM" (va "H:MM") ko'rinishlari."""
+        labels = []
+        minute = start
+        while minute <= end:
+            labels.append(f"{minute.hour:02d}:{minute.minute:02d}")
+            if minute.hour < 10:
+                # Admin vaqtni "9:05" ko'rinishida ham kiritishi mumkin
+                labels.append(f"{minute.hour}:{minute.minute:02d}")
+            minute += timedelta(minutes=1)
+        return labels
+
+    async def _scheduled_window(self, session: AsyncSession) -> Optional[Tuple[datetime, datetime]]:
+        """
+        Oxirgi muvaffaqiyatli tick'dan (watermark) hozirgacha bo'lgan daqiqalar oynasi.
+
+        Vaqt config.TIMEZONE'da hisoblanadi. Oyna kun chegarasidan va
+        SCHEDULE_CATCHUP_MINUTES'dan oshmaydi.
+        """
+        tz = pytz.timezone(config.TIMEZONE)
+        now = datetime.now(tz).replace(tzinfo=None, second=0, microsecond=0)
+
+        result = await session.execute(
+            select(Setting.setting_value).where(Setting.setting_key == SCHEDULE_WATERMARK_KEY)
+        )
+        watermark = result.scalar_one_or_none()
+
+        start = now
+        if watermark:
+            try:
+                start = datetime.strptime(watermark, WATERMARK_FORMAT) + timedelta(minutes=1)
+            except ValueError:
+                start = now
+
+        start = max(
+            start,
+            now - timedelta(minutes=config.SCHEDULE_CATCHUP_MINUTES),
+            now.replace(hour=0, minute=0),
+        )
+        if start > now:
+            return None
+        return start, now
+
+    async def _save_watermark(self, session: AsyncSession, minute: datetime):
+        await session.execute(
+            pg_insert(Setting)
+            .values(setting_key=SCHEDULE_WATERMARK_KEY, setting_value=minute.strftime(WATERMARK_FORMAT))
+            .on_conflict_do_update(
+                index_elements=[Setting.setting_key],
+                set_={"setting_value": minute.strftime(WATERMARK_FORMAT), "updated_at": func.now()},
+            )
+        )
         await session.commit()
 
     async def send_scheduled_posts(self, session: AsyncSession):
         """
         Oddiy kunlar (day 1+) uchun HH:MM bo'yicha postlarni yuborish.
+
+        Faqat joriy daqiqa emas, oxirgi watermark'dan beri o'tgan barcha
+        daqiqalar tekshiriladi - kechikkan yoki o'tkazib yuborilgan tick
+        keyingi tick'da yetkaziladi.
         """
-        now = datetime.now().strftime("%H:%M")
-        moscow_now = format_moscow_time(now)
+        window = await self._scheduled_window(session)
+        if window is None:
+            return
+        start, end = window
+        period = format_moscow_time(start.strftime("%H:%M"))
+        if end > start:
+            period += f"-{format_moscow_time(end.strftime('%H:%M'))}"
 
         posts_result = await session.execute(
             select(SchedulePost)
             .join(ScheduleDay)
             .where(
                 ScheduleDay.day_type > 0,
-                SchedulePost.time == moscow_now,
+                SchedulePost.time.in_(self._minute_labels(start, end)),
             )
         )
-        posts = posts_result.scalars().all()
-
-        if not posts:
-            return
+        posts = {post.post_id: post for post in posts_result.scalars().all()}
 
-        print(f"📅 Found {len(posts)} scheduled posts for {moscow_now}")
+        if posts:
+            print(f"📅 Found {len(posts)} scheduled posts for {period}")
 
-        for post in posts:
-            users_result = await session.execute(
-                select(User).where(
-                    User.current_day == post.day_number,
-                    User.is_subscribed == True,
-                    User.is_blocked == False,
-                )
-            )
+            queued_total = 0
+            async for chunk in self.plan_pending_deliveries(session, list(posts)):
+                await outbox.enqueue_posts(session, chunk)
+                await session.commit()
+                queued_total += len(chunk)
 
-            for user in users_result.scalars():
-                exists = await session.execute(
-                    select(UserProgress).where(
-                        UserProgress.user_id == user.user_id,
-                        UserProgress.post_id == post.post_id,
-                    )
-                )
-                if exists.scalar():
-                    continue
-
-                success = await self._send_post(self.bot, user.user_id, post, session)
-
-                if success:
-                    session.add(
-                        UserProgress(
-                            user_id=user.user_id,
-                            post_id=post.post_id,
-                            status="sent",
-                        )
-                    )
-                    print(f"✅ Scheduled post {post.post_id} sent to user {user.user_id}")
+            print(f"📤 Scheduled posts for {period}: {queued_total} deliveries queued")
 
-        await session.commit()
+        # Hammasi navbatga tushgandan keyingina watermark suriladi
+        await self._save_watermark(session, end)
 
-    async def update_user_days(self, session: AsyncSession):
+    async def update_user_days(self, session: AsyncSession, batch_size: int = config.DELIVERY_CHUNK_SIZE) -> int:
         """
         Har kuni belgilangan vaqtda barcha aktiv userlarning current_day'ini oshirish.
+
+        Userlar ORM'ga yuklanmaydi: server tomonida `UPDATE ... RETURNING`,
+        user_id bo'yicha keyset batch'larda - har bir batch alohida commit,
+        lock'lar qisqa turadi.
         """
-        result = await session.execute(
-            select(User).where(
-                User.is_subscribed == True,
-                User.is_blocked == False,
+        updated_count = 0
+        last_user_id = None
+
+        while True:
+            batch = (
+                select(User.user_id)
+                .where(
+                    User.is_subscribed == True,
+                    User.is_blocked == False,
+                )
+                .order_by(User.user_id)
+                .limit(batch_size)
             )
-        )
-        users = result.scalars().all()
+            if last_user_id is not None:
+                batch = batch.where(User.user_id > last_user_id)
+
+            result = await session.execute(
+                update(User)
+                .where(User.user_id.in_(batch.scalar_subquery()))
+                .values(current_day=User.current_day + 1)
+                .returning(User.user_id)
+                .execution_options(synchronize_session=False)
+            )
+            user_ids = result.scalars().all()
+            await session.commit()
 
-        updated_count = 0
-        for user in users:
-            user.current_day += 1
-            updated_count += 1
+            if not user_ids:
+                break
+            updated_count += len(user_ids)
+            last_user_id = max(user_ids)
+            if len(user_ids) < batch_size:
+                break
 
-        await session.commit()
         print(f"📆 Updated {updated_count} users to next day")
-
-    async def cleanup_old_progress(self, session: AsyncSession):
-        """
-        30 kundan eski progress yozuvlarini o'chirish.
+        return updated_count
+
+    async def cleanup_old_progress(
+        self,
+        session: AsyncSession,
+        retention_days: int = config.PROGRESS_RETENTION_DAYS,
+        batch_size: int = config.CLEANUP_BATCH_SIZE,
+    ) -> int:
         """
-        thirty_days_ago = datetime.now() - timedelta(days=30)
+        Saqlanish muddatidan (default 30 kun) eski progress yozuvlarini o'chirish.
 
-        result = await session.execute(
-            select(UserProgress).where(UserProgress.sent_date < thirty_days_ago)
+        ORM'ga yuklamasdan, sent_date indeksi bo'yicha batch'lab DELETE qilinadi.
+        """
+        cutoff = datetime.now() - timedelta(days=retention_days)
+
+        deleted = await delete_in_batches(
+            session,
+            UserProgress,
+            UserProgress.sent_date < cutoff,
+            UserProgress.status != "sending",
+            batch_size=batch_size,
         )
-        old_progress = result.scalars().all()
-
-        for progress in old_progress:
-            await session.delete(progress)
+        print(f"🗑️ Cleaned up {deleted} old progress records")
+        return deleted
 
-        await session.commit()
-        print(f"🗑️ Cleaned up {len(old_progress)} old progress records")
-
-    async def check_launch_users(self, session: AsyncSession):
+    async def check_launch_users(self, session: AsyncSession, limit: int = 500):
         """
-        Day 0 sequence'ni ishga tushirish uchun userlarni tekshirish.
+        Reconciliation: launch ketma-ketligi navbatga qo'yilmay qolgan userlar.
+
+        Asosiy trigger - cmd_start / check_sub_callback (darhol navbatga qo'yadi);
+        bu sweep faqat xavfsizlik to'ri, idx_user_launch_pending bo'yicha ishlaydi.
         """
         users_result = await session.execute(
-            select(User).where(
-                User.current_day == 0,
-                User.is_subscribed == True,
-                User.subscription_checked == True,
-                User.first_message_sent == False,
-                User.is_blocked == False,
-            )
+            select(User)
+            .where(text(LAUNCH_PENDING_SQL))
+            .order_by(User.user_id)
+            .limit(limit)
         )
 
-        for user in users_result.scalars():
+        for user in users_result.scalars().all():
             print(f"🔍 Found launch user {user.user_id} without sequence – running it")
-            await self.send_launch_sequence(self.bot, session, user)
\ No newline at end of file
+            await self.send_launch_sequence(self.bot, session, user)
@@ -0,0 +1,158 @@
+import asyncio
+import html
+import logging
+from functools import partial
+from typing import List, Optional, Sequence
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+
+from config import config
+from services.send_engine import send_engine
+from utils.helpers import strip_html
+
+logger = logging.getLogger(__name__)
+
+# Telegram xabar uzunligi chegarasi
+MESSAGE_LIMIT = 4096
+SEPARATOR = "\n\n━━━━━━━━━━━━━━━━━━━━\n\n"
+
+def to_plain(text: str) -> str:
+    """HTML xabarni oddiy matnga (teglar olib tashlanadi, entity'lar ochiladi)."""
+    return html.unescape(strip_html(text))
+
+
+def shorten_html(text: str, limit: int) -> str:
+    """
+    Limitdan uzun HTML eventni qisqartirish.
+
+    Kesish teg yoki entity o'rtasiga tushmasligi uchun matn oddiy matnga
+    aylantiriladi, qisqartiriladi va qayta escape qilinadi.
+    """
+    pieces, size = [], 0
+    for char in to_plain(text):
+        piece = html.escape(char, quote=False)
+        if size + len(piece) > limit - 1:
+            break
+        pieces.append(piece)
+        size += len(piece)
+    return "".join(pieces) + "…"
+
+
+class AdminDigestNotifier:
+    """
+    Adminlarga boradigan bildirishnomalarni yig'ib yuboruvchi (digest).
+
+    Eventlar navbatga tushadi va har `interval` sekundda yoki `max_items` ta
+    yig'ilganda bitta (kerak bo'lsa bir nechta) xabar qilib har bir adminga
+    yuboriladi. User handleri hech qachon admin yuborishlarini kutmaydi.
+    """
+
+    def __init__(self, recipients: Sequence[int], interval: float, max_items: int):
+        self.recipients = tuple(recipients)
+        self.interval = interval
+        self.max_items = max(1, max_items)
+        self.bot: Optional[Bot] = None
+        self._items: List[str] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.stats = {"queued": 0, "messages": 0, "failed": 0}
+
+    def start(self, bot: Bot):
+        self.bot = bot
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run(), name="admin-digest")
+            logger.info(f"Admin digest started ({len(self.recipients)} recipients)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        # Cancel emas: ketayotgan flush tugashi kerak, aks holda olingan eventlar yo'qoladi
+        self._closing = True
+        self._wakeup.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        # Qolgan eventlarni yo'qotmaslik
+        await self.flush()
+        logger.info(f"Admin digest stopped: {self.stats}")
+
+    def notify(self, text: str):
+        """Bildirishnomani navbatga qo'yish (kutmaydi)"""
+        self._items.append(text)
+        self.stats["queued"] += 1
+        if self.interval <= 0 or len(self._items) >= self.max_items:
+            self._wakeup.set()
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval or None)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception(f"Admin digest flush failed: {e}")
+
+    def _pack(self, items: List[str]) -> List[str]:
+        """Eventlarni Telegram limitiga sig'adigan xabarlarga bo'lish"""
+        header = f"📬 <b>Новые события: {len(items)}</b>" if len(items) > 1 else ""
+        limit = MESSAGE_LIMIT - len(SEPARATOR) - len(header)
+
+        messages, current = [], header
+        for item in items:
+            if len(item) > limit:
+                item = shorten_html(item, limit)
+            candidate = f"{current}{SEPARATOR}{item}" if current else item
+            if len(candidate) > MESSAGE_LIMIT:
+                messages.append(current)
+                current = item
+            else:
+                current = candidate
+        if current:
+            messages.append(current)
+        return messages
+
+    async def _send(self, admin_id: int, text: str):
+        try:
+            try:
+                await send_engine.send(
+                    admin_id,
+                    partial(self.bot.send_message, admin_id, text, parse_mode="HTML"),
+                )
+            except TelegramBadRequest as e:
+                if "can't parse entities" not in str(e.message).lower():
+                    raise
+                # Buzilgan HTML butun digestni yo'qotmasin - oddiy matn sifatida
+                logger.warning(f"Admin digest HTML rejected, sending as plain text: {e.message}")
+                await send_engine.send(
+                    admin_id,
+                    partial(self.bot.send_message, admin_id, to_plain(text), parse_mode=None),
+                )
+            self.stats["messages"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.warning(f"Failed to notify admin {admin_id}: {e}")
+
+    async def flush(self):
+        items, self._items = self._items, []
+        if not items or self.bot is None:
+            self._items = items + self._items
+            return
+
+        messages = self._pack(items)
+        await asyncio.gather(*(
+            self._send(admin_id, text)
+            for admin_id in self.recipients
+            for text in messages
+        ))
+
+
+admin_notifier = AdminDigestNotifier(
+    recipients=config.SURVEY_NOTIFY_IDS,
+    interval=config.ADMIN_DIGEST_INTERVAL,
+    max_items=config.ADMIN_DIGEST_MAX_ITEMS,
+)
@@ -0,0 +1,114 @@
+import logging
+from typing import Dict
+
+from aiogram import Bot
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.base import BroadcastCampaign
+from keyboards.admin_kb import get_admin_main_keyboard
+from services import outbox
+from utils.helpers import format_time_delta
+from utils.texts import Texts
+
+logger = logging.getLogger(__name__)
+
+# Progress xabarini yangilash oralig'i (sekund)
+BROADCAST_PROGRESS_INTERVAL = 3
+
+# Kampaniya bo'yicha oxirgi ko'rsatilgan "done" - o'zgarmagan progress qayta edit qilinmaydi
+_last_done: Dict[int, int] = {}
+
+
+async def finish_broadcast(bot: Bot, campaign, counts: dict, session: AsyncSession):
+    """Kampaniyani yakunlash; finished_at allaqachon qo'yilgan bo'lsa hech narsa qilmaydi."""
+    duration = (
+        await session.execute(
+            update(BroadcastCampaign)
+            .where(
+                BroadcastCampaign.broadcast_id == campaign.broadcast_id,
+                BroadcastCampaign.finished_at.is_(None),
+            )
+            .values(finished_at=func.now())
+            .returning(BroadcastCampaign.finished_at - BroadcastCampaign.created_at)
+        )
+    ).scalar_one_or_none()
+    await session.commit()
+    if duration is None:
+        return
+
+    total = counts["total"] or 1
+    await bot.edit_message_text(
+        Texts.BROADCAST_COMPLETE.format(
+            sent=counts["sent"],
+            sent_percent=round(counts["sent"] / total * 100, 1),
+            failed=counts["failed"],
+            failed_percent=round(counts["failed"] / total * 100, 1),
+            blocked=counts["blocked"],
+            errors=counts["failed"] - counts["blocked"],
+            duration=format_time_delta(int(duration.total_seconds())),
+        ),
+        chat_id=campaign.progress_chat_id,
+        message_id=campaign.progress_message_id,
+        reply_markup=get_admin_main_keyboard(),
+        parse_mode="HTML",
+    )
+
+
+async def _update_campaign(bot: Bot, campaign, session: AsyncSession):
+    counts = await outbox.broadcast_counts(session, campaign.broadcast_id)
+    if counts["done"] >= counts["total"]:
+        _last_done.pop(campaign.broadcast_id, None)
+        await finish_broadcast(bot, campaign, counts, session)
+        return
+
+    if counts["done"] == _last_done.get(campaign.broadcast_id):
+        return
+    _last_done[campaign.broadcast_id] = counts["done"]
+
+    await bot.edit_message_text(
+        Texts.BROADCAST_PROGRESS.format(
+            percent=int(counts["done"] / counts["total"] * 100),
+            sent=counts["sent"],
+            total=counts["total"],
+            remaining=counts["total"] - counts["done"],
+            failed=counts["failed"],
+        ),
+        chat_id=campaign.progress_chat_id,
+        message_id=campaign.progress_message_id,
+        parse_mode="HTML",
+    )
+
+
+async def update_broadcast_progress(bot: Bot, session: AsyncSession):
+    """
+    Tugamagan rassilkalar progressini admin xabarida yangilash.
+
+    Scheduler job sifatida faqat lider processda ishlaydi: replikalar soni
+    qancha bo'lmasin, har bir yangilanish va yakuniy xabar bir marta yuboriladi;
+    lider almashsa yangi lider kuzatishni o'zi davom ettiradi.
+    """
+    # ORM obyekt emas, qatorlar: bitta kampaniyadagi xato rollback'i qolganlariga ta'sir qilmaydi
+    result = await session.execute(
+        select(
+            BroadcastCampaign.broadcast_id,
+            BroadcastCampaign.progress_chat_id,
+            BroadcastCampaign.progress_message_id,
+        ).where(
+            BroadcastCampaign.finished_at.is_(None),
+            BroadcastCampaign.progress_message_id.is_not(None),
+        )
+    )
+    campaigns = result.all()
+
+    active = {campaign.broadcast_id for campaign in campaigns}
+    for broadcast_id in list(_last_done):
+        if broadcast_id not in active:
+            del _last_done[broadcast_id]
+
+    for campaign in campaigns:
+        try:
+            await _update_campaign(bot, campaign, session)
+        except Exception as e:
+            await session.rollback()
+            logger.warning(f"Broadcast {campaign.broadcast_id} progress update failed: {e}")
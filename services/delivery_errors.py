@@ -0,0 +1,63 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
+
+import aiohttp
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramEntityTooLarge,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+
+# User'ga hech qachon yetib bo'lmaydi (bloklagan, akkaunt o'chirilgan) - user bloklanadi
+PERMANENT = "permanent"
+# Flood control - Telegram aytgan retry_after'dan keyin qayta urinish
+FLOOD = "flood"
+# Tarmoq / 5xx - backoff bilan qayta urinish
+TRANSIENT = "transient"
+# Xabarning o'zi noto'g'ri (file_id, HTML, anketa yo'q) - qayta urinish foyda bermaydi
+INVALID = "invalid"
+
+RETRYABLE = (FLOOD, TRANSIENT)
+
+# BadRequest'lar ichida user'ga tegishli (xabarga emas) xatolar
+_UNREACHABLE_MARKERS = (
+    "chat not found",
+    "user not found",
+    "user is deactivated",
+    "peer_id_invalid",
+    "bot can't initiate conversation",
+)
+
+
+@dataclass(frozen=True)
+class DeliveryFailure:
+    kind: str
+    error: str
+    retry_after: Optional[float] = None
+
+
+def classify_failure(exc: BaseException) -> DeliveryFailure:
+    """Yuborish xatosini turkumlash (outbox retry / dead-letter / blok qarori uchun)."""
+    error = f"{type(exc).__name__}: {exc}"
+
+    if isinstance(exc, TelegramRetryAfter):
+        return DeliveryFailure(FLOOD, error, retry_after=float(exc.retry_after))
+    if isinstance(exc, TelegramForbiddenError):
+        return DeliveryFailure(PERMANENT, error)
+    if isinstance(exc, TelegramBadRequest):
+        message = str(exc.message).lower()
+        if any(marker in message for marker in _UNREACHABLE_MARKERS):
+            return DeliveryFailure(PERMANENT, error)
+        return DeliveryFailure(INVALID, error)
+    if isinstance(exc, TelegramEntityTooLarge):
+        return DeliveryFailure(INVALID, error)
+    if isinstance(exc, (TelegramNetworkError, TelegramServerError, aiohttp.ClientError, asyncio.TimeoutError)):
+        return DeliveryFailure(TRANSIENT, error)
+    if isinstance(exc, (ValueError, KeyError)):
+        return DeliveryFailure(INVALID, error)
+    # Noma'lum xatolar - cheklangan urinishlar bilan qayta
+    return DeliveryFailure(TRANSIENT, error)
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Telegram xabar limitiga kiradigan metodlar (sendChatAction bundan mustasno)
+_EXTRA_GOVERNED = {"copyMessage", "copyMessages", "forwardMessage", "forwardMessages"}
+
+# Fon (ommaviy) yuborishlar: send engine worker'lari True qiladi. Qolganlari -
+# handler javoblari (message.answer va h.k.) - interaktiv hisoblanadi
+bulk_send: ContextVar[bool] = ContextVar("bulk_send", default=False)
+
+
+class TokenBucket:
+    """Token bucket: sekundiga `rate` token, `capacity` gacha yig'iladi."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: float):
+        self._refill()
+        self.rate = rate
+        self.capacity = max(rate, 1.0)
+        self._tokens = min(self._tokens, self.capacity)
+
+    def take(self):
+        """Kutmasdan token olish; yetmasa qarz (acquire qiluvchilar to'laydi)."""
+        self._refill()
+        self._tokens = max(self._tokens - 1, -self.capacity)
+
+    async def acquire(self):
+        # Lock navbatni FIFO qiladi: kutayotganlar kelgan tartibda token oladi
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class FloodGovernor(BaseRequestMiddleware):
+    """
+    Bot API yuborishlari uchun adaptiv global limit (AIMD).
+
+    Bot session'ining request middleware'i sifatida barcha yo'llar (handlerlar,
+    outbox, admin bildirishnomalari) uchun umumiy. Har muvaffaqiyatli yuborish
+    tezlikni sekundiga ~`increase` ga oshiradi; 429 (TelegramRetryAfter) tezlikni
+    `decrease` marta kamaytiradi va retry_after davomida barcha yuborishlarni
+    to'xtatadi; javob `latency_threshold`dan sekin bo'lsa tezlik biroz pasayadi.
+
+    Navbat va 429 pauzasi faqat fon yuborishlariga (`bulk_send`) tegishli:
+    handler javoblari kutmasdan tokenni qarzga oladi, qarzni ommaviy yuborishlar
+    sekinlashib to'laydi - rassilka paytida ham /start darhol javob beradi.
+
+    Limit process ichida: bir nechta process yuborsa SEND_GLOBAL_RATE ular
+    orasida SEND_PROCESSES bo'yicha bo'linadi (config).
+    """
+
+    def __init__(
+        self,
+        max_rate: float,
+        min_rate: float,
+        increase: float,
+        decrease: float,
+        latency_threshold: float,
+    ):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_threshold = latency_threshold
+        self.bucket = TokenBucket(max_rate)
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self.stats = {"requests": 0, "interactive": 0, "flood_waits": 0, "slow": 0}
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    @staticmethod
+    def governs(method: TelegramMethod) -> bool:
+        name = method.__api_method__
+        return (name.startswith("send") and name != "sendChatAction") or name in _EXTRA_GOVERNED
+
+    def _set_rate(self, rate: float):
+        self.bucket.set_rate(min(self.max_rate, max(self.min_rate, rate)))
+
+    def _decrease(self, factor: float, now: float) -> bool:
+        # Parallel so'rovlardan kelgan bir nechta signal - bitta pasaytirish
+        if now - self._last_decrease < 1.0:
+            return False
+        self._last_decrease = now
+        self._set_rate(self.rate * factor)
+        return True
+
+    def on_success(self, latency: float):
+        self.stats["requests"] += 1
+        if self.latency_threshold and latency > self.latency_threshold:
+            self.stats["slow"] += 1
+            self._decrease(0.9, time.monotonic())
+        elif self.rate < self.max_rate:
+            self._set_rate(self.rate + self.increase / self.rate)
+
+    def on_flood(self, retry_after: float):
+        now = time.monotonic()
+        self.stats["flood_waits"] += 1
+        self._paused_until = max(self._paused_until, now + retry_after)
+        if self._decrease(self.decrease, now):
+            logger.warning(f"Flood control: retry after {retry_after}s, send rate -> {self.rate:.1f}/s")
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if not self.governs(method):
+            return await make_request(bot, method)
+
+        if bulk_send.get():
+            delay = self._paused_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.bucket.acquire()
+        else:
+            self.stats["interactive"] += 1
+            self.bucket.take()
+
+        started = time.monotonic()
+        try:
+            response = await make_request(bot, method)
+        except TelegramRetryAfter as e:
+            self.on_flood(e.retry_after)
+            raise
+        self.on_success(time.monotonic() - started)
+        return response
+
+
+flood_governor = FloodGovernor(
+    max_rate=config.SEND_GLOBAL_RATE / max(1, config.SEND_PROCESSES),
+    min_rate=config.SEND_MIN_RATE,
+    increase=config.SEND_RATE_INCREASE,
+    decrease=config.SEND_RATE_DECREASE,
+    latency_threshold=config.SEND_LATENCY_THRESHOLD,
+)
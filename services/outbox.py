@@ -0,0 +1,477 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import (
+    select, update, delete, insert, func, or_, and_, literal, literal_column, tuple_, bindparam, Float
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import config
+from database.base import DeliveryOutbox, DeliveryDeadLetter, UserProgress, User, SchedulePost
+from database.crud import delete_in_batches
+from services.delivery_errors import DeliveryFailure, PERMANENT, RETRYABLE
+
+logger = logging.getLogger(__name__)
+
+KIND_POST = "post"
+KIND_BROADCAST = "broadcast"
+# Post'ga bog'lanmagan xizmat xabari: /start'dan keyingi obuna so'rovi
+KIND_SUBSCRIBE_REQUEST = "subscribe_request"
+
+# claim_batch priority DESC bo'yicha oladi: user harakatiga javob (/start obuna
+# so'rovi, launch ketma-ketligi) minglab rassilka qatorlari ortida qolmaydi
+PRIORITY_BULK = 0
+PRIORITY_INTERACTIVE = 1
+
+# Yangi qatorlar haqida workerlarni uyg'otish (LISTEN/NOTIFY kanali)
+NOTIFY_CHANNEL = "delivery_outbox"
+
+
+async def notify_workers(session: AsyncSession) -> None:
+    """NOTIFY tranzaksiya commit bo'lganda yetkaziladi - worker darhol claim qiladi."""
+    await session.execute(select(func.pg_notify(NOTIFY_CHANNEL, "")))
+
+
+async def enqueue_posts(session: AsyncSession, pairs: Sequence[Tuple[int, int]]) -> None:
+    """(user_id, post_id) juftliklarini darhol yuborish uchun navbatga qo'yish."""
+    if not pairs:
+        return
+    await session.execute(
+        pg_insert(DeliveryOutbox)
+        .values([
+            {"user_id": user_id, "post_id": post_id, "kind": KIND_POST}
+            for user_id, post_id in pairs
+        ])
+        .on_conflict_do_nothing()
+    )
+    await notify_workers(session)
+
+
+async def enqueue_post_sequence(
+    session: AsyncSession,
+    user_id: int,
+    posts: Iterable[SchedulePost],
+    start_delay: int = 0,
+    priority: int = PRIORITY_BULK,
+) -> int:
+    """Postlarni delay_seconds bo'yicha yig'ma kechikish bilan navbatga qo'yish.
+
+    Kechikish `available_at` ga yoziladi - hech qanday coroutine uxlab turmaydi,
+    navbatdagi qadamlar restartdan keyin ham saqlanadi.
+    """
+    rows = []
+    offset = start_delay
+    for post in posts:
+        offset += post.delay_seconds or 0
+        rows.append({
+            "user_id": user_id,
+            "post_id": post.post_id,
+            "kind": KIND_POST,
+            "priority": priority,
+            "available_at": func.now() + timedelta(seconds=offset),
+        })
+
+    if rows:
+        await session.execute(pg_insert(DeliveryOutbox).values(rows).on_conflict_do_nothing())
+        await notify_workers(session)
+    return len(rows)
+
+
+async def enqueue_message(
+    session: AsyncSession,
+    user_id: int,
+    kind: str,
+    delay_seconds: int = 0,
+    priority: int = PRIORITY_INTERACTIVE,
+) -> None:
+    """Xizmat xabarini (masalan, KIND_SUBSCRIBE_REQUEST) kechiktirib navbatga qo'yish."""
+    await session.execute(
+        insert(DeliveryOutbox).values(
+            user_id=user_id,
+            kind=kind,
+            priority=priority,
+            available_at=func.now() + timedelta(seconds=delay_seconds),
+        )
+    )
+    await notify_workers(session)
+
+
+async def enqueue_broadcast(session: AsyncSession, broadcast_id: int, user_filter) -> int:
+    """Rassilka qatorlarini bitta INSERT ... SELECT bilan yaratish."""
+    source = select(User.user_id, literal(KIND_BROADCAST), literal(broadcast_id))
+    if user_filter is not None:
+        source = source.where(user_filter)
+
+    result = await session.execute(
+        insert(DeliveryOutbox).from_select(["user_id", "kind", "broadcast_id"], source)
+    )
+    await notify_workers(session)
+    return result.rowcount or 0
+
+
+async def seconds_until_next(session: AsyncSession) -> Optional[float]:
+    """Eng yaqin `pending` qatorgacha qolgan vaqt (sekund, idx_outbox_ready bo'yicha); bo'sh bo'lsa None."""
+    result = await session.execute(
+        select(func.extract("epoch", func.min(DeliveryOutbox.available_at) - func.now()))
+        .where(DeliveryOutbox.status == "pending")
+    )
+    seconds = result.scalar()
+    return float(seconds) if seconds is not None else None
+
+
+async def claim_batch(session: AsyncSession, batch_size: int, lease_seconds: int) -> List:
+    """Tayyor qatorlarni lease qilib olish.
+
+    Avval yuqori priority, so'ng eng eski `available_at` olinadi. Boshqa worker
+    band qilgan qatorlar SKIP LOCKED bilan o'tkazib yuboriladi;
+    lease muddati tugagan `processing` qatorlar (worker yiqilgan) qayta olinadi.
+    Har qatorda `locked_until` qaytadi - batch'ning lease qiymati (fencing token):
+    keyingi barcha status yozuvlari shu qiymat bilan tekshiriladi.
+    """
+    now = func.now()
+    ready = (
+        select(DeliveryOutbox.outbox_id)
+        .where(
+            or_(
+                and_(DeliveryOutbox.status == "pending", DeliveryOutbox.available_at <= now),
+                and_(DeliveryOutbox.status == "processing", DeliveryOutbox.locked_until < now),
+            )
+        )
+        .order_by(DeliveryOutbox.priority.desc(), DeliveryOutbox.available_at, DeliveryOutbox.outbox_id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+    result = await session.execute(
+        update(DeliveryOutbox)
+        .where(DeliveryOutbox.outbox_id.in_(ready.scalar_subquery()))
+        .values(
+            status="processing",
+            locked_until=now + timedelta(seconds=lease_seconds),
+            attempts=DeliveryOutbox.attempts + 1,
+        )
+        .returning(
+            DeliveryOutbox.outbox_id,
+            DeliveryOutbox.user_id,
+            DeliveryOutbox.kind,
+            DeliveryOutbox.post_id,
+            DeliveryOutbox.broadcast_id,
+            DeliveryOutbox.attempts,
+            DeliveryOutbox.locked_until,
+            DeliveryOutbox.priority,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    # RETURNING tartibi kafolatlanmagan - batch ichida ham interaktivlar birinchi
+    return sorted(result.all(), key=lambda row: (-row.priority, row.outbox_id))
+
+
+def _leased(lease: datetime):
+    """Qator hali shu lease bilan band (boshqa worker qayta olmagan)."""
+    return and_(DeliveryOutbox.status == "processing", DeliveryOutbox.locked_until == lease)
+
+
+async def extend_lease(
+    session: AsyncSession,
+    outbox_ids: Iterable[int],
+    lease: datetime,
+    lease_seconds: int,
+) -> Tuple[Optional[datetime], Set[int]]:
+    """Batch lease'ini uzaytirish (heartbeat).
+
+    Faqat hali `lease` bilan band qatorlar uzaytiriladi. Qaytaradi: (yangi lease,
+    saqlab qolingan outbox_id'lar); hech biri qolmagan bo'lsa (None, set()).
+    """
+    ids = list(outbox_ids)
+    if not ids:
+        return None, set()
+    result = await session.execute(
+        update(DeliveryOutbox)
+        .where(DeliveryOutbox.outbox_id.in_(ids), _leased(lease))
+        .values(locked_until=func.now() + timedelta(seconds=lease_seconds))
+        .returning(DeliveryOutbox.outbox_id, DeliveryOutbox.locked_until)
+        .execution_options(synchronize_session=False)
+    )
+    rows = result.all()
+    if not rows:
+        return None, set()
+    return rows[0].locked_until, {row.outbox_id for row in rows}
+
+
+async def _lock_owned(session: AsyncSession, outbox_ids: Sequence[int], lease: datetime) -> Set[int]:
+    """Natija yozishdan oldin hali bizga tegishli qatorlarni lock qilish."""
+    if not outbox_ids:
+        return set()
+    result = await session.execute(
+        select(DeliveryOutbox.outbox_id)
+        .where(DeliveryOutbox.outbox_id.in_(outbox_ids), _leased(lease))
+        .with_for_update()
+    )
+    return set(result.scalars().all())
+
+
+async def claim_deliveries(session: AsyncSession, rows: Sequence) -> Set[int]:
+    """Post yuborishlarini user_progress'da oldindan band qilish.
+
+    `INSERT ... ON CONFLICT (user_id, post_id) DO NOTHING RETURNING` faqat hali
+    hech kim yubormagan juftliklarni qaytaradi - ikki tick/worker ustma-ust
+    tushsa ham bitta post userga ikki marta ketmaydi. Qaytaradi: yuborish
+    mumkin bo'lgan outbox_id'lar.
+    """
+    post_rows = [row for row in rows if row.kind == KIND_POST]
+    allowed = {row.outbox_id for row in rows if row.kind != KIND_POST}
+    if not post_rows:
+        return allowed
+
+    # Eski "sending" band qilish faqat shu qatorning oldingi (muddati tugagan) lease'idan
+    # qolgan bo'lishi mumkin: uq_outbox_pending_post bo'yicha juftlikning boshqa tirik
+    # qatori yo'q, qator esa hozir bizda - demak uni bo'shatish xavfsiz
+    pairs = [(row.user_id, row.post_id) for row in post_rows]
+    await session.execute(
+        delete(UserProgress)
+        .where(
+            tuple_(UserProgress.user_id, UserProgress.post_id).in_(pairs),
+            UserProgress.status == "sending",
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    result = await session.execute(
+        pg_insert(UserProgress)
+        .values([
+            {"user_id": row.user_id, "post_id": row.post_id, "status": "sending"}
+            for row in post_rows
+        ])
+        .on_conflict_do_nothing(index_elements=["user_id", "post_id"])
+        .returning(UserProgress.user_id, UserProgress.post_id)
+    )
+    claimed = {(user_id, post_id) for user_id, post_id in result.all()}
+
+    allowed.update(row.outbox_id for row in post_rows if (row.user_id, row.post_id) in claimed)
+    return allowed
+
+
+def retry_delay(attempts: int, failure: DeliveryFailure) -> float:
+    """Qayta urinishgacha kechikish: flood'da Telegram aytgan retry_after, aks holda eksponensial backoff."""
+    if failure.retry_after is not None:
+        return max(failure.retry_after, 1.0)
+    return min(
+        config.OUTBOX_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0),
+        config.OUTBOX_RETRY_MAX_SECONDS,
+    )
+
+
+async def _reschedule(
+    session: AsyncSession,
+    retries: Sequence[Tuple[object, DeliveryFailure]],
+    lease: datetime,
+) -> None:
+    table = DeliveryOutbox.__table__
+    await session.execute(
+        update(table)
+        .where(
+            table.c.outbox_id == bindparam("b_outbox_id"),
+            table.c.status == "processing",
+            table.c.locked_until == bindparam("b_lease"),
+        )
+        .values(
+            status="pending",
+            locked_until=None,
+            available_at=func.now() + bindparam("b_delay", type_=Float) * literal_column("INTERVAL '1 second'"),
+            last_error=bindparam("b_error"),
+        ),
+        [
+            {
+                "b_outbox_id": row.outbox_id,
+                "b_delay": retry_delay(row.attempts, failure),
+                "b_error": failure.error[:1000],
+                "b_lease": lease,
+            }
+            for row, failure in retries
+        ],
+    )
+
+
+async def _mark_unreachable(session: AsyncSession, user_ids: Set[int]) -> None:
+    """Bloklagan/o'chirilgan userlar: flaglar + navbatdagi boshqa yuborishlarini bekor qilish."""
+    await session.execute(
+        update(User)
+        .where(User.user_id.in_(user_ids))
+        # onupdate last_activity'ni yangilamasin - bu user faolligi emas
+        .values(is_blocked=True, is_active=False, last_activity=User.last_activity)
+        .execution_options(synchronize_session=False)
+    )
+    await session.execute(
+        update(DeliveryOutbox)
+        .where(DeliveryOutbox.user_id.in_(user_ids), DeliveryOutbox.status == "pending")
+        .values(status="skipped", last_error="user unreachable")
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def complete_batch(
+    session: AsyncSession,
+    lease: datetime,
+    delivered: Sequence,
+    failed: Sequence[Tuple[object, DeliveryFailure]],
+    skipped: Sequence = (),
+    subscription_checked_users: Iterable[int] = (),
+    max_attempts: int = 5,
+) -> None:
+    """Natijalarni yozish: outbox statuslari va UserProgress bitta tranzaksiyada.
+
+    Xatolar turiga qarab: flood/transient - backoff bilan qayta navbatga,
+    permanent - user bloklangan deb belgilanadi, qolganlari (va urinishlari
+    tugaganlari) - `failed` + dead-letter.
+
+    Faqat hali `lease` bilan band qatorlar yoziladi: lease'i tugab boshqa
+    worker olgan qatorlarga (va ularning UserProgress'iga) tegilmaydi.
+    """
+    batch_ids = [row.outbox_id for row in delivered]
+    batch_ids += [row.outbox_id for row, _ in failed]
+    batch_ids += [row.outbox_id for row in skipped]
+    owned = await _lock_owned(session, batch_ids, lease)
+    lost = len(batch_ids) - len(owned)
+    if lost:
+        logger.warning(f"Outbox lease lost for {lost} rows; leaving them to the new owner")
+    delivered = [row for row in delivered if row.outbox_id in owned]
+    failed = [(row, failure) for row, failure in failed if row.outbox_id in owned]
+    skipped = [row for row in skipped if row.outbox_id in owned]
+
+    if delivered:
+        await session.execute(
+            update(DeliveryOutbox)
+            .where(DeliveryOutbox.outbox_id.in_([row.outbox_id for row in delivered]), _leased(lease))
+            .values(status="sent", sent_at=func.now(), locked_until=None, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        pairs = [(row.user_id, row.post_id) for row in delivered if row.kind == KIND_POST]
+        if pairs:
+            await session.execute(
+                update(UserProgress)
+                .where(tuple_(UserProgress.user_id, UserProgress.post_id).in_(pairs))
+                .values(status="sent")
+                .execution_options(synchronize_session=False)
+            )
+
+    if failed:
+        retries = [
+            (row, failure) for row, failure in failed
+            if failure.kind in RETRYABLE and row.attempts < max_attempts
+        ]
+        retry_ids = {row.outbox_id for row, _ in retries}
+        final = [(row, failure) for row, failure in failed if row.outbox_id not in retry_ids]
+
+        if retries:
+            await _reschedule(session, retries, lease)
+
+        if final:
+            table = DeliveryOutbox.__table__
+            await session.execute(
+                update(table)
+                .where(
+                    table.c.outbox_id == bindparam("b_outbox_id"),
+                    table.c.status == "processing",
+                    table.c.locked_until == bindparam("b_lease"),
+                )
+                .values(status="failed", locked_until=None, last_error=bindparam("b_error")),
+                [
+                    {"b_outbox_id": row.outbox_id, "b_lease": lease, "b_error": failure.error[:1000]}
+                    for row, failure in final
+                ],
+            )
+            dead = [(row, failure) for row, failure in final if failure.kind != PERMANENT]
+            if dead:
+                await session.execute(
+                    insert(DeliveryDeadLetter),
+                    [
+                        {
+                            "outbox_id": row.outbox_id,
+                            "user_id": row.user_id,
+                            "kind": row.kind,
+                            "post_id": row.post_id,
+                            "broadcast_id": row.broadcast_id,
+                            "attempts": row.attempts,
+                            "error_kind": failure.kind,
+                            "last_error": failure.error[:1000],
+                        }
+                        for row, failure in dead
+                    ],
+                )
+
+        unreachable = {row.user_id for row, failure in failed if failure.kind == PERMANENT}
+        if unreachable:
+            await _mark_unreachable(session, unreachable)
+
+        # Yuborilmagan postlarning band qilinishini qaytarish (retry yoki keyingi rejalashtirish uchun)
+        pairs = [(row.user_id, row.post_id) for row, _ in failed if row.kind == KIND_POST]
+        if pairs:
+            await session.execute(
+                delete(UserProgress)
+                .where(
+                    tuple_(UserProgress.user_id, UserProgress.post_id).in_(pairs),
+                    UserProgress.status == "sending",
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+    if skipped:
+        await session.execute(
+            update(DeliveryOutbox)
+            .where(DeliveryOutbox.outbox_id.in_([row.outbox_id for row in skipped]), _leased(lease))
+            .values(status="skipped", locked_until=None)
+            .execution_options(synchronize_session=False)
+        )
+
+    user_ids = set(subscription_checked_users) & {row.user_id for row in delivered}
+    if user_ids:
+        await session.execute(
+            update(User)
+            .where(User.user_id.in_(user_ids))
+            .values(subscription_checked=True)
+            .execution_options(synchronize_session=False)
+        )
+
+    await session.commit()
+
+
+async def broadcast_counts(session: AsyncSession, broadcast_id: int) -> dict:
+    """Rassilka bo'yicha statuslar soni (progress xabari uchun)."""
+    result = await session.execute(
+        select(
+            func.count().label("total"),
+            func.count().filter(DeliveryOutbox.status == "sent").label("sent"),
+            # skipped - bloklangani aniqlangan user'ning bekor qilingan qatorlari
+            func.count().filter(DeliveryOutbox.status.in_(("failed", "skipped"))).label("failed"),
+            func.count().filter(
+                or_(
+                    DeliveryOutbox.status == "skipped",
+                    and_(
+                        DeliveryOutbox.status == "failed",
+                        DeliveryOutbox.last_error.like("TelegramForbiddenError%"),
+                    ),
+                )
+            ).label("blocked"),
+        ).where(DeliveryOutbox.broadcast_id == broadcast_id)
+    )
+    row = result.one()
+    return {
+        "total": row.total,
+        "sent": row.sent,
+        "failed": row.failed,
+        "blocked": row.blocked,
+        "done": row.sent + row.failed,
+    }
+
+
+async def purge_finished(session: AsyncSession, older_than_days: int, batch_size: int = 5000) -> int:
+    """Eski yakunlangan (`sent`/`failed`/`skipped`) qatorlarni batch'lab tozalash."""
+    return await delete_in_batches(
+        session,
+        DeliveryOutbox,
+        DeliveryOutbox.status.in_(("sent", "failed", "skipped")),
+        DeliveryOutbox.created_at < func.now() - timedelta(days=older_than_days),
+        batch_size=batch_size,
+    )
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List
+
+from config import config
+from services.flood_governor import bulk_send
+
+logger = logging.getLogger(__name__)
+
+SendFactory = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class _SendJob:
+    chat_id: int
+    factory: SendFactory
+    future: asyncio.Future
+
+
+class SendEngine:
+    """
+    Bot API yuborishlari uchun umumiy engine.
+
+    Joblar cheklangan navbatga tushadi va `workers` ta worker ularni bajaradi.
+    Har bir yuborishdan oldin chat bo'yicha interval (~1 msg/s) kutiladi;
+    global limitni bot session'idagi FloodGovernor boshqaradi (bulk sifatida -
+    handler javoblari bu yuborishlardan oldin o'tadi).
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        per_chat_rate: float,
+        queue_size: int,
+    ):
+        self.workers = workers
+        self.per_chat_interval = 1 / per_chat_rate if per_chat_rate > 0 else 0.0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._chat_next: Dict[int, float] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        if self.running:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"send-engine-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Send engine started with {self.workers} workers")
+
+    async def stop(self):
+        if not self.running:
+            return
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            job.future.cancel()
+        logger.info("Send engine stopped")
+
+    async def submit(self, chat_id: int, factory: SendFactory) -> asyncio.Future:
+        """Jobni navbatga qo'yish. Navbat to'la bo'lsa joy bo'shaguncha kutadi."""
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_SendJob(chat_id, factory, future))
+        return future
+
+    async def send(self, chat_id: int, factory: SendFactory) -> Any:
+        """Jobni navbatga qo'yib, natijasini kutish."""
+        return await (await self.submit(chat_id, factory))
+
+    async def _wait_for_chat(self, chat_id: int):
+        if not self.per_chat_interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._chat_next.get(chat_id, 0.0))
+        self._chat_next[chat_id] = slot + self.per_chat_interval
+
+        if len(self._chat_next) > 10_000:
+            self._chat_next = {k: v for k, v in self._chat_next.items() if v > now}
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _worker(self, index: int):
+        # Task o'z context'ida: shu worker orqali ketgan barcha yuborishlar - fon (bulk)
+        bulk_send.set(True)
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.future.cancelled():
+                    continue
+                await self._wait_for_chat(job.chat_id)
+                try:
+                    result = await job.factory()
+                except Exception as e:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    if not job.future.done():
+                        job.future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+
+send_engine = SendEngine(
+    workers=config.SEND_WORKERS,
+    per_chat_rate=config.SEND_PER_CHAT_RATE,
+    queue_size=config.SEND_QUEUE_SIZE,
+)
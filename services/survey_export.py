@@ -0,0 +1,164 @@
+import csv
+import io
+from tempfile import SpooledTemporaryFile
+from typing import AsyncGenerator, Dict, List, Optional, Sequence, Tuple
+
+from aiogram import Bot
+from aiogram.types import InputFile
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import config
+from database.base import SurveyQuestion, SurveyResponse, SurveyAnswer, User
+
+FORMAT_CSV = "csv"
+FORMAT_XLSX = "xlsx"
+FORMATS = (FORMAT_CSV, FORMAT_XLSX)
+
+
+class SpooledInputFile(InputFile):
+    """Vaqtinchalik fayldan (xotira yoki disk) bo'laklab yuklanadigan InputFile."""
+
+    def __init__(self, file, filename: str):
+        super().__init__(filename=filename)
+        self.file = file
+
+    async def read(self, bot: Bot) -> AsyncGenerator[bytes, None]:
+        self.file.seek(0)
+        while chunk := self.file.read(self.chunk_size):
+            yield chunk
+
+    def close(self):
+        self.file.close()
+
+
+class _CsvSink:
+    def __init__(self, file):
+        # utf-8-sig - Excel kirillitsani to'g'ri ochishi uchun
+        self._text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._text)
+
+    def write(self, row: Sequence):
+        self._writer.writerow(row)
+
+    def close(self):
+        self._text.flush()
+        self._text.detach()
+
+
+class _XlsxSink:
+    def __init__(self, file):
+        from openpyxl import Workbook  # ixtiyoriy dependency
+
+        self._file = file
+        # write_only - qatorlar xotirada to'planmaydi
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("Ответы")
+
+    def write(self, row: Sequence):
+        self._sheet.append(list(row))
+
+    def close(self):
+        self._workbook.save(self._file)
+
+
+def _export_query(survey_id: int):
+    """Javoblar + user + answerlar bitta LEFT JOIN bilan, response bo'yicha tartiblangan."""
+    return (
+        select(
+            SurveyResponse.response_id,
+            SurveyResponse.user_id,
+            SurveyResponse.completed_at,
+            User.username,
+            User.first_name,
+            SurveyAnswer.question_id,
+            SurveyAnswer.answer_text,
+        )
+        .select_from(SurveyResponse)
+        .outerjoin(User, User.user_id == SurveyResponse.user_id)
+        .outerjoin(SurveyAnswer, SurveyAnswer.response_id == SurveyResponse.response_id)
+        .where(
+            SurveyResponse.survey_id == survey_id,
+            SurveyResponse.is_completed == True,
+        )
+        .order_by(SurveyResponse.completed_at, SurveyResponse.response_id, SurveyAnswer.answer_id)
+        .execution_options(yield_per=config.EXPORT_FETCH_SIZE)
+    )
+
+
+async def build_survey_export(
+    session: AsyncSession,
+    survey_id: int,
+    questions: List[SurveyQuestion],
+    fmt: str = FORMAT_CSV,
+) -> Tuple[Optional[SpooledInputFile], int]:
+    """
+    Anketa javoblarini CSV/XLSX faylga yozish.
+
+    Natija server-side cursor bilan oqim ko'rinishida o'qiladi va bitta o'tishda
+    (response -> qator) pivot qilinadi; fayl EXPORT_SPOOL_MAX_BYTES'dan oshsa
+    diskka tushadi. Qaytaradi: (fayl, javoblar soni); javob bo'lmasa (None, 0).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    spool = SpooledTemporaryFile(max_size=config.EXPORT_SPOOL_MAX_BYTES, mode="w+b")
+    try:
+        sink = _XlsxSink(spool) if fmt == FORMAT_XLSX else _CsvSink(spool)
+        count = await _write_rows(session, sink, survey_id, questions)
+        sink.close()
+    except BaseException:
+        # ImportError (openpyxl), DB/stream xatosi yoki bekor qilish - fayl oqib ketmasin
+        spool.close()
+        raise
+
+    if not count:
+        spool.close()
+        return None, 0
+
+    return SpooledInputFile(spool, filename=f"survey_{survey_id}_responses.{fmt}"), count
+
+
+async def _write_rows(session: AsyncSession, sink, survey_id: int, questions: List[SurveyQuestion]) -> int:
+    """Sarlavha + har bir response uchun bitta qator (pivot). Qaytaradi: javoblar soni."""
+    headers = ["User ID", "Username", "Имя", "Дата завершения"]
+    headers += [q.question_text[:50] for q in questions]
+    sink.write(headers)
+
+    columns = {q.question_id: index for index, q in enumerate(questions)}
+    current_id = None
+    current_row: List = []
+    answers: Dict[int, str] = {}
+    count = 0
+
+    def flush():
+        row = current_row + [""] * len(questions)
+        for index, text in answers.items():
+            row[4 + index] = text
+        sink.write(row)
+
+    result = await session.stream(_export_query(survey_id))
+    try:
+        async for row in result:
+            if row.response_id != current_id:
+                if current_id is not None:
+                    flush()
+                current_id = row.response_id
+                current_row = [
+                    row.user_id,
+                    row.username or "",
+                    row.first_name or "",
+                    row.completed_at.strftime("%d.%m.%Y %H:%M") if row.completed_at else "",
+                ]
+                answers = {}
+                count += 1
+
+            index = columns.get(row.question_id)
+            if index is not None:
+                answers[index] = row.answer_text or ""
+    finally:
+        await result.close()
+
+    if current_id is not None:
+        flush()
+    return count
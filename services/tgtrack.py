@@ -1,32 +1,143 @@
+import asyncio
 import aiohttp
 import logging
+from typing import List, Optional, Tuple
 from aiogram.types import Message
 from config import config
 
+logger = logging.getLogger(__name__)
+
+
+class TgTrackEmitter:
+    """
+    TGTrack eventlarini fonda yuboruvchi emitter.
+
+    Bitta uzoq yashovchi ClientSession (connection pool, TLS qayta ishlatiladi),
+    cheklangan navbat va retry/backoff. Navbat to'lsa event tashlab yuboriladi
+    (`dropped` hisoblagichi) - user yo'li hech qachon TGTrack'ni kutmaydi.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        queue_size: int,
+        workers: int,
+        max_retries: int,
+        timeout: float,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.workers = workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {"sent": 0, "failed": 0, "retried": 0, "dropped": 0}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        if self.running:
+            return
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.workers),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"tgtrack-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"TGTrack emitter started with {self.workers} workers")
+
+    async def stop(self, drain_timeout: float = 5.0):
+        if not self.running:
+            return
+        # Navbatdagi eventlarni qisqa vaqt ichida yuborib ulgurishga harakat
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"TGTrack emitter stopped with {self._queue.qsize()} events pending")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        await self._session.close()
+        self._session = None
+        logger.info(f"TGTrack emitter stopped: {self.stats}")
+
+    async def emit(self, method: str, payload: dict) -> bool:
+        """Eventni navbatga qo'yish (kutmaydi). Qaytaradi: navbatga tushdimi."""
+        if not config.TGTRACK:
+            return False
+        await self.start()
+        try:
+            self._queue.put_nowait((method, payload))
+            return True
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logger.warning(f"TGTrack queue full, dropped {method} (total dropped: {self.stats['dropped']})")
+            return False
+
+    async def _post(self, method: str, payload: dict) -> Tuple[bool, bool]:
+        """Bitta so'rov. Qaytaradi: (muvaffaqiyatli, qayta urinish kerakmi)."""
+        url = f"{self.base_url}/{config.TGTRACK}/{method}"
+        try:
+            async with self._session.post(url, json=payload) as resp:
+                if resp.status == 200:
+                    return True, False
+                logger.error("TGTrack %s error %s: %s", method, resp.status, await resp.text())
+                return False, resp.status == 429 or resp.status >= 500
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning("TGTrack %s request failed: %s", method, e)
+            return False, True
+
+    async def _worker(self):
+        while True:
+            method, payload = await self._queue.get()
+            try:
+                for attempt in range(self.max_retries + 1):
+                    ok, retry = await self._post(method, payload)
+                    if ok:
+                        self.stats["sent"] += 1
+                        break
+                    if not retry or attempt == self.max_retries:
+                        self.stats["failed"] += 1
+                        break
+                    self.stats["retried"] += 1
+                    await asyncio.sleep(min(2 ** attempt, 30))
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.exception(f"TGTrack {method} unexpected error: {e}")
+            finally:
+                self._queue.task_done()
+
+
+tgtrack_emitter = TgTrackEmitter(
+    base_url=config.TGTRACK_BASE_URL,
+    queue_size=config.TGTRACK_QUEUE_SIZE,
+    workers=config.TGTRACK_WORKERS,
+    max_retries=config.TGTRACK_MAX_RETRIES,
+    timeout=config.TGTRACK_TIMEOUT,
+)
+
 
 class TgTrackService:
 
     @staticmethod
     async def send_goal(user_id: int, target: str):
-        url = f"https://bot-api.tgtrack.ru/v1/{config.TGTRACK}/send_reach_goal"
-
         payload = {
             "user_id": str(user_id),
             "target": target
         }
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload) as resp:
-                if resp.status != 200:
-                    logging.error(
-                        "TGTrack send_reach_goal error: %s",
-                        await resp.text()
-                    )
+        await tgtrack_emitter.emit("send_reach_goal", payload)
 
     @staticmethod
     async def send_start_to_tgtrack(message: Message):
-        url = f"https://bot-api.tgtrack.ru/v1/{config.TGTRACK}/user_did_start_bot"
-
         start_value = ""
         if message.text:
             parts = message.text.split(maxsplit=1)
@@ -41,10 +152,4 @@ class TgTrackService:
             "start_value": start_value
         }
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload) as resp:
-                if resp.status != 200:
-                    logging.error(
-                        "TGTrack user_did_start_bot error: %s",
-                        await resp.text()
-                    )
+        await tgtrack_emitter.emit("user_did_start_bot", payload)
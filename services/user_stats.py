@@ -0,0 +1,143 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.base import User, DailyUserStats
+
+TREND_DAYS = 7
+
+
+async def collect_user_stats(session: AsyncSession) -> dict:
+    """users bo'yicha barcha hisoblagichlar bitta FILTER-agregat query bilan (+ voronka)."""
+    today = func.current_date()
+    row = (
+        await session.execute(
+            select(
+                today.label("stat_date"),
+                func.count().label("total"),
+                func.count().filter(User.is_active == True, User.is_blocked == False).label("active"),
+                func.count().filter(User.is_blocked == True).label("blocked"),
+                func.count().filter(User.is_subscribed == True).label("subscribed"),
+                func.count().filter(User.start_date >= today).label("today_new"),
+                func.count().filter(
+                    User.start_date >= text("CURRENT_DATE - INTERVAL '1 day'"),
+                    User.start_date < today,
+                ).label("yesterday_new"),
+                func.count().filter(User.start_date < today).label("before_today"),
+            ).select_from(User)
+        )
+    ).one()
+
+    funnel_result = await session.execute(
+        select(User.current_day, func.count(User.user_id))
+        .where(
+            User.is_subscribed == True,
+            User.is_blocked == False,
+        )
+        .group_by(User.current_day)
+        .order_by(User.current_day)
+    )
+
+    return {
+        "stat_date": row.stat_date,
+        "total": row.total,
+        "active": row.active,
+        "blocked": row.blocked,
+        "subscribed": row.subscribed,
+        "today_new": row.today_new,
+        "yesterday_new": row.yesterday_new,
+        "before_today": row.before_today,
+        "funnel": {str(day): count for day, count in funnel_result.all()},
+    }
+
+
+async def refresh_daily_stats(session: AsyncSession) -> dict:
+    """
+    Joriy kun rollup qatorini yangilash (scheduler job).
+
+    Kechagi qatorning new_users'i ham yakuniy qiymatga keltiriladi - oxirgi
+    refresh'dan yarim tungacha kelgan userlar yo'qolmaydi.
+    """
+    stats = await collect_user_stats(session)
+    today: date = stats["stat_date"]
+
+    await session.execute(
+        pg_insert(DailyUserStats)
+        .values(
+            stat_date=today - timedelta(days=1),
+            new_users=stats["yesterday_new"],
+            total_users=stats["before_today"],
+        )
+        .on_conflict_do_update(
+            index_elements=[DailyUserStats.stat_date],
+            set_={"new_users": stats["yesterday_new"], "updated_at": func.now()},
+        )
+    )
+
+    values = {
+        "new_users": stats["today_new"],
+        "total_users": stats["total"],
+        "active_users": stats["active"],
+        "blocked_users": stats["blocked"],
+        "subscribed_users": stats["subscribed"],
+        "funnel": stats["funnel"],
+    }
+    await session.execute(
+        pg_insert(DailyUserStats)
+        .values(stat_date=today, **values)
+        .on_conflict_do_update(
+            index_elements=[DailyUserStats.stat_date],
+            set_={**values, "updated_at": func.now()},
+        )
+    )
+    await session.commit()
+    return stats
+
+
+async def load_dashboard(session: AsyncSession, days: int = 30, _refresh: bool = True) -> dict:
+    """
+    Statistika ekrani uchun ma'lumot - faqat rollup jadvalidan (users skan qilinmaydi).
+
+    Bugungi qator hali bo'lmasa (birinchi ishga tushish) - bir marta jonli yangilanadi.
+    """
+    result = await session.execute(
+        select(DailyUserStats, func.current_date())
+        .where(DailyUserStats.stat_date >= func.current_date() - (2 * days + 1))
+        .order_by(DailyUserStats.stat_date.desc())
+        .execution_options(populate_existing=True)
+    )
+    rows = result.all()
+    today: Optional[date] = rows[0][1] if rows else None
+
+    if _refresh and (not rows or rows[0][0].stat_date != today):
+        await refresh_daily_stats(session)
+        return await load_dashboard(session, days, _refresh=False)
+
+    history: List[DailyUserStats] = [row[0] for row in rows]
+    current = history[0]
+
+    def new_between(start: int, end: int) -> int:
+        # [today - start, today - end] oralig'idagi yangi userlar
+        return sum(
+            r.new_users for r in history
+            if today - timedelta(days=start) <= r.stat_date <= today - timedelta(days=end)
+        )
+
+    funnel: Dict[int, int] = {int(day): count for day, count in (current.funnel or {}).items()}
+
+    return {
+        "total": current.total_users,
+        "active": current.active_users or 0,
+        "blocked": current.blocked_users or 0,
+        "today_new": current.new_users,
+        "week_new": new_between(7, 0),
+        "prev_week_new": new_between(14, 8),
+        "month_new": new_between(30, 0),
+        "prev_month_new": new_between(61, 31),
+        "funnel": sorted(funnel.items()),
+        "daily": [(r.stat_date, r.new_users, r.total_users) for r in history[:TREND_DAYS]],
+        "updated_at": current.updated_at,
+    }
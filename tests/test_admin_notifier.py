@@ -0,0 +1,102 @@
+import asyncio
+import html
+import re
+from unittest import mock
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendMessage
+
+from services import admin_notifier as admin_notifier_module
+from services.admin_notifier import MESSAGE_LIMIT, SEPARATOR, AdminDigestNotifier, shorten_html
+
+# To'liq entity'lar (&amp; &lt; ...) - yarmi kesilgan "&am" bo'lmasligi kerak
+_BROKEN_ENTITY = re.compile(r"&(?![a-z]+;|#\d+;)")
+
+
+def _notifier(**kwargs):
+    params = dict(recipients=[1], interval=10, max_items=50)
+    params.update(kwargs)
+    return AdminDigestNotifier(**params)
+
+
+def test_single_item_has_no_header():
+    assert _notifier()._pack(["<b>one</b>"]) == ["<b>one</b>"]
+
+
+def test_items_are_joined_under_header():
+    messages = _notifier()._pack(["a", "b"])
+    assert len(messages) == 1
+    assert messages[0].startswith("📬 <b>Новые события: 2</b>")
+    assert messages[0].endswith(f"a{SEPARATOR}b")
+
+
+def test_items_are_split_across_messages_at_limit():
+    items = ["x" * 3000, "y" * 3000, "z" * 3000]
+    messages = _notifier()._pack(items)
+    assert len(messages) == 3
+    assert all(len(message) <= MESSAGE_LIMIT for message in messages)
+
+
+def test_oversized_item_is_shortened_without_breaking_markup():
+    item = "<b>Ответ</b>\n" + "a&amp;b&lt;" * 2000
+    messages = _notifier()._pack(["first", item])
+
+    assert all(len(message) <= MESSAGE_LIMIT for message in messages)
+    shortened = messages[-1]
+    assert shortened.endswith("…")
+    assert "<b>" not in shortened
+    assert not _BROKEN_ENTITY.search(shortened)
+
+
+def test_shorten_html_round_trips_text():
+    shortened = shorten_html("<i>5 &lt; 6</i> &amp; more", 100)
+    assert html.unescape(shortened) == "5 < 6 & more…"
+
+
+class _Bot:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        await asyncio.sleep(self.delay)
+        if parse_mode == "HTML" and "<broken" in text:
+            raise TelegramBadRequest(
+                SendMessage(chat_id=chat_id, text=text),
+                "Bad Request: can't parse entities: unclosed tag",
+            )
+        self.sent.append((chat_id, parse_mode, text))
+
+
+async def _direct_send(chat_id, factory):
+    return await factory()
+
+
+def test_parse_error_falls_back_to_plain_text():
+    bot = _Bot()
+    notifier = _notifier()
+    notifier.bot = bot
+
+    with mock.patch.object(admin_notifier_module.send_engine, "send", _direct_send):
+        asyncio.run(notifier._send(1, "<broken &amp; item"))
+
+    assert bot.sent == [(1, None, "<broken & item")]
+    assert notifier.stats == {"queued": 0, "messages": 1, "failed": 0}
+
+
+def test_stop_waits_for_running_flush_and_sends_late_items():
+    bot = _Bot(delay=0.2)
+    notifier = _notifier()
+
+    async def scenario():
+        notifier.start(bot)
+        notifier.notify("first")
+        notifier._wakeup.set()
+        await asyncio.sleep(0.05)  # flush yuborish o'rtasida
+        notifier.notify("late")
+        await notifier.stop()
+
+    with mock.patch.object(admin_notifier_module.send_engine, "send", _direct_send):
+        asyncio.run(scenario())
+
+    assert [text for _, _, text in bot.sent] == ["first", "late"]
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.methods import SendMessage
+
+from services.delivery_errors import FLOOD, INVALID, PERMANENT, TRANSIENT, classify_failure
+
+METHOD = SendMessage(chat_id=1, text="x")
+
+
+def test_retry_after_is_flood_with_delay():
+    failure = classify_failure(TelegramRetryAfter(METHOD, "Flood control exceeded", retry_after=17))
+    assert failure.kind == FLOOD
+    assert failure.retry_after == 17.0
+
+
+def test_forbidden_is_permanent():
+    failure = classify_failure(TelegramForbiddenError(METHOD, "Forbidden: bot was blocked by the user"))
+    assert failure.kind == PERMANENT
+    assert failure.error.startswith("TelegramForbiddenError")
+
+
+@pytest.mark.parametrize("message", [
+    "Bad Request: chat not found",
+    "Bad Request: user not found",
+    "Bad Request: PEER_ID_INVALID",
+])
+def test_bad_request_about_user_is_permanent(message):
+    assert classify_failure(TelegramBadRequest(METHOD, message)).kind == PERMANENT
+
+
+def test_bad_request_about_message_is_invalid():
+    failure = classify_failure(TelegramBadRequest(METHOD, "Bad Request: can't parse entities"))
+    assert failure.kind == INVALID
+    assert failure.retry_after is None
+
+
+@pytest.mark.parametrize("exc", [
+    TelegramNetworkError(METHOD, "timeout"),
+    TelegramServerError(METHOD, "Internal Server Error"),
+    asyncio.TimeoutError(),
+    RuntimeError("unexpected"),
+])
+def test_network_server_and_unknown_errors_are_transient(exc):
+    assert classify_failure(exc).kind == TRANSIENT
+
+
+def test_local_data_errors_are_invalid():
+    assert classify_failure(ValueError("Survey 3 not found")).kind == INVALID
+    assert classify_failure(KeyError("post")).kind == INVALID
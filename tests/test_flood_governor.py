@@ -0,0 +1,108 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services.flood_governor import FloodGovernor, TokenBucket, bulk_send
+
+
+def _governor(**kwargs):
+    params = dict(max_rate=30, min_rate=1, increase=1, decrease=0.5, latency_threshold=2)
+    params.update(kwargs)
+    return FloodGovernor(**params)
+
+
+def _method(name):
+    return SimpleNamespace(__api_method__=name)
+
+
+@pytest.mark.parametrize("name, governed", [
+    ("sendMessage", True),
+    ("sendPhoto", True),
+    ("copyMessage", True),
+    ("sendChatAction", False),
+    ("getChatMember", False),
+    ("editMessageText", False),
+])
+def test_governs_only_message_sends(name, governed):
+    assert FloodGovernor.governs(_method(name)) is governed
+
+
+def test_flood_halves_rate_and_pauses():
+    governor = _governor()
+    governor.on_flood(5)
+    assert governor.rate == 15
+    assert governor._paused_until > time.monotonic() + 4
+    assert governor.stats["flood_waits"] == 1
+
+
+def test_burst_of_429_decreases_once_per_second():
+    governor = _governor()
+    for _ in range(5):
+        governor.on_flood(1)
+    assert governor.rate == 15
+    assert governor.stats["flood_waits"] == 5
+
+
+def test_rate_never_drops_below_min():
+    governor = _governor(min_rate=4)
+    for _ in range(6):
+        governor._last_decrease = 0.0
+        governor.on_flood(1)
+    assert governor.rate == 4
+
+
+def test_success_increases_additively_up_to_max():
+    governor = _governor()
+    governor.bucket.set_rate(10)
+    governor.on_success(0.1)
+    assert governor.rate == pytest.approx(10.1)
+
+    governor.bucket.set_rate(29.99)
+    governor.on_success(0.1)
+    assert governor.rate == 30
+
+
+def test_slow_response_decreases_rate():
+    governor = _governor()
+    governor.on_success(5)
+    assert governor.rate == pytest.approx(27)
+    assert governor.stats["slow"] == 1
+
+
+def test_token_bucket_debt_is_bounded():
+    bucket = TokenBucket(rate=2)
+    for _ in range(10):
+        bucket.take()
+    assert bucket._tokens >= -bucket.capacity
+
+
+async def _ok(bot, method):
+    return "ok"
+
+
+def test_interactive_send_skips_flood_pause():
+    governor = _governor()
+    governor.on_flood(30)
+
+    async def call():
+        started = time.monotonic()
+        await governor(_ok, None, _method("sendMessage"))
+        return time.monotonic() - started
+
+    assert asyncio.run(call()) < 0.5
+    assert governor.stats["interactive"] == 1
+
+
+def test_bulk_send_waits_for_flood_pause():
+    governor = _governor()
+    governor.on_flood(0.3)
+
+    async def call():
+        bulk_send.set(True)
+        started = time.monotonic()
+        await governor(_ok, None, _method("sendMessage"))
+        return time.monotonic() - started
+
+    assert asyncio.run(call()) >= 0.25
@@ -0,0 +1,95 @@
+import asyncio
+from unittest import mock
+
+from aiogram.dispatcher.event.handler import HandlerObject
+
+from middleware import db as db_middleware
+from middleware.db import DatabaseMiddleware, LazySession
+
+
+class _FakeSession:
+    created = 0
+
+    def __init__(self):
+        _FakeSession.created += 1
+        self.closed = False
+
+    async def execute(self, statement):
+        return statement
+
+    async def close(self):
+        self.closed = True
+
+
+def _patch_maker():
+    _FakeSession.created = 0
+    return mock.patch.object(db_middleware, "async_session_maker", _FakeSession)
+
+
+def test_session_is_not_created_until_used():
+    with _patch_maker():
+        session = LazySession()
+        asyncio.run(session.close())
+        assert not session.used
+        assert _FakeSession.created == 0
+
+
+def test_first_attribute_access_creates_one_session():
+    with _patch_maker():
+        session = LazySession()
+        assert asyncio.run(session.execute("SELECT 1")) == "SELECT 1"
+        asyncio.run(session.execute("SELECT 2"))
+        assert session.used
+        assert _FakeSession.created == 1
+
+        real = session._session
+        asyncio.run(session.close())
+        assert real.closed
+
+
+def _run_middleware(callback, flags=None):
+    middleware = DatabaseMiddleware()
+    data = {"handler": HandlerObject(callback=callback, flags=flags or {})}
+
+    async def handler(event, data):
+        return await callback(event, **{k: v for k, v in data.items() if k == "session"})
+
+    return asyncio.run(middleware(handler, object(), data)), data
+
+
+def test_middleware_skips_handlers_without_session_param():
+    async def no_db(event):
+        return "ok"
+
+    DatabaseMiddleware.stats.update(updates=0, skipped=0, unused=0, used=0)
+    with _patch_maker():
+        result, data = _run_middleware(no_db)
+    assert result == "ok"
+    assert "session" not in data
+    assert DatabaseMiddleware.stats["skipped"] == 1
+
+
+def test_middleware_respects_db_false_flag():
+    async def flagged(event, session=None):
+        return session
+
+    DatabaseMiddleware.stats.update(updates=0, skipped=0, unused=0, used=0)
+    with _patch_maker():
+        result, _ = _run_middleware(flagged, flags={"db": False})
+    assert result is None
+    assert DatabaseMiddleware.stats["skipped"] == 1
+
+
+def test_middleware_counts_used_and_unused_sessions():
+    async def uses_db(event, session):
+        await session.execute("SELECT 1")
+
+    async def ignores_db(event, session):
+        return None
+
+    DatabaseMiddleware.stats.update(updates=0, skipped=0, unused=0, used=0)
+    with _patch_maker():
+        _run_middleware(uses_db)
+        _run_middleware(ignores_db)
+    assert DatabaseMiddleware.stats == {"updates": 2, "skipped": 0, "unused": 1, "used": 1}
+    assert _FakeSession.created == 1
@@ -0,0 +1,21 @@
+import pytest
+
+from config import config
+from services.delivery_errors import DeliveryFailure, FLOOD, TRANSIENT
+from services.outbox import retry_delay
+
+
+def test_retry_delay_uses_retry_after_for_flood():
+    assert retry_delay(3, DeliveryFailure(FLOOD, "x", retry_after=42)) == 42
+    # 0 s retry_after - baribir kamida 1 s
+    assert retry_delay(1, DeliveryFailure(FLOOD, "x", retry_after=0)) == 1.0
+
+
+@pytest.mark.parametrize("attempts, factor", [(1, 1), (2, 2), (3, 4), (4, 8)])
+def test_retry_delay_backs_off_exponentially(attempts, factor):
+    expected = min(config.OUTBOX_RETRY_BASE_SECONDS * factor, config.OUTBOX_RETRY_MAX_SECONDS)
+    assert retry_delay(attempts, DeliveryFailure(TRANSIENT, "x")) == expected
+
+
+def test_retry_delay_is_capped():
+    assert retry_delay(50, DeliveryFailure(TRANSIENT, "x")) == config.OUTBOX_RETRY_MAX_SECONDS
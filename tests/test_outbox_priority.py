@@ -0,0 +1,186 @@
+import asyncio
+import os
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from database.base import Base, BroadcastCampaign, ScheduleDay, SchedulePost, User
+from scheduler.outbox_worker import OutboxWorker
+from scheduler.tasks import SchedulerTasks
+from services import outbox
+from services.flood_governor import bulk_send
+
+# Claim SKIP LOCKED / RETURNING ishlatadi - faqat haqiqiy PostgreSQL'da tekshiriladi
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+needs_postgres = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+
+class _Session:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return _Result(self.rows)
+
+    async def commit(self):
+        pass
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def _row(outbox_id, kind, priority):
+    return SimpleNamespace(outbox_id=outbox_id, kind=kind, priority=priority, locked_until=datetime(2026, 1, 1))
+
+
+def test_claim_orders_by_priority_before_age():
+    session = _Session()
+    asyncio.run(outbox.claim_batch(session, batch_size=10, lease_seconds=60))
+
+    assert (
+        "ORDER BY delivery_outbox.priority DESC, delivery_outbox.available_at, delivery_outbox.outbox_id"
+        in _sql(session.statements[0])
+    )
+
+
+def test_claimed_batch_lists_interactive_rows_first():
+    session = _Session([
+        _row(1, outbox.KIND_BROADCAST, outbox.PRIORITY_BULK),
+        _row(2, outbox.KIND_BROADCAST, outbox.PRIORITY_BULK),
+        _row(3, outbox.KIND_SUBSCRIBE_REQUEST, outbox.PRIORITY_INTERACTIVE),
+    ])
+    rows = asyncio.run(outbox.claim_batch(session, batch_size=10, lease_seconds=60))
+    assert [row.outbox_id for row in rows] == [3, 1, 2]
+
+
+def test_subscribe_request_is_enqueued_as_interactive():
+    session = _Session()
+    asyncio.run(outbox.enqueue_message(session, 1, outbox.KIND_SUBSCRIBE_REQUEST, delay_seconds=2))
+
+    params = session.statements[0].compile(dialect=postgresql.dialect()).params
+    assert params["priority"] == outbox.PRIORITY_INTERACTIVE
+
+
+def test_launch_sequence_is_enqueued_as_interactive():
+    posts = [SimpleNamespace(post_id=i, post_type="text", delay_seconds=5) for i in (1, 2)]
+    session = _Session(posts)
+    user = SimpleNamespace(user_id=7, first_message_sent=False)
+
+    with mock.patch.object(outbox, "enqueue_post_sequence", mock.AsyncMock(return_value=2)) as enqueue:
+        asyncio.run(SchedulerTasks(bot=None).send_launch_sequence(None, session, user, start_delay=2))
+
+    assert enqueue.await_args.kwargs["priority"] == outbox.PRIORITY_INTERACTIVE
+
+
+def test_post_sequence_rows_carry_priority():
+    session = _Session()
+    posts = [SimpleNamespace(post_id=i, delay_seconds=0) for i in (1, 2)]
+    asyncio.run(outbox.enqueue_post_sequence(session, 7, posts, priority=outbox.PRIORITY_INTERACTIVE))
+
+    params = session.statements[0].compile(dialect=postgresql.dialect()).params
+    assert [v for k, v in params.items() if k.startswith("priority")] == [outbox.PRIORITY_INTERACTIVE] * 2
+
+
+def _bulk_flag_during_delivery(priority):
+    worker = OutboxWorker(bot=None)
+    seen = []
+
+    async def deliver(*args):
+        seen.append(bulk_send.get())
+        return True
+
+    async def run():
+        # send_engine workeri kabi: butun task bulk context'da
+        bulk_send.set(True)
+        row = _row(1, outbox.KIND_POST, priority)
+        lease = mock.Mock(can_send=mock.Mock(return_value=True))
+        with mock.patch.object(worker, "_deliver", deliver):
+            await worker._deliver_leased(lease, row, {}, {}, {})
+        return bulk_send.get()
+
+    after = asyncio.run(run())
+    return seen[0], after
+
+
+def test_interactive_rows_bypass_bulk_pacing():
+    assert _bulk_flag_during_delivery(outbox.PRIORITY_INTERACTIVE) == (False, True)
+    assert _bulk_flag_during_delivery(outbox.PRIORITY_BULK) == (True, True)
+
+
+def _in_rollback(scenario):
+    """Sxema va ma'lumotlar bitta tranzaksiyada yaratiladi va oxirida rollback qilinadi."""
+
+    async def run():
+        engine = create_async_engine(TEST_DATABASE_URL)
+        try:
+            async with engine.connect() as conn:
+                transaction = await conn.begin()
+                try:
+                    await conn.run_sync(Base.metadata.create_all)
+                    async with AsyncSession(bind=conn) as session:
+                        await scenario(session)
+                finally:
+                    await transaction.rollback()
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+async def _pending_broadcast(session, users=3) -> None:
+    session.add_all([User(user_id=i, is_subscribed=True) for i in range(1, users + 1)])
+    campaign = BroadcastCampaign(broadcast_type="text", content="news")
+    session.add(campaign)
+    await session.flush()
+    await outbox.enqueue_broadcast(session, campaign.broadcast_id, None)
+
+
+@needs_postgres
+def test_subscribe_request_is_claimed_before_earlier_broadcast():
+    async def scenario(session):
+        await _pending_broadcast(session)
+        await outbox.enqueue_message(session, 2, outbox.KIND_SUBSCRIBE_REQUEST)
+
+        rows = await outbox.claim_batch(session, batch_size=1, lease_seconds=60)
+
+        assert [(row.kind, row.user_id) for row in rows] == [(outbox.KIND_SUBSCRIBE_REQUEST, 2)]
+
+    _in_rollback(scenario)
+
+
+@needs_postgres
+def test_launch_rows_are_claimed_before_pending_broadcast():
+    async def scenario(session):
+        await _pending_broadcast(session)
+        session.add(ScheduleDay(day_number=0))
+        session.add_all([
+            SchedulePost(day_number=0, post_type="text", content=f"post {i}", order_number=i)
+            for i in (1, 2)
+        ])
+        user = await session.get(User, 3)
+        await session.flush()
+
+        await SchedulerTasks(bot=None).send_launch_sequence(None, session, user)
+        rows = await outbox.claim_batch(session, batch_size=2, lease_seconds=60)
+
+        assert [(row.kind, row.user_id) for row in rows] == [(outbox.KIND_POST, 3)] * 2
+
+    _in_rollback(scenario)
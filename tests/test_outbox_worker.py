@@ -0,0 +1,40 @@
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from scheduler.outbox_worker import BatchLease
+
+
+def _lease(lease_seconds=300, margin=30, started=None):
+    value = datetime(2026, 1, 1, 12, 0)
+    rows = [SimpleNamespace(outbox_id=i, locked_until=value) for i in (1, 2, 3)]
+    return BatchLease(rows, time.monotonic() if started is None else started, lease_seconds, margin)
+
+
+def test_batch_lease_allows_sending_before_margin():
+    lease = _lease()
+    assert lease.value == datetime(2026, 1, 1, 12, 0)
+    assert lease.can_send(1)
+
+
+def test_batch_lease_stops_sending_inside_margin():
+    lease = _lease(lease_seconds=300, margin=30, started=time.monotonic() - 275)
+    assert not lease.can_send(1)
+
+
+def test_batch_lease_renewal_moves_deadline_and_drops_lost_rows():
+    lease = _lease(lease_seconds=300, margin=30, started=time.monotonic() - 275)
+    new_value = lease.value + timedelta(minutes=5)
+
+    lease.renewed(new_value, {1, 2}, time.monotonic())
+
+    assert lease.value == new_value
+    assert lease.can_send(1)
+    assert not lease.can_send(3)
+
+
+def test_batch_lease_failed_renewal_keeps_token():
+    lease = _lease()
+    lease.renewed(None, set(), time.monotonic())
+    assert lease.value == datetime(2026, 1, 1, 12, 0)
+    assert not any(lease.can_send(i) for i in (1, 2, 3))
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+import pytz
+
+from config import config
+from scheduler import tasks as tasks_module
+from scheduler.tasks import SchedulerTasks, WATERMARK_FORMAT
+
+NOW = datetime(2026, 3, 10, 14, 30)
+
+
+class _FixedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return pytz.timezone(config.TIMEZONE).localize(NOW.replace(second=42))
+
+
+class _Result:
+    def __init__(self, value):
+        self._value = value
+
+    def scalar_one_or_none(self):
+        return self._value
+
+
+class _Session:
+    def __init__(self, watermark):
+        self.watermark = watermark
+
+    async def execute(self, statement):
+        return _Result(self.watermark)
+
+
+def _window(watermark):
+    with mock.patch.object(tasks_module, "datetime", _FixedDatetime):
+        return asyncio.run(SchedulerTasks(bot=None)._scheduled_window(_Session(watermark)))
+
+
+def test_minute_labels_cover_both_hour_formats():
+    labels = SchedulerTasks._minute_labels(datetime(2026, 1, 1, 9, 59), datetime(2026, 1, 1, 10, 1))
+    assert labels == ["09:59", "9:59", "10:00", "10:01"]
+
+
+def test_minute_labels_single_minute():
+    minute = datetime(2026, 1, 1, 18, 5)
+    assert SchedulerTasks._minute_labels(minute, minute) == ["18:05"]
+
+
+def test_window_without_watermark_is_current_minute():
+    assert _window(None) == (NOW, NOW)
+
+
+def test_window_starts_after_watermark():
+    watermark = (NOW - timedelta(minutes=3)).strftime(WATERMARK_FORMAT)
+    assert _window(watermark) == (NOW - timedelta(minutes=2), NOW)
+
+
+def test_window_is_empty_when_minute_already_done():
+    assert _window(NOW.strftime(WATERMARK_FORMAT)) is None
+
+
+def test_window_is_limited_by_catchup():
+    watermark = (NOW - timedelta(hours=6)).strftime(WATERMARK_FORMAT)
+    start, end = _window(watermark)
+    assert start == max(NOW - timedelta(minutes=config.SCHEDULE_CATCHUP_MINUTES), NOW.replace(hour=0, minute=0))
+    assert end == NOW
+
+
+def test_window_does_not_cross_midnight():
+    early = datetime(2026, 3, 10, 0, 2)
+    watermark = (early - timedelta(minutes=10)).strftime(WATERMARK_FORMAT)
+    with mock.patch.object(_FixedDatetime, "now", classmethod(
+        lambda cls, tz=None: pytz.timezone(config.TIMEZONE).localize(early)
+    )), mock.patch.object(tasks_module, "datetime", _FixedDatetime):
+        start, end = asyncio.run(SchedulerTasks(bot=None)._scheduled_window(_Session(watermark)))
+    assert start == datetime(2026, 3, 10, 0, 0)
+    assert end == early
+
+
+@pytest.mark.parametrize("watermark", ["garbage", "2026-13-45"])
+def test_invalid_watermark_falls_back_to_now(watermark):
+    assert _window(watermark) == (NOW, NOW)
@@ -0,0 +1,127 @@
+import asyncio
+import io
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from services import survey_export
+from services.survey_export import FORMAT_CSV, FORMAT_XLSX, build_survey_export
+
+QUESTIONS = [
+    SimpleNamespace(question_id=1, question_text="Имя?"),
+    SimpleNamespace(question_id=2, question_text="Город?"),
+]
+
+
+def _row(response_id, user_id, question_id, answer, username="user", first_name="Ann"):
+    return SimpleNamespace(
+        response_id=response_id,
+        user_id=user_id,
+        username=username,
+        first_name=first_name,
+        completed_at=datetime(2026, 5, 1, 10, 30),
+        question_id=question_id,
+        answer_text=answer,
+    )
+
+
+class _Stream:
+    def __init__(self, rows, fail=False):
+        self.rows = rows
+        self.fail = fail
+        self.closed = False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self.rows:
+            yield row
+        if self.fail:
+            raise RuntimeError("connection lost")
+
+    async def close(self):
+        self.closed = True
+
+
+class _Session:
+    def __init__(self, stream):
+        self._stream = stream
+
+    async def stream(self, statement):
+        return self._stream
+
+
+def _export(rows, fmt=FORMAT_CSV, fail=False):
+    stream = _Stream(rows, fail=fail)
+    return asyncio.run(build_survey_export(_Session(stream), 7, QUESTIONS, fmt)), stream
+
+
+def _csv_lines(file):
+    file.file.seek(0)
+    return file.file.read().decode("utf-8-sig").splitlines()
+
+
+def test_csv_pivots_answers_into_question_columns():
+    rows = [
+        _row(1, 100, 2, "Tashkent"),
+        _row(1, 100, 1, "Ann"),
+        _row(2, 200, None, None, username=None, first_name=None),
+    ]
+    (file, count), stream = _export(rows)
+
+    assert count == 2
+    assert file.filename == "survey_7_responses.csv"
+    assert _csv_lines(file) == [
+        "User ID,Username,Имя,Дата завершения,Имя?,Город?",
+        "100,user,Ann,01.05.2026 10:30,Ann,Tashkent",
+        "200,,,01.05.2026 10:30,,",
+    ]
+    assert stream.closed
+    file.close()
+
+
+def test_answers_to_deleted_questions_are_ignored():
+    (file, count), _ = _export([_row(1, 100, 99, "stale"), _row(1, 100, 1, "Ann")])
+    assert count == 1
+    assert _csv_lines(file)[1].endswith(",Ann,")
+    file.close()
+
+
+def test_empty_export_returns_none():
+    (file, count), _ = _export([])
+    assert (file, count) == (None, 0)
+
+
+def test_xlsx_export_is_a_workbook():
+    openpyxl = pytest.importorskip("openpyxl")
+    (file, count), _ = _export([_row(1, 100, 1, "Ann")], fmt=FORMAT_XLSX)
+
+    file.file.seek(0)
+    sheet = openpyxl.load_workbook(io.BytesIO(file.file.read())).active
+    assert [cell.value for cell in sheet[2]][:5] == [100, "user", "Ann", "01.05.2026 10:30", "Ann"]
+    assert file.filename.endswith(".xlsx")
+    file.close()
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        _export([_row(1, 100, 1, "Ann")], fmt="exe")
+
+
+def test_spool_is_closed_when_stream_fails():
+    spools = []
+    real_spool = survey_export.SpooledTemporaryFile
+
+    def tracking_spool(*args, **kwargs):
+        spool = real_spool(*args, **kwargs)
+        spools.append(spool)
+        return spool
+
+    with mock.patch.object(survey_export, "SpooledTemporaryFile", tracking_spool):
+        with pytest.raises(RuntimeError):
+            _export([_row(1, 100, 1, "Ann")], fail=True)
+
+    assert len(spools) == 1 and spools[0].closed
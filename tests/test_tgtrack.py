@@ -0,0 +1,110 @@
+import asyncio
+from unittest import mock
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from config import config
+from services.tgtrack import TgTrackEmitter
+
+TOKEN = "test-token"
+
+
+class _Stub:
+    """TGTrack API o'rniga lokal server: dastlabki `failures` so'rovga 503 qaytaradi."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.received = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def handle(self, request):
+        await self.release.wait()
+        if self.failures:
+            self.failures -= 1
+            return web.Response(status=503, text="unavailable")
+        self.received.append((request.match_info["method"], await request.json()))
+        return web.json_response({"ok": True})
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post(f"/{TOKEN}/{{method}}", self.handle)
+        self.server = TestServer(app, host="127.0.0.1")
+        await self.server.start_server()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release.set()
+        await self.server.close()
+
+    def emitter(self, **kwargs):
+        params = dict(queue_size=10, workers=1, max_retries=3, timeout=5)
+        params.update(kwargs)
+        return TgTrackEmitter(base_url=str(self.server.make_url("")), **params)
+
+
+def _run(scenario):
+    with mock.patch.object(config, "TGTRACK", TOKEN):
+        asyncio.run(scenario())
+
+
+def test_server_error_is_retried_with_backoff_then_sent():
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await real_sleep(0)
+
+    async def scenario():
+        async with _Stub(failures=2) as stub:
+            emitter = stub.emitter()
+            with mock.patch("asyncio.sleep", fake_sleep):
+                assert await emitter.emit("send_reach_goal", {"user_id": "1"})
+                await emitter.stop()
+
+            assert stub.received == [("send_reach_goal", {"user_id": "1"})]
+            assert emitter.stats == {"sent": 1, "failed": 0, "retried": 2, "dropped": 0}
+            assert [d for d in delays if d] == [1, 2]
+
+    _run(scenario)
+
+
+def test_full_queue_drops_instead_of_blocking():
+    async def scenario():
+        async with _Stub() as stub:
+            stub.release.clear()
+            emitter = stub.emitter(queue_size=1)
+
+            assert await emitter.emit("a", {})
+            await asyncio.sleep(0.05)  # worker "a" ni olib, server javobini kutmoqda
+            assert await emitter.emit("b", {})
+            dropped = await asyncio.wait_for(emitter.emit("c", {}), timeout=1)
+
+            assert dropped is False
+            assert emitter.stats["dropped"] == 1
+
+            stub.release.set()
+            await emitter.stop()
+            assert [method for method, _ in stub.received] == ["a", "b"]
+
+    _run(scenario)
+
+
+def test_stop_drains_queue_and_closes_session():
+    async def scenario():
+        async with _Stub() as stub:
+            emitter = stub.emitter(workers=2)
+            for i in range(5):
+                assert await emitter.emit("send_reach_goal", {"user_id": str(i)})
+            session = emitter._session
+
+            await emitter.stop()
+
+            assert sorted(p["user_id"] for _, p in stub.received) == ["0", "1", "2", "3", "4"]
+            assert emitter.stats["sent"] == 5
+            assert session.closed
+            assert not emitter.running and emitter._session is None
+
+    _run(scenario)
@@ -0,0 +1,48 @@
+# utils/bot_info.py
+import asyncio
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.enums import ParseMode
+from aiogram.types import User as BotUser
+
+from config import config
+from services.flood_governor import flood_governor
+
+_me: Optional[BotUser] = None
+_lock = asyncio.Lock()
+
+
+def create_bot() -> Bot:
+    """Bot instansi (bot.py va worker.py uchun umumiy sozlamalar bilan)"""
+    # BOT_API_SERVER / USE_LOCAL_SERVER - lokal Bot API server bilan ishlash uchun
+    session = AiohttpSession(
+        api=TelegramAPIServer.from_base(config.BOT_API_SERVER, is_local=config.USE_LOCAL_SERVER)
+    )
+    # Barcha yuborishlar uchun umumiy adaptiv flood-control
+    session.middleware(flood_governor)
+    return Bot(
+        token=config.BOT_TOKEN,
+        session=session,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
+
+
+async def resolve_bot_identity(bot: Bot) -> BotUser:
+    """Bot profilini (get_me) bir marta olib, process bo'yi qayta ishlatish"""
+    global _me
+    if _me is None:
+        async with _lock:
+            if _me is None:
+                _me = await bot.get_me()
+    return _me
+
+
+def get_bot_username() -> str:
+    """Link'lar uchun bot username (startup'dan oldin - config.BOT_USERNAME)"""
+    if _me is not None and _me.username:
+        return _me.username
+    return config.BOT_USERNAME
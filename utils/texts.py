@@ -80,14 +80,38 @@ class Texts:
 ✅ Активные: {active_users} ({active_percent}%)
 🚫 Заблокировали бота: {blocked_users} ({blocked_percent}%)
 📥 Новые за сегодня: {today_new}
-📈 Новые за неделю: {week_new}
-📆 Новые за месяц: {month_new}
+📈 Новые за неделю: {week_new} {week_trend}
+📆 Новые за месяц: {month_new} {month_trend}
+
+━━━━━━━━━━━━━━━━━━━━
+
+📅 <b>ПО ДНЯМ:</b>
+
+{daily_data}
 
 ━━━━━━━━━━━━━━━━━━━━
 
 📉 <b>ВОРОНКА ПРОГРЕВА:</b>
 
 {funnel_data}
+
+<i>Обновлено: {updated_at}</i>
+"""
+
+    DB_STATS_MESSAGE = """
+🗄 <b>БАЗА ДАННЫХ</b>
+
+📨 Апдейтов: {updates}
+✅ Использовали БД: {used}
+💤 Сессия не понадобилась: {unused}
+⏭ Без сессии: {skipped}
+
+🔌 Пул: {pool_status}
+⏱ Выдач соединений: {checkouts} (overflow: {overflow_hits}, таймауты: {timeouts})
+⌛ Ожидание соединения: среднее {wait_avg_ms:.1f} мс, макс {wait_max_ms:.1f} мс
+🐢 Медленных запросов: {slow_queries} из {queries}
+
+📤 Лимит отправки: {send_rate:.1f} сообщ./с (429: {flood_waits}, медленных ответов: {slow_sends})
 """
     
     BROADCAST_START = """
@@ -0,0 +1,86 @@
+# worker.py
+"""
+Scheduler va outbox worker uchun alohida process (SCHEDULER_MODE=worker).
+
+Update'larni qabul qilmaydi: bot.py faqat user'larga javob beradi, og'ir
+joblar (rejalashtirilgan postlar, update_user_days, tozalash) shu yerda ishlaydi.
+Bir nechta worker ishga tushirilishi mumkin - scheduler faqat advisory lock'ni
+olgan liderda ishlaydi, outbox esa SKIP LOCKED bilan hammasi tomonidan bo'linadi.
+"""
+import asyncio
+import logging
+import signal
+import sys
+
+from config import config
+from database import init_db, close_db
+from database.crud import preload_settings
+from scheduler.jobs import create_scheduler, create_leader_election
+from scheduler.outbox_worker import OutboxWorker
+from services.send_engine import send_engine
+from services.tgtrack import tgtrack_emitter
+from services.admin_notifier import admin_notifier
+from utils.bot_info import create_bot, resolve_bot_identity
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout),
+        logging.FileHandler('worker.log')
+    ]
+)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    try:
+        config.validate()
+    except ValueError as e:
+        logger.error(f"Configuration error: {e}")
+        sys.exit(1)
+
+    bot = create_bot()
+    scheduler = create_scheduler(bot)
+    leader = create_leader_election(scheduler)
+    outbox_worker = OutboxWorker(bot)
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    try:
+        await init_db()
+        cached = await preload_settings()
+        logger.info(f"Preloaded {cached} settings")
+        me = await resolve_bot_identity(bot)
+        logger.info(f"Worker for @{me.username}")
+
+        await send_engine.start()
+        await tgtrack_emitter.start()
+        admin_notifier.start(bot)
+        outbox_worker.start()
+        leader.start()
+
+        await stop_event.wait()
+    finally:
+        logger.info("Worker shutting down...")
+        await leader.stop()
+        if scheduler.running:
+            scheduler.shutdown()
+        await outbox_worker.stop()
+        await admin_notifier.stop()
+        await send_engine.stop()
+        await tgtrack_emitter.stop()
+        await close_db()
+        await bot.session.close()
+        logger.info("Worker stopped!")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except Exception as e:
+        logger.error(f"Fatal error: {e}")
+        sys.exit(1)